@@ -1,22 +1,52 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
-import joblib
-from datetime import datetime, timedelta, timezone
-import holidays
 import os
-import requests
-import json
+import hmac
 import traceback
-import lightgbm as lgb
-from sklearn.multioutput import MultiOutputRegressor
-from sklearn.preprocessing import MinMaxScaler
+import concurrent.futures
+from model_bundle import (
+    current_bundle_version,
+    list_bundle_versions,
+    load_serving_model,
+    load_zone_lookup,
+    model_files_fingerprint,
+    set_current_bundle,
+)
+from model_registry import ModelRegistry, ModelState
+from time_features import TIME_FEATURE_NAMES, time_features_frame
+from weather_forecast import ForecastCache
+from prediction_grid import GridMaterializer
+from micro_batcher import MicroBatcher
+from zone_index import ZoneIndex
+import prediction_encoding
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-MODEL_DIR = os.path.join(BASE_DIR, "models_ml/")
+MODEL_DIR = os.environ.get("MODEL_DIR", os.path.join(BASE_DIR, "models_ml/"))
+ZONES_GEOJSON_PATH = os.environ.get(
+    "ZONES_GEOJSON_PATH", os.path.join(BASE_DIR, "..", "Dataset", "zones.geojson")
+)
 WEATHER_API_KEY = os.environ.get("WEATHER_API_KEY", "19588a43a473ec2b97e25d5758972d61")
-WEATHER_API_ENDPOINT = "https://api.openweathermap.org/data/2.5/forecast"
+WEATHER_API_ENDPOINT = os.environ.get(
+    "WEATHER_API_ENDPOINT", "https://api.openweathermap.org/data/2.5/forecast"
+)
+FORECAST_TTL_SECONDS = int(os.environ.get("FORECAST_TTL_SECONDS", 1800))
+FORECAST_REFRESH_SECONDS = int(os.environ.get("FORECAST_REFRESH_SECONDS", 900))
+LOCAL_TZ_NAME = "America/New_York"
+MAX_BATCH_HOURS = int(os.environ.get("MAX_BATCH_HOURS", 168))
+SERVING_MODE = os.environ.get("SERVING_MODE", "sync")
+MODEL_FORMAT = os.environ.get("MODEL_FORMAT", "auto")
+COMPILED_MAX_ROWS = int(os.environ.get("COMPILED_MAX_ROWS", 24))
+MICRO_BATCH_MAX_SIZE = int(os.environ.get("MICRO_BATCH_MAX_SIZE", 64))
+MICRO_BATCH_MAX_WAIT_MS = float(os.environ.get("MICRO_BATCH_MAX_WAIT_MS", 2))
+MICRO_BATCH_TIMEOUT_SECONDS = float(os.environ.get("MICRO_BATCH_TIMEOUT_SECONDS", 5))
+GRID_PAST_HOURS = int(os.environ.get("GRID_PAST_HOURS", 24))
+GRID_POLL_SECONDS = int(os.environ.get("GRID_POLL_SECONDS", 5))
+MAX_ZONE_LOOKUP_POINTS = int(os.environ.get("MAX_ZONE_LOOKUP_POINTS", 100000))
+MODEL_WATCH_SECONDS = int(os.environ.get("MODEL_WATCH_SECONDS", 30))
+SMOKE_BATCH_HOURS = int(os.environ.get("SMOKE_BATCH_HOURS", 24))
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
 NYC_LAT = 40.7128
 NYC_LON = -74.0060
 OWM_FORECAST_MAP = {
@@ -27,43 +57,35 @@ OWM_FORECAST_MAP = {
     "snow.3h": "snowfall",
 }
 
-print("--- API Server Starting (Using 2-Year Model) ---")
-print(f"Loading assets from: {os.path.abspath(MODEL_DIR)}")
-try:
-    model_path = os.path.join(MODEL_DIR, "lgbm_demand_model_2yr.joblib")
-    model = joblib.load(model_path)
-    print(f"Model loaded.")
 
-    feature_scaler_path = os.path.join(MODEL_DIR, "feature_scaler_ml_2yr.joblib")
-    feature_scaler = joblib.load(feature_scaler_path)
-    print(f"Feature scaler loaded.")
+def load_model_state(version=None):
+    model = load_serving_model(MODEL_DIR, MODEL_FORMAT, COMPILED_MAX_ROWS, version)
+    return ModelState(model, ZONE_LOOKUP)
 
-    zone_order_path = os.path.join(MODEL_DIR, "zone_order_ml.joblib")
-    ZONE_ORDER = joblib.load(zone_order_path)
-    NUM_ZONES = len(ZONE_ORDER)
-    print(f"Zone order loaded ({NUM_ZONES} zones).")
 
-    feature_names_path = os.path.join(MODEL_DIR, "feature_names_ml_2yr.joblib")
-    EXPECTED_FEATURES = joblib.load(feature_names_path)
+MODEL_REGISTRY = ModelRegistry(
+    load_model_state,
+    lambda state: validate_model_state(state),
+    lambda: model_files_fingerprint(MODEL_DIR),
+    activate=lambda version: set_current_bundle(MODEL_DIR, version),
+    poll_seconds=MODEL_WATCH_SECONDS,
+)
+
+print("--- API Server Starting (Using 2-Year Model) ---")
+print(f"Loading assets from: {os.path.abspath(MODEL_DIR)}")
+try:
+    ZONE_LOOKUP = load_zone_lookup(MODEL_DIR)
+    initial_state = MODEL_REGISTRY.load_initial()
+    print(
+        f"Model {initial_state.version} loaded "
+        f"({type(initial_state.model).__name__}: {initial_state.model.path})."
+    )
+    print(f"Zone order loaded ({initial_state.num_zones} zones).")
+    print(f"Zone lookup loaded ({len(initial_state.borough_positions)} boroughs).")
+    EXPECTED_FEATURES = list(initial_state.model.feature_names)
     print(f"Model expects {len(EXPECTED_FEATURES)} features.")
-    time_feature_names_list = [
-        "year",
-        "hour",
-        "dayofweek",
-        "dayofmonth",
-        "month",
-        "quarter",
-        "dayofyear",
-        "weekofyear",
-        "is_weekend",
-        "is_holiday",
-        "hour_sin",
-        "hour_cos",
-        "month_sin",
-        "month_cos",
-    ]
     EXPECTED_TIME_FEATURES_API = [
-        f for f in EXPECTED_FEATURES if f in time_feature_names_list
+        f for f in EXPECTED_FEATURES if f in TIME_FEATURE_NAMES
     ]
     EXPECTED_WEATHER_FEATURES_API = [
         f for f in EXPECTED_FEATURES if f not in EXPECTED_TIME_FEATURES_API
@@ -80,138 +102,496 @@ except Exception as e:
     traceback.print_exc()
     exit()
 
+try:
+    ZONE_INDEX = ZoneIndex.from_geojson(ZONES_GEOJSON_PATH)
+    print(f"Zone index built ({len(ZONE_INDEX.zone_ids)} zones).")
+except (OSError, ValueError, KeyError) as e:
+    ZONE_INDEX = None
+    print(f"Warning: No zone index, /get_zone disabled: {e}")
 
-def get_weather_forecast(target_dt_utc):
-    print(f"Fetching weather forecast closest to: {target_dt_utc} (UTC)")
-    target_unix_timestamp = int(target_dt_utc.timestamp())
-    params = {
-        "lat": NYC_LAT,
-        "lon": NYC_LON,
-        "appid": WEATHER_API_KEY,
-        "units": "metric",
-    }
-    try:
-        response = requests.get(WEATHER_API_ENDPOINT, params=params, timeout=10)
-        response.raise_for_status()
-        forecast_data = response.json()
-        if "list" not in forecast_data or not forecast_data["list"]:
-            return {key: 0.0 for key in EXPECTED_WEATHER_FEATURES_API}
-        closest_forecast = min(
-            forecast_data["list"], key=lambda x: abs(x["dt"] - target_unix_timestamp)
+
+def forecast_block_to_features(forecast_block):
+    weather_values = {}
+    for owm_key, feature_name in OWM_FORECAST_MAP.items():
+        keys = owm_key.split(".")
+        value = forecast_block
+        try:
+            for key in keys:
+                value = value[key]
+            weather_values[feature_name] = float(value)
+        except (KeyError, TypeError):
+            weather_values[feature_name] = 0.0
+    if "precipitation" in weather_values:
+        weather_values["precipitation"] /= 3.0
+    model_expects_snowfall = "snowfall" in EXPECTED_WEATHER_FEATURES_API
+    model_expects_snow_depth = "snow_depth" in EXPECTED_WEATHER_FEATURES_API
+    if model_expects_snowfall:
+        weather_values["snowfall"] = weather_values.get("snowfall", 0.0) / 3.0
+    elif model_expects_snow_depth:
+        weather_values["snow_depth"] = 0.0
+    return {key: weather_values.get(key, 0.0) for key in EXPECTED_WEATHER_FEATURES_API}
+
+
+FORECAST_CACHE = ForecastCache(
+    WEATHER_API_ENDPOINT,
+    {"lat": NYC_LAT, "lon": NYC_LON, "appid": WEATHER_API_KEY, "units": "metric"},
+    forecast_block_to_features,
+    ttl_seconds=FORECAST_TTL_SECONDS,
+    refresh_interval_seconds=FORECAST_REFRESH_SECONDS,
+)
+if SERVING_MODE == "sync":
+    FORECAST_CACHE.start()
+
+
+def get_weather_forecasts(target_dts_utc, snapshot):
+    """Weather features for each UTC timestamp from a cached forecast snapshot."""
+    target_dts_utc = pd.DatetimeIndex(target_dts_utc)
+    if snapshot is None:
+        print("Warning: No weather forecast available, using zero weather features.")
+        return pd.DataFrame(
+            0.0, index=target_dts_utc, columns=EXPECTED_WEATHER_FEATURES_API
         )
-        forecast_time = datetime.fromtimestamp(closest_forecast["dt"], tz=timezone.utc)
-        print(f"Closest forecast block: {forecast_time}")
-        weather_values = {}
-        for owm_key, feature_name in OWM_FORECAST_MAP.items():
-            keys = owm_key.split(".")
-            value = closest_forecast
-            try:
-                for key in keys:
-                    value = value[key]
-                weather_values[feature_name] = float(value)
-            except (KeyError, TypeError):
-                weather_values[feature_name] = 0.0
-        if "precipitation" in weather_values:
-            weather_values["precipitation"] /= 3.0
-        model_expects_snowfall = "snowfall" in EXPECTED_WEATHER_FEATURES_API
-        model_expects_snow_depth = "snow_depth" in EXPECTED_WEATHER_FEATURES_API
-        if model_expects_snowfall:
-            weather_values["snowfall"] = weather_values.get("snowfall", 0.0) / 3.0
-        elif model_expects_snow_depth:
-            weather_values["snow_depth"] = 0.0
-        final_weather_dict = {
-            key: weather_values.get(key, 0.0) for key in EXPECTED_WEATHER_FEATURES_API
-        }
-        print(f"Weather fetched: {final_weather_dict}")
-        return final_weather_dict
-    except requests.exceptions.RequestException as e:
-        print(f"ERROR: Weather API fail: {e}")
-        return {key: 0.0 for key in EXPECTED_WEATHER_FEATURES_API}
-    except Exception as e:
-        print(f"ERROR: Weather processing error: {e}")
-        traceback.print_exc()
-        return {key: 0.0 for key in EXPECTED_WEATHER_FEATURES_API}
-
-
-def generate_time_features(target_dt_utc, expected_time_cols):
-    """Generates ONLY time features for the target_dt (assumed UTC), including Year."""
-    df_time_features = pd.DataFrame(index=[target_dt_utc])
-    df_time_features["year"] = df_time_features.index.year
-    df_time_features["hour"] = df_time_features.index.hour
-    df_time_features["dayofweek"] = df_time_features.index.dayofweek
-    df_time_features["dayofmonth"] = df_time_features.index.day
-    df_time_features["month"] = df_time_features.index.month
-    df_time_features["quarter"] = df_time_features.index.quarter
-    df_time_features["dayofyear"] = df_time_features.index.dayofyear
-    df_time_features["weekofyear"] = df_time_features.index.isocalendar().week.astype(
-        int
+    return snapshot.features_for(target_dts_utc).reindex(
+        columns=EXPECTED_WEATHER_FEATURES_API
     )
-    df_time_features["is_weekend"] = (
-        df_time_features["dayofweek"].isin([5, 6]).astype(int)
+
+
+def weather_age_seconds(snapshot):
+    return None if snapshot is None else round(snapshot.age_seconds(), 1)
+
+
+def add_weather_headers(response, snapshot):
+    age = weather_age_seconds(snapshot)
+    response.headers["X-Weather-Age-Seconds"] = (
+        "unavailable" if age is None else str(age)
     )
-    target_date = target_dt_utc.date()
-    us_holidays_api = holidays.US(years=[target_date.year])
-    df_time_features["is_holiday"] = 1 if target_date in us_holidays_api else 0
-    seconds_in_day = 24 * 60 * 60
-    seconds_in_year = 365.2425 * seconds_in_day
-    timestamp_sec = target_dt_utc.timestamp()
-    df_time_features["hour_sin"] = np.sin(timestamp_sec * (2 * np.pi / seconds_in_day))
-    df_time_features["hour_cos"] = np.cos(timestamp_sec * (2 * np.pi / seconds_in_day))
-    df_time_features["month_sin"] = np.sin(
-        timestamp_sec * (2 * np.pi / seconds_in_year)
+    response.headers["X-Weather-Stale"] = str(
+        age is None or age > FORECAST_TTL_SECONDS
+    ).lower()
+    return response
+
+
+def localize_to_utc(timestamps_local):
+    timestamps_local = pd.DatetimeIndex(timestamps_local)
+    if timestamps_local.tz is None:
+        timestamps_local = timestamps_local.tz_localize(
+            LOCAL_TZ_NAME, ambiguous=False, nonexistent="shift_forward"
+        )
+    return timestamps_local.tz_convert("UTC")
+
+
+def build_feature_matrix(target_dts_utc, snapshot):
+    """Unscaled model features (EXPECTED_FEATURES order) for many UTC timestamps."""
+    target_dts_utc = pd.DatetimeIndex(target_dts_utc)
+    df_time = time_features_frame(target_dts_utc, EXPECTED_TIME_FEATURES_API)
+    df_weather = get_weather_forecasts(target_dts_utc, snapshot)
+    df_combined_features = pd.concat([df_time, df_weather], axis=1)
+    df_combined_features.index.name = "timestamp"
+    df_combined_features = df_combined_features.reindex(columns=EXPECTED_FEATURES)
+    if df_combined_features.isnull().values.any():
+        df_combined_features.fillna(0.0, inplace=True)
+    return df_combined_features
+
+
+def raw_predictions(state, target_dts_utc, snapshot, outputs=None):
+    df_combined_features = build_feature_matrix(target_dts_utc, snapshot)
+    scaled_input_features = state.model.transform(df_combined_features)
+    return state.model.predict(scaled_input_features, outputs)
+
+
+def predict_demand_matrix(state, target_dts_utc, snapshot, outputs=None):
+    """Rounded, non-negative hours x zones demand from the state's model.
+
+    ``outputs`` limits scoring to those zone positions (columns in that order).
+    """
+    prediction_matrix = raw_predictions(state, target_dts_utc, snapshot, outputs)
+    return np.maximum(0, np.rint(prediction_matrix)).astype(np.int32)
+
+
+def validate_model_state(state):
+    """Rejects a reload candidate that cannot serve the current feature pipeline
+    or gives unusable predictions for a smoke batch of upcoming hours."""
+    if list(state.model.feature_names) != EXPECTED_FEATURES:
+        raise ValueError("Model features differ from the serving feature pipeline.")
+    hours_utc = pd.date_range(
+        start=pd.Timestamp.now(tz="UTC").floor("h"),
+        periods=SMOKE_BATCH_HOURS,
+        freq="h",
     )
-    df_time_features["month_cos"] = np.cos(
-        timestamp_sec * (2 * np.pi / seconds_in_year)
+    prediction_matrix = raw_predictions(
+        state, hours_utc, FORECAST_CACHE.get_snapshot(wait=False)
     )
-    time_cols_present = [
-        col for col in expected_time_cols if col in df_time_features.columns
-    ]
-    return df_time_features[time_cols_present]
+    if prediction_matrix.shape != (SMOKE_BATCH_HOURS, state.num_zones):
+        raise ValueError(f"Smoke batch gave shape {prediction_matrix.shape}.")
+    if not np.isfinite(prediction_matrix).all():
+        raise ValueError("Smoke batch gave non-finite predictions.")
+
+
+def prediction_key(state, snapshot):
+    return (state, snapshot)
+
+
+def current_grid_key():
+    snapshot = FORECAST_CACHE.get_snapshot()
+    return None if snapshot is None else prediction_key(MODEL_REGISTRY.state, snapshot)
+
+
+def grid_hours(key):
+    """UTC hours from GRID_PAST_HOURS ago to the end of the forecast horizon."""
+    snapshot = key[1]
+    start = pd.Timestamp.now(tz="UTC").floor("h") - pd.Timedelta(hours=GRID_PAST_HOURS)
+    end = pd.Timestamp(int(snapshot.block_times[-1]) + 3 * 3600 - 1, unit="s", tz="UTC")
+    return pd.date_range(start=start, end=end.floor("h"), freq="h")
+
+
+PREDICTION_GRID = GridMaterializer(
+    current_grid_key,
+    grid_hours,
+    lambda hours_utc, key: predict_demand_matrix(key[0], hours_utc, key[1]),
+    poll_seconds=GRID_POLL_SECONDS,
+)
+if SERVING_MODE == "sync":
+    PREDICTION_GRID.start()
+
+
+def score_batched(batch_key, requested_dts):
+    """Scores the distinct timestamps of many requests at once and splits the rows.
+
+    ``batch_key`` is the prediction key and the requested zone positions (or None).
+    """
+    key, outputs = batch_key
+    target_dts_utc = requested_dts[0].append(list(requested_dts[1:]))
+    unique_dts = target_dts_utc.unique()
+    inverse = unique_dts.get_indexer(target_dts_utc)
+    prediction_matrix = predict_demand_matrix(key[0], unique_dts, key[1], outputs)
+    lengths = np.cumsum([len(dts) for dts in requested_dts])[:-1]
+    return np.split(prediction_matrix[inverse], lengths)
+
+
+PREDICTION_BATCHER = MicroBatcher(
+    score_batched,
+    max_batch_size=MICRO_BATCH_MAX_SIZE,
+    max_wait_seconds=MICRO_BATCH_MAX_WAIT_MS / 1000,
+).start()
+if SERVING_MODE == "sync":
+    MODEL_REGISTRY.start()
+
+
+def predict_cached(state, target_dts_utc, snapshot, outputs=None):
+    """Predictions from the materialized grid when it covers every hour.
+
+    Single-timestamp misses are handed to the micro-batcher, larger ones (and
+    single ones the batcher has not answered within MICRO_BATCH_TIMEOUT_SECONDS)
+    are scored directly, in both cases for the ``outputs`` zone positions only.
+    Returns the matrix and whether it came from the grid.
+    """
+    key = prediction_key(state, snapshot)
+    cached = PREDICTION_GRID.lookup(target_dts_utc, key)
+    if cached is not None:
+        return (cached if outputs is None else cached[:, outputs]), True
+    if len(target_dts_utc) == 1:
+        batch_key = (key, None if outputs is None else tuple(outputs))
+        future = PREDICTION_BATCHER.submit(batch_key, target_dts_utc)
+        try:
+            return (
+                PREDICTION_BATCHER.result(future, MICRO_BATCH_TIMEOUT_SECONDS),
+                False,
+            )
+        except concurrent.futures.TimeoutError:
+            print(
+                f"WARNING: Micro-batcher gave no result within "
+                f"{MICRO_BATCH_TIMEOUT_SECONDS}s, scoring directly."
+            )
+    return predict_demand_matrix(state, target_dts_utc, snapshot, outputs), False
+
+
+def selected_zones(state, outputs):
+    zone_order = state.zone_order
+    return zone_order if outputs is None else [zone_order[p] for p in outputs]
+
+
+def zone_predictions(state, prediction_flat, outputs=None):
+    return {
+        str(zone_id): int(prediction_flat[i])
+        for i, zone_id in enumerate(selected_zones(state, outputs))
+    }
+
+
+def parse_zone_filter(state, args):
+    """Zone positions picked by ``locationID`` (comma-separated or a list) and/or
+    ``borough``; None when neither is given, meaning every zone. Raises
+    ValueError for unknown zones or boroughs and for filters that leave no zone.
+    """
+    location_ids = args.get("locationID")
+    borough = args.get("borough")
+    if not location_ids and not borough:
+        return None
+    positions = list(range(state.num_zones))
+    if location_ids:
+        if isinstance(location_ids, str):
+            location_ids = [z for z in location_ids.split(",") if z.strip()]
+        elif not isinstance(location_ids, list):
+            location_ids = [location_ids]
+        positions = []
+        for location_id in location_ids:
+            zone_id = int(str(location_id).strip())
+            if zone_id not in state.zone_positions:
+                raise ValueError(f"Unknown locationID {zone_id}.")
+            positions.append(state.zone_positions[zone_id])
+        positions = list(dict.fromkeys(positions))
+    if borough:
+        if not state.borough_positions:
+            raise ValueError("Borough filter unavailable, rerun load_data.py.")
+        borough_positions = state.borough_positions.get(str(borough).strip().lower())
+        if borough_positions is None:
+            raise ValueError(f"Unknown borough '{borough}'.")
+        in_borough = set(borough_positions)
+        positions = [p for p in positions if p in in_borough]
+        if not positions:
+            raise ValueError(f"No requested locationID is in borough '{borough}'.")
+    return positions
+
+
+def zone_info(zone_id):
+    info = ZONE_LOOKUP.get(zone_id, {})
+    return {
+        "locationID": zone_id,
+        "zone": info.get("zone"),
+        "borough": info.get("borough"),
+    }
+
+
+def zone_demand_payload(state, position, prediction, target_dt_utc, snapshot):
+    return {
+        **zone_info(int(state.zone_order[position])),
+        "timestamp": target_dt_utc.tz_convert(LOCAL_TZ_NAME).isoformat(),
+        "num_rides": int(prediction),
+        "weather_age_seconds": weather_age_seconds(snapshot),
+    }
+
 
+def parse_batch_timestamps(args):
+    """Local timestamps from ``timestamps`` or ``start``/``hours`` (None if neither)."""
+    if args.get("timestamps"):
+        timestamps = args["timestamps"]
+        if isinstance(timestamps, str):
+            timestamps = [t for t in timestamps.split(",") if t.strip()]
+        timestamps_local = pd.DatetimeIndex(
+            [pd.Timestamp(t.strip()) for t in timestamps]
+        )
+    elif args.get("start"):
+        hours = int(args.get("hours", 24))
+        if hours < 1:
+            raise ValueError("'hours' must be at least 1.")
+        timestamps_local = pd.date_range(
+            start=pd.Timestamp(args["start"]), periods=hours, freq="h"
+        )
+    else:
+        return None
+    if len(timestamps_local) > MAX_BATCH_HOURS:
+        raise ValueError(f"At most {MAX_BATCH_HOURS} timestamps per request.")
+    return timestamps_local
+
+
+def batch_payload(state, target_dts_utc, prediction_matrix, snapshot, outputs=None):
+    return {
+        "timezone": LOCAL_TZ_NAME,
+        "timestamps": [
+            ts.isoformat() for ts in target_dts_utc.tz_convert(LOCAL_TZ_NAME)
+        ],
+        "zones": [int(zone_id) for zone_id in selected_zones(state, outputs)],
+        "predictions": prediction_matrix.tolist(),
+        "weather_age_seconds": weather_age_seconds(snapshot),
+        "model_version": state.version,
+    }
+
+
+def merge_json_body(args, body):
+    """Adds a JSON object body to the query ``args``; other JSON is rejected."""
+    if body is None:
+        return args
+    if not isinstance(body, dict):
+        raise ValueError("JSON body must be an object.")
+    args.update(body)
+    return args
+
+
+def parse_zone_points(args):
+    """Latitudes and longitudes from ``lat``/``lon`` (comma-separated or lists) or
+    ``points`` as [lat, lon] pairs."""
+    if args.get("points") is not None:
+        points = np.asarray(args["points"], dtype=np.float64).reshape(-1, 2)
+        lat, lon = points[:, 0], points[:, 1]
+    else:
+        coordinates = []
+        for name in ["lat", "lon"]:
+            values = args.get(name)
+            if values is None or values == "":
+                raise ValueError("Provide 'lat' and 'lon' or 'points'.")
+            if isinstance(values, str):
+                values = [v for v in values.split(",") if v.strip()]
+            coordinates.append(np.atleast_1d(np.asarray(values, dtype=np.float64)))
+        lat, lon = coordinates
+        if len(lat) != len(lon):
+            raise ValueError("'lat' and 'lon' must have the same length.")
+    if len(lat) > MAX_ZONE_LOOKUP_POINTS:
+        raise ValueError(f"At most {MAX_ZONE_LOOKUP_POINTS} points per request.")
+    return lat, lon
+
+
+def encoded_predictions(state, media_type, target_dts_utc, prediction_matrix, outputs):
+    """Binary body and headers for a negotiated non-JSON media type."""
+    return prediction_encoding.encode(
+        media_type,
+        target_dts_utc.tz_convert(LOCAL_TZ_NAME),
+        prediction_matrix,
+        selected_zones(state, outputs),
+    )
+
+
+def binary_response(state, media_type, target_dts_utc, prediction_matrix, outputs):
+    body, headers = encoded_predictions(
+        state, media_type, target_dts_utc, prediction_matrix, outputs
+    )
+    # WSGI servers only write bytes, so this is the one copy of the buffer.
+    return Response(bytes(body), headers=headers)
+
+
+def admin_allowed(remote_addr, headers):
+    """With ADMIN_TOKEN set the X-Admin-Token header must match, otherwise only
+    loopback clients may use the admin endpoints."""
+    if ADMIN_TOKEN:
+        return hmac.compare_digest(headers.get("X-Admin-Token", ""), ADMIN_TOKEN)
+    return remote_addr in ("127.0.0.1", "::1")
+
+
+def model_status():
+    return {
+        **MODEL_REGISTRY.status(),
+        "current_bundle": current_bundle_version(MODEL_DIR),
+        "available_versions": list_bundle_versions(MODEL_DIR),
+    }
+
+
+# Response headers browser clients may read across origins.
+EXPOSED_HEADERS = [
+    "X-Model-Version",
+    "X-Prediction-Cache",
+    "X-Weather-Age-Seconds",
+    "X-Weather-Stale",
+    *prediction_encoding.BINARY_HEADERS,
+]
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=EXPOSED_HEADERS)
 
 
 @app.route("/predict", methods=["GET"])
 def predict():
-    global model, feature_scaler, ZONE_ORDER, EXPECTED_FEATURES, EXPECTED_TIME_FEATURES_API, EXPECTED_WEATHER_FEATURES_API
+    """Every zone's demand for one local hour, or those picked by ``locationID``
+    and/or ``borough``.
+    """
     date_str = request.args.get("date")
     time_str = request.args.get("time")
     if not date_str or not time_str:
         return jsonify({"error": "Missing 'date' or 'time'."}), 400
+    state = MODEL_REGISTRY.state
     try:
-        local_tz_name = "America/New_York"
-        target_dt_naive = pd.Timestamp(f"{date_str} {time_str}")
-        target_dt_local = target_dt_naive.tz_localize(
-            local_tz_name, ambiguous=False, nonexistent="shift_forward"
+        outputs = parse_zone_filter(state, request.args)
+        target_dt_utc = localize_to_utc([pd.Timestamp(f"{date_str} {time_str}")])
+        snapshot = FORECAST_CACHE.get_snapshot()
+        prediction_matrix, cache_hit = predict_cached(
+            state, target_dt_utc, snapshot, outputs
         )
-        target_dt_utc = target_dt_local.tz_convert("UTC")
-        df_time = generate_time_features(target_dt_utc, EXPECTED_TIME_FEATURES_API)
-        if df_time is None or df_time.empty:
-            raise ValueError("Time feature generation failed.")
-        weather_data_dict = get_weather_forecast(target_dt_utc)
-        df_weather = pd.DataFrame([weather_data_dict], index=[target_dt_utc])
-        df_time.index.name = "ts_t"
-        df_weather.index.name = "ts_w"
-        df_combined_features = df_time.join(df_weather, how="left")
-        df_combined_features.index.name = "timestamp"
-        df_combined_features = df_combined_features.reindex(columns=EXPECTED_FEATURES)
-        if df_combined_features.isnull().values.any():
-            df_combined_features.fillna(0.0, inplace=True)
-        scaled_input_features = feature_scaler.transform(df_combined_features)
-        if hasattr(model, "estimators_"):
-            all_predictions = [
-                est.predict(scaled_input_features)[0] for est in model.estimators_
-            ]
-            prediction_flat = np.array(all_predictions)
+        media_type = prediction_encoding.negotiate(request.headers.get("Accept"))
+        if media_type == prediction_encoding.JSON_MEDIA_TYPE:
+            response = jsonify(zone_predictions(state, prediction_matrix[0], outputs))
         else:
-            raise RuntimeError("Loaded model missing 'estimators_'.")
-        predictions = {
-            str(zone_id): max(0, int(round(prediction_flat[i])))
-            for i, zone_id in enumerate(ZONE_ORDER)
-        }
+            response = binary_response(
+                state, media_type, target_dt_utc, prediction_matrix, outputs
+            )
+    except ValueError as ve:
+        print(f"Value Error: {ve}")
+        return jsonify({"error": f"Invalid input/feature error: {ve}"}), 400
+    except Exception as e:
+        print(f"---!!! UNEXPECTED ERROR !!!---")
+        traceback.print_exc()
+        return jsonify({"error": "Prediction failed (server error)."}), 500
+    response = add_weather_headers(response, snapshot)
+    response.headers["X-Prediction-Cache"] = "hit" if cache_hit else "miss"
+    response.headers["X-Model-Version"] = state.version
+    return response
+
+
+@app.route("/predict_demand", methods=["GET"])
+def predict_demand():
+    """One zone's demand for one local hour, scoring only that zone's trees."""
+    date_str = request.args.get("date")
+    time_str = request.args.get("time")
+    location_id = request.args.get("locationID")
+    if not date_str or not time_str or not location_id:
+        return jsonify({"error": "Missing 'date', 'time' or 'locationID'."}), 400
+    state = MODEL_REGISTRY.state
+    try:
+        outputs = parse_zone_filter(state, {"locationID": location_id})
+        target_dt_utc = localize_to_utc([pd.Timestamp(f"{date_str} {time_str}")])
+        snapshot = FORECAST_CACHE.get_snapshot()
+        prediction_matrix, cache_hit = predict_cached(
+            state, target_dt_utc, snapshot, outputs
+        )
+        payload = zone_demand_payload(
+            state, outputs[0], prediction_matrix[0, 0], target_dt_utc[0], snapshot
+        )
+    except ValueError as ve:
+        print(f"Value Error: {ve}")
+        return jsonify({"error": f"Invalid input/feature error: {ve}"}), 400
+    except Exception as e:
+        print(f"---!!! UNEXPECTED ERROR !!!---")
+        traceback.print_exc()
+        return jsonify({"error": "Prediction failed (server error)."}), 500
+    response = add_weather_headers(jsonify(payload), snapshot)
+    response.headers["X-Prediction-Cache"] = "hit" if cache_hit else "miss"
+    response.headers["X-Model-Version"] = state.version
+    return response
+
 
+@app.route("/predict_batch", methods=["GET", "POST"])
+def predict_batch():
+    """Predicts every zone for a list of local timestamps or an hourly range.
+
+    Accepts ``timestamps`` (comma-separated, or a JSON list when POSTed) or
+    ``start`` plus ``hours``; answers with the zone order once and an hours x zones
+    matrix of predictions. ``locationID`` and ``borough`` narrow the zones.
+    Sends Arrow IPC or raw int32 instead of JSON when the Accept header asks.
+    """
+    args = request.args.to_dict()
+    if request.method == "POST":
+        try:
+            merge_json_body(args, request.get_json(silent=True))
+        except ValueError as ve:
+            return jsonify({"error": f"Invalid input: {ve}"}), 400
+    state = MODEL_REGISTRY.state
+    try:
+        timestamps_local = parse_batch_timestamps(args)
+        if timestamps_local is None:
+            return jsonify({"error": "Provide 'timestamps' or 'start'."}), 400
+        outputs = parse_zone_filter(state, args)
+        target_dts_utc = localize_to_utc(timestamps_local)
+        snapshot = FORECAST_CACHE.get_snapshot()
+        prediction_matrix, cache_hit = predict_cached(
+            state, target_dts_utc, snapshot, outputs
+        )
+        media_type = prediction_encoding.negotiate(request.headers.get("Accept"))
+        if media_type == prediction_encoding.JSON_MEDIA_TYPE:
+            response = jsonify(
+                batch_payload(
+                    state, target_dts_utc, prediction_matrix, snapshot, outputs
+                )
+            )
+        else:
+            response = binary_response(
+                state, media_type, target_dts_utc, prediction_matrix, outputs
+            )
     except ValueError as ve:
         print(f"Value Error: {ve}")
         return jsonify({"error": f"Invalid input/feature error: {ve}"}), 400
@@ -219,7 +599,83 @@ def predict():
         print(f"---!!! UNEXPECTED ERROR !!!---")
         traceback.print_exc()
         return jsonify({"error": "Prediction failed (server error)."}), 500
-    return jsonify(predictions)
+    response.headers["X-Prediction-Cache"] = "hit" if cache_hit else "miss"
+    response.headers["X-Model-Version"] = state.version
+    return add_weather_headers(response, snapshot)
+
+
+@app.route("/get_zone", methods=["GET"])
+def get_zone():
+    """Taxi zone containing a lat/lon point."""
+    if ZONE_INDEX is None:
+        return jsonify({"error": "Zone index unavailable."}), 503
+    try:
+        lat = float(request.args.get("lat", ""))
+        lon = float(request.args.get("lon", ""))
+    except ValueError:
+        return jsonify({"error": "Missing or invalid 'lat' or 'lon'."}), 400
+    zone_id = ZONE_INDEX.zone_at(lat, lon)
+    if zone_id is None:
+        return (
+            jsonify({"error": "Point is outside every taxi zone.", "locationID": None}),
+            404,
+        )
+    return jsonify(zone_info(zone_id))
+
+
+@app.route("/get_zone_batch", methods=["GET", "POST"])
+def get_zone_batch():
+    """Taxi zone of many points at once (``null`` for points outside every zone)."""
+    if ZONE_INDEX is None:
+        return jsonify({"error": "Zone index unavailable."}), 503
+    args = request.args.to_dict()
+    try:
+        if request.method == "POST":
+            merge_json_body(args, request.get_json(silent=True))
+        lat, lon = parse_zone_points(args)
+    except ValueError as ve:
+        return jsonify({"error": f"Invalid input: {ve}"}), 400
+    zone_ids = ZONE_INDEX.lookup(lat, lon)
+    return jsonify(
+        {"locationIDs": [int(z) if z >= 0 else None for z in zone_ids.tolist()]}
+    )
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return jsonify(
+        {
+            "prediction_grid": PREDICTION_GRID.metrics(),
+            "weather_forecast": FORECAST_CACHE.status(),
+            "micro_batcher": PREDICTION_BATCHER.metrics(),
+            "model": MODEL_REGISTRY.status(),
+        }
+    )
+
+
+@app.route("/admin/model", methods=["GET"])
+def admin_model():
+    if not admin_allowed(request.remote_addr, request.headers):
+        return jsonify({"error": "Forbidden."}), 403
+    return jsonify(model_status())
+
+
+@app.route("/admin/reload", methods=["POST"])
+def admin_reload():
+    """Loads the current (or given ``version``) bundle in the background and swaps
+    it in once it passes validation; poll /admin/model for the outcome."""
+    if not admin_allowed(request.remote_addr, request.headers):
+        return jsonify({"error": "Forbidden."}), 403
+    args = request.args.to_dict()
+    try:
+        merge_json_body(args, request.get_json(silent=True))
+    except ValueError as ve:
+        return jsonify({"error": f"Invalid input: {ve}"}), 400
+    version = args.get("version")
+    if version and version not in list_bundle_versions(MODEL_DIR):
+        return jsonify({"error": f"Unknown model version '{version}'."}), 404
+    started = MODEL_REGISTRY.reload_in_background(version or None)
+    return jsonify({"started": started, **model_status()}), 202
 
 
 if __name__ == "__main__":
@@ -0,0 +1,364 @@
+import os
+
+os.environ.setdefault("SERVING_MODE", "async")
+
+import asyncio
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import aiohttp
+from aiohttp import web
+import API
+import prediction_encoding
+
+SCORING_THREADS = int(os.environ.get("SCORING_THREADS", 4))
+ASYNC_PORT = int(os.environ.get("ASYNC_PORT", 5000))
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type",
+    "Access-Control-Expose-Headers": ", ".join(API.EXPOSED_HEADERS),
+}
+
+
+class SingleFlight:
+    """Runs at most one computation per key; concurrent callers await the same result.
+
+    Computations go to a bounded thread pool so the event loop keeps accepting
+    requests while models are scored.
+    """
+
+    def __init__(self, max_workers):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="scoring"
+        )
+        self.max_workers = max_workers
+        self.inflight = {}
+        self.computations = 0
+        self.coalesced = 0
+
+    async def run(self, key, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await self.run_awaitable(
+            key, lambda: loop.run_in_executor(self.executor, fn, *args)
+        )
+
+    async def run_awaitable(self, key, make_awaitable):
+        task = self.inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(make_awaitable())
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+            self.computations += 1
+        return await asyncio.shield(task)
+
+    def metrics(self):
+        return {
+            "threads": self.max_workers,
+            "computations": self.computations,
+            "coalesced": self.coalesced,
+            "inflight": len(self.inflight),
+        }
+
+
+SCORING = SingleFlight(SCORING_THREADS)
+
+
+async def predict_coalesced(state, target_dts_utc, snapshot, outputs=None):
+    """Grid lookup on the loop, otherwise one computation per distinct request.
+
+    Single timestamps join the shared micro-batcher; larger batches, and single
+    ones the batcher has not answered in time, are scored on the thread pool.
+    ``outputs`` limits scoring to those zone positions.
+    """
+    key = API.prediction_key(state, snapshot)
+    cached = API.PREDICTION_GRID.lookup(target_dts_utc, key)
+    if cached is not None:
+        return (cached if outputs is None else cached[:, outputs]), True
+    zones_key = None if outputs is None else tuple(outputs)
+    flight_key = (key, zones_key, tuple(target_dts_utc.asi8))
+    if len(target_dts_utc) == 1:
+        try:
+            prediction_matrix = await SCORING.run_awaitable(
+                flight_key,
+                lambda: predict_batched((key, zones_key), target_dts_utc),
+            )
+            return prediction_matrix, False
+        except asyncio.TimeoutError:
+            print(
+                f"WARNING: Micro-batcher gave no result within "
+                f"{API.MICRO_BATCH_TIMEOUT_SECONDS}s, scoring directly."
+            )
+    prediction_matrix = await SCORING.run(
+        flight_key,
+        API.predict_demand_matrix,
+        state,
+        target_dts_utc,
+        snapshot,
+        outputs,
+    )
+    return prediction_matrix, False
+
+
+async def predict_batched(batch_key, target_dts_utc):
+    """Awaits the shared micro-batcher for up to MICRO_BATCH_TIMEOUT_SECONDS."""
+    future = API.PREDICTION_BATCHER.submit(batch_key, target_dts_utc)
+    try:
+        return await asyncio.wait_for(
+            asyncio.wrap_future(future), API.MICRO_BATCH_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        API.PREDICTION_BATCHER.abandon(future)
+        raise
+
+
+async def json_body(request):
+    """The parsed JSON body, or None when it is not valid JSON (as Flask's
+    get_json(silent=True))."""
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+def error_response(message, status):
+    return web.json_response({"error": message}, status=status)
+
+
+def binary_response(state, media_type, target_dts_utc, prediction_matrix, outputs):
+    """Sends the encoded buffer as-is; aiohttp writes memoryviews without copying."""
+    body, headers = API.encoded_predictions(
+        state, media_type, target_dts_utc, prediction_matrix, outputs
+    )
+    content_type = headers.pop("Content-Type")
+    return web.Response(body=body, content_type=content_type, headers=headers)
+
+
+async def predict(request):
+    date_str = request.query.get("date")
+    time_str = request.query.get("time")
+    if not date_str or not time_str:
+        return error_response("Missing 'date' or 'time'.", 400)
+    state = API.MODEL_REGISTRY.state
+    try:
+        outputs = API.parse_zone_filter(state, request.query)
+        target_dt_utc = API.localize_to_utc([pd.Timestamp(f"{date_str} {time_str}")])
+        snapshot = API.FORECAST_CACHE.get_snapshot(wait=False)
+        prediction_matrix, cache_hit = await predict_coalesced(
+            state, target_dt_utc, snapshot, outputs
+        )
+        media_type = prediction_encoding.negotiate(request.headers.get("Accept"))
+        if media_type == prediction_encoding.JSON_MEDIA_TYPE:
+            response = web.json_response(
+                API.zone_predictions(state, prediction_matrix[0], outputs)
+            )
+        else:
+            response = binary_response(
+                state, media_type, target_dt_utc, prediction_matrix, outputs
+            )
+    except ValueError as ve:
+        print(f"Value Error: {ve}")
+        return error_response(f"Invalid input/feature error: {ve}", 400)
+    except Exception as e:
+        print(f"---!!! UNEXPECTED ERROR !!!---")
+        traceback.print_exc()
+        return error_response("Prediction failed (server error).", 500)
+    response = API.add_weather_headers(response, snapshot)
+    response.headers["X-Prediction-Cache"] = "hit" if cache_hit else "miss"
+    response.headers["X-Model-Version"] = state.version
+    return response
+
+
+async def predict_demand(request):
+    date_str = request.query.get("date")
+    time_str = request.query.get("time")
+    location_id = request.query.get("locationID")
+    if not date_str or not time_str or not location_id:
+        return error_response("Missing 'date', 'time' or 'locationID'.", 400)
+    state = API.MODEL_REGISTRY.state
+    try:
+        outputs = API.parse_zone_filter(state, {"locationID": location_id})
+        target_dt_utc = API.localize_to_utc([pd.Timestamp(f"{date_str} {time_str}")])
+        snapshot = API.FORECAST_CACHE.get_snapshot(wait=False)
+        prediction_matrix, cache_hit = await predict_coalesced(
+            state, target_dt_utc, snapshot, outputs
+        )
+        payload = API.zone_demand_payload(
+            state, outputs[0], prediction_matrix[0, 0], target_dt_utc[0], snapshot
+        )
+    except ValueError as ve:
+        print(f"Value Error: {ve}")
+        return error_response(f"Invalid input/feature error: {ve}", 400)
+    except Exception as e:
+        print(f"---!!! UNEXPECTED ERROR !!!---")
+        traceback.print_exc()
+        return error_response("Prediction failed (server error).", 500)
+    response = API.add_weather_headers(web.json_response(payload), snapshot)
+    response.headers["X-Prediction-Cache"] = "hit" if cache_hit else "miss"
+    response.headers["X-Model-Version"] = state.version
+    return response
+
+
+async def predict_batch(request):
+    args = dict(request.query)
+    if request.method == "POST" and request.can_read_body:
+        try:
+            API.merge_json_body(args, await json_body(request))
+        except ValueError as ve:
+            return error_response(f"Invalid input: {ve}", 400)
+    state = API.MODEL_REGISTRY.state
+    try:
+        timestamps_local = API.parse_batch_timestamps(args)
+        if timestamps_local is None:
+            return error_response("Provide 'timestamps' or 'start'.", 400)
+        outputs = API.parse_zone_filter(state, args)
+        target_dts_utc = API.localize_to_utc(timestamps_local)
+        snapshot = API.FORECAST_CACHE.get_snapshot(wait=False)
+        prediction_matrix, cache_hit = await predict_coalesced(
+            state, target_dts_utc, snapshot, outputs
+        )
+        media_type = prediction_encoding.negotiate(request.headers.get("Accept"))
+        if media_type == prediction_encoding.JSON_MEDIA_TYPE:
+            response = web.json_response(
+                API.batch_payload(
+                    state, target_dts_utc, prediction_matrix, snapshot, outputs
+                )
+            )
+        else:
+            response = binary_response(
+                state, media_type, target_dts_utc, prediction_matrix, outputs
+            )
+    except ValueError as ve:
+        print(f"Value Error: {ve}")
+        return error_response(f"Invalid input/feature error: {ve}", 400)
+    except Exception as e:
+        print(f"---!!! UNEXPECTED ERROR !!!---")
+        traceback.print_exc()
+        return error_response("Prediction failed (server error).", 500)
+    response.headers["X-Prediction-Cache"] = "hit" if cache_hit else "miss"
+    response.headers["X-Model-Version"] = state.version
+    return API.add_weather_headers(response, snapshot)
+
+
+async def get_zone(request):
+    if API.ZONE_INDEX is None:
+        return error_response("Zone index unavailable.", 503)
+    try:
+        lat = float(request.query.get("lat", ""))
+        lon = float(request.query.get("lon", ""))
+    except ValueError:
+        return error_response("Missing or invalid 'lat' or 'lon'.", 400)
+    zone_id = API.ZONE_INDEX.zone_at(lat, lon)
+    if zone_id is None:
+        return web.json_response(
+            {"error": "Point is outside every taxi zone.", "locationID": None},
+            status=404,
+        )
+    return web.json_response(API.zone_info(zone_id))
+
+
+async def get_zone_batch(request):
+    if API.ZONE_INDEX is None:
+        return error_response("Zone index unavailable.", 503)
+    args = dict(request.query)
+    try:
+        if request.method == "POST" and request.can_read_body:
+            API.merge_json_body(args, await json_body(request))
+        lat, lon = API.parse_zone_points(args)
+    except ValueError as ve:
+        return error_response(f"Invalid input: {ve}", 400)
+    zone_ids = API.ZONE_INDEX.lookup(lat, lon)
+    return web.json_response(
+        {"locationIDs": [int(z) if z >= 0 else None for z in zone_ids.tolist()]}
+    )
+
+
+async def metrics(request):
+    return web.json_response(
+        {
+            "prediction_grid": API.PREDICTION_GRID.metrics(),
+            "weather_forecast": API.FORECAST_CACHE.status(),
+            "scoring": SCORING.metrics(),
+            "micro_batcher": API.PREDICTION_BATCHER.metrics(),
+            "model": API.MODEL_REGISTRY.status(),
+        }
+    )
+
+
+async def admin_model(request):
+    if not API.admin_allowed(request.remote, request.headers):
+        return error_response("Forbidden.", 403)
+    return web.json_response(API.model_status())
+
+
+async def admin_reload(request):
+    if not API.admin_allowed(request.remote, request.headers):
+        return error_response("Forbidden.", 403)
+    args = dict(request.query)
+    if request.can_read_body:
+        try:
+            API.merge_json_body(args, await json_body(request))
+        except ValueError as ve:
+            return error_response(f"Invalid input: {ve}", 400)
+    version = args.get("version")
+    if version and version not in API.list_bundle_versions(API.MODEL_DIR):
+        return error_response(f"Unknown model version '{version}'.", 404)
+    started = API.MODEL_REGISTRY.reload_in_background(version or None)
+    return web.json_response({"started": started, **API.model_status()}, status=202)
+
+
+@web.middleware
+async def cors_middleware(request, handler):
+    if request.method == "OPTIONS":
+        return web.Response(headers=CORS_HEADERS)
+    response = await handler(request)
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Expose-Headers"] = CORS_HEADERS[
+        "Access-Control-Expose-Headers"
+    ]
+    return response
+
+
+async def start_background(app):
+    """Warms the forecast with the async client before the grid starts building."""
+    app["http_session"] = aiohttp.ClientSession()
+    app["forecast_task"] = asyncio.create_task(
+        API.FORECAST_CACHE.run_async(app["http_session"])
+    )
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, API.FORECAST_CACHE.wait_ready)
+    API.PREDICTION_GRID.start()
+    API.MODEL_REGISTRY.start()
+
+
+async def stop_background(app):
+    API.PREDICTION_GRID.stop()
+    API.MODEL_REGISTRY.stop()
+    API.FORECAST_CACHE.stop()
+    app["forecast_task"].cancel()
+    await app["http_session"].close()
+    SCORING.executor.shutdown(wait=False)
+
+
+def create_app():
+    app = web.Application(middlewares=[cors_middleware])
+    app.router.add_get("/predict", predict)
+    app.router.add_get("/predict_demand", predict_demand)
+    app.router.add_get("/predict_batch", predict_batch)
+    app.router.add_post("/predict_batch", predict_batch)
+    app.router.add_get("/get_zone", get_zone)
+    app.router.add_get("/get_zone_batch", get_zone_batch)
+    app.router.add_post("/get_zone_batch", get_zone_batch)
+    app.router.add_get("/metrics", metrics)
+    app.router.add_get("/admin/model", admin_model)
+    app.router.add_post("/admin/reload", admin_reload)
+    app.on_startup.append(start_background)
+    app.on_cleanup.append(stop_background)
+    return app
+
+
+if __name__ == "__main__":
+    print(f"\n--- Starting async server (2-Year Model, {SCORING_THREADS} threads) ---")
+    web.run_app(create_app(), host="0.0.0.0", port=ASYNC_PORT)
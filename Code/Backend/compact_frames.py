@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+COUNT_DTYPES = [np.uint16, np.int32, np.int64]
+FEATURE_DTYPE = np.float32
+PARQUET_COMPRESSION = "zstd"
+
+
+def count_dtype(max_count):
+    """Narrowest dtype in COUNT_DTYPES that holds every count up to ``max_count``."""
+    for dtype in COUNT_DTYPES:
+        if max_count <= np.iinfo(dtype).max:
+            return dtype
+    raise OverflowError(f"Count {max_count} does not fit in {COUNT_DTYPES[-1]}.")
+
+
+def compact_counts(df):
+    """Non-negative demand counts in the narrowest COUNT_DTYPES dtype."""
+    values = df.to_numpy()
+    if values.size and values.min() < 0:
+        raise ValueError("Demand counts must be non-negative.")
+    return df.astype(count_dtype(int(values.max()) if values.size else 0))
+
+
+def compact_features(df):
+    return df.astype(FEATURE_DTYPE)
+
+
+def frame_mb(df):
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def write_parquet(df, path):
+    """Parquet with zstd; pyarrow keeps uint16/int32/float32 columns on read."""
+    df.to_parquet(path, compression=PARQUET_COMPRESSION)
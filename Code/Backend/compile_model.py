@@ -0,0 +1,143 @@
+import pandas as pd
+import numpy as np
+import os
+import json
+import time
+import joblib
+import traceback
+from demand_models import predict_zones
+from model_bundle import (
+    FEATURE_NAMES_FILE_NAME,
+    MODEL_FILE_NAME,
+    SCALER_FILE_NAME,
+    ZONE_ORDER_FILE_NAME,
+    ModelBundle,
+    set_current_bundle,
+    versioned_bundle_path,
+    write_bundle,
+)
+from tree_engine import CompiledForest, booster_model_strings, source_fingerprint
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(BASE_DIR, "processed_data_ml/")
+MODEL_DIR = os.path.join(BASE_DIR, "models_ml/")
+PROCESSED_FEATURES_FILE = os.path.join(OUTPUT_DIR, "scaled_features_ml_2yr.parquet")
+MODEL_SAVE_PATH = os.path.join(MODEL_DIR, MODEL_FILE_NAME)
+BUNDLE_VERSION = os.environ.get("BUNDLE_VERSION") or time.strftime("%Y%m%d-%H%M%S")
+BUNDLE_PATH = versioned_bundle_path(MODEL_DIR, BUNDLE_VERSION)
+BENCHMARK_REPORT_PATH = os.path.join(MODEL_DIR, "compiled_forest_benchmark.json")
+VALIDATION_ROWS = int(os.environ.get("VALIDATION_ROWS", 24 * 7 * 4))
+MAX_ABS_DIFF = float(os.environ.get("MAX_ABS_DIFF", 1e-6))
+BENCHMARK_BATCH_HOURS = [1, 168]
+BENCHMARK_REPEATS = int(os.environ.get("BENCHMARK_REPEATS", 20))
+
+
+def median_seconds(fn, repeats):
+    fn()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+print("--- Model Compilation Script (2-Year Model) ---")
+print(f"Loading model from: {os.path.abspath(MODEL_SAVE_PATH)}")
+try:
+    model = joblib.load(MODEL_SAVE_PATH)
+    feature_scaler = joblib.load(os.path.join(MODEL_DIR, SCALER_FILE_NAME))
+    zone_order = joblib.load(os.path.join(MODEL_DIR, ZONE_ORDER_FILE_NAME))
+    feature_names = joblib.load(os.path.join(MODEL_DIR, FEATURE_NAMES_FILE_NAME))
+    X = pd.read_parquet(PROCESSED_FEATURES_FILE).to_numpy(dtype=np.float64)
+    print(f"Model ({type(model).__name__}) and {len(X)} feature rows loaded.")
+except FileNotFoundError as fnf:
+    print(f"ERROR: Required file not found: {fnf}. Run train_ml.py first.")
+    exit()
+except Exception as e:
+    print(f"Error loading model or features: {e}")
+    traceback.print_exc()
+    exit()
+
+print("\nCompiling boosters into flat node arrays...")
+try:
+    start = time.perf_counter()
+    forest = CompiledForest.from_model(model)
+    forest.source = source_fingerprint(MODEL_SAVE_PATH)
+    print(
+        f"Compiled {len(forest.tree_roots)} trees / {len(forest.value)} nodes "
+        f"(max depth {forest.max_depth}) in {time.perf_counter() - start:.1f}s."
+    )
+except ValueError as ve:
+    print(f"ERROR: Model cannot be compiled: {ve}")
+    exit()
+
+print(f"\nValidating against LightGBM on the last {VALIDATION_ROWS} rows...")
+X_valid = X[-VALIDATION_ROWS:]
+y_lgbm = predict_zones(model, X_valid)
+y_compiled = forest.predict(X_valid)
+max_abs_diff = float(np.abs(y_lgbm - y_compiled).max())
+rounded_mismatches = int(
+    (np.maximum(0, np.rint(y_lgbm)) != np.maximum(0, np.rint(y_compiled))).sum()
+)
+print(f"Max abs difference: {max_abs_diff:.3e}")
+print(f"Rounded predictions that differ: {rounded_mismatches}")
+if max_abs_diff > MAX_ABS_DIFF:
+    print(f"ERROR: Difference exceeds {MAX_ABS_DIFF}, compiled forest not saved.")
+    exit()
+
+print("\nBenchmarking (median latency)...")
+benchmark = {
+    "model_type": type(model).__name__,
+    "trees": int(len(forest.tree_roots)),
+    "nodes": int(len(forest.value)),
+    "max_abs_diff": max_abs_diff,
+    "rounded_mismatches": rounded_mismatches,
+    "batches": {},
+}
+for hours in BENCHMARK_BATCH_HOURS:
+    X_batch = X[-hours:]
+    lgbm_seconds = median_seconds(
+        lambda: predict_zones(model, X_batch), BENCHMARK_REPEATS
+    )
+    compiled_seconds = median_seconds(
+        lambda: forest.predict(X_batch), BENCHMARK_REPEATS
+    )
+    benchmark["batches"][str(hours)] = {
+        "lightgbm_ms": lgbm_seconds * 1000,
+        "compiled_ms": compiled_seconds * 1000,
+        "speedup": lgbm_seconds / compiled_seconds,
+    }
+    print(
+        f"  {hours:>4} hour(s): LightGBM {lgbm_seconds * 1000:.2f} ms, "
+        f"compiled {compiled_seconds * 1000:.2f} ms "
+        f"({lgbm_seconds / compiled_seconds:.2f}x)"
+    )
+
+write_bundle(
+    BUNDLE_PATH,
+    forest,
+    zone_order,
+    feature_names,
+    feature_scaler.min_,
+    feature_scaler.scale_,
+    version=BUNDLE_VERSION,
+    model_strings=booster_model_strings(model),
+)
+bundle = ModelBundle(BUNDLE_PATH, compiled_max_rows=len(X_valid))
+if not np.array_equal(bundle.predict(X_valid), y_compiled):
+    print("ERROR: Reloaded bundle does not reproduce the compiled predictions.")
+    exit()
+bundle.compiled_max_rows = 0
+if np.abs(bundle.predict(X_valid) - y_lgbm).max() > MAX_ABS_DIFF:
+    print("ERROR: Bundle boosters do not reproduce the LightGBM predictions.")
+    exit()
+set_current_bundle(MODEL_DIR, BUNDLE_VERSION)
+print(
+    f"\nModel bundle {BUNDLE_VERSION} saved to {BUNDLE_PATH} "
+    f"({os.path.getsize(BUNDLE_PATH) / 1e6:.1f} MB) and made current."
+)
+with open(BENCHMARK_REPORT_PATH, "w") as f:
+    json.dump(benchmark, f, indent=2)
+print(f"Benchmark saved to {BENCHMARK_REPORT_PATH}")
+print("\n--- Model Compilation Script End ---")
@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+
+ZONE_FEATURE_NAME = "zone_id"
+SEASONAL_KEY_FEATURES = ["hour", "dayofweek"]
+
+
+def zone_static_features(y):
+    """Per-zone level features derived from an hours x zones demand frame."""
+    return pd.DataFrame(
+        {
+            "zone_log_mean_demand": np.log1p(y.mean(axis=0)),
+            "zone_nonzero_share": (y > 0).mean(axis=0),
+        },
+        index=y.columns,
+    )
+
+
+def predict_zones(model, X, outputs=None):
+    """Returns an (n_hours, n_zones) prediction matrix for any saved model layout.
+
+    ``outputs`` limits prediction to those zone positions, in that order.
+    """
+    if hasattr(model, "estimators_"):
+        estimators = model.estimators_
+        if outputs is not None:
+            estimators = [estimators[i] for i in outputs]
+        return np.column_stack([est.predict(X) for est in estimators])
+    if outputs is None:
+        return model.predict(X)
+    return model.predict(X, outputs)
+
+
+class GlobalZoneRegressor:
+    """A single LightGBM booster trained on long-format (hour, zone) rows.
+
+    The zone ID is a categorical feature, optionally joined with static zone-level
+    features, so one model serves every zone. ``predict`` keeps the hours x zones
+    output shape of the per-zone MultiOutputRegressor. With a validation split the
+    booster stops early and is truncated to ``best_iteration_``.
+    """
+
+    def __init__(self, params, zone_order, zone_features=None):
+        self.params = dict(params)
+        self.zone_order = list(zone_order)
+        self.zone_features = zone_features
+        self.booster_ = None
+        self.best_iteration_ = None
+        self.feature_names_ = None
+
+    def _long_matrix(self, X, outputs=None):
+        X = np.asarray(X, dtype=np.float32)
+        positions = (
+            np.arange(len(self.zone_order)) if outputs is None else np.asarray(outputs)
+        )
+        zone_ids = np.asarray(self.zone_order, dtype=np.float32)[positions]
+        blocks = [
+            np.repeat(X, len(positions), axis=0),
+            np.tile(zone_ids, len(X))[:, None],
+        ]
+        if self.zone_features is not None:
+            static = self.zone_features.reindex(self.zone_order).to_numpy(np.float32)
+            blocks.append(np.tile(static[positions], (len(X), 1)))
+        return np.hstack(blocks)
+
+    def fit(self, X, y, X_valid=None, y_valid=None, early_stopping_rounds=50):
+        import lightgbm as lgb
+
+        base_names = (
+            list(X.columns)
+            if hasattr(X, "columns")
+            else [f"f{i}" for i in range(np.shape(X)[1])]
+        )
+        self.feature_names_ = base_names + [ZONE_FEATURE_NAME]
+        if self.zone_features is not None:
+            self.feature_names_ += list(self.zone_features.columns)
+        params = dict(self.params)
+        num_boost_round = params.pop("n_estimators", 100)
+        train_set = lgb.Dataset(
+            self._long_matrix(X),
+            label=np.asarray(y, dtype=np.float32).reshape(-1),
+            feature_name=self.feature_names_,
+            categorical_feature=[ZONE_FEATURE_NAME],
+        )
+        train_kwargs = {}
+        if X_valid is not None:
+            valid_set = lgb.Dataset(
+                self._long_matrix(X_valid),
+                label=np.asarray(y_valid, dtype=np.float32).reshape(-1),
+                reference=train_set,
+            )
+            train_kwargs["valid_sets"] = [valid_set]
+            train_kwargs["callbacks"] = [
+                lgb.early_stopping(early_stopping_rounds, verbose=False)
+            ]
+        booster = lgb.train(
+            params, train_set, num_boost_round=num_boost_round, **train_kwargs
+        )
+        self.best_iteration_ = booster.best_iteration or booster.current_iteration()
+        self.booster_ = lgb.Booster(
+            model_str=booster.model_to_string(num_iteration=self.best_iteration_)
+        )
+        return self
+
+    def predict(self, X, outputs=None):
+        raw = self.booster_.predict(
+            self._long_matrix(X, outputs),
+            num_iteration=getattr(self, "best_iteration_", None),
+        )
+        return raw.reshape(
+            -1, len(self.zone_order) if outputs is None else len(outputs)
+        )
+
+
+def _nearest_level(levels, values):
+    upper = np.searchsorted(levels, values).clip(0, len(levels) - 1)
+    lower = (upper - 1).clip(0)
+    closer_lower = np.abs(values - levels[lower]) < np.abs(values - levels[upper])
+    return np.where(closer_lower, lower, upper)
+
+
+class SeasonalBaseline:
+    """Hour-of-week mean demand per zone for zones not worth a booster.
+
+    The hour and dayofweek cells are looked up from the (scaled) feature columns by
+    snapping to the values seen in training. Constant zones use one value everywhere.
+    """
+
+    def __init__(self, zone_order, feature_positions, levels, tables):
+        self.zone_order = list(zone_order)
+        self.feature_positions = list(feature_positions)
+        self.levels = levels
+        self.tables = tables
+
+    @classmethod
+    def fit(cls, X, y, constant_zones=()):
+        feature_positions = [list(X.columns).index(c) for c in SEASONAL_KEY_FEATURES]
+        values = np.asarray(X, dtype=np.float64)[:, feature_positions]
+        levels, codes = [], []
+        for j in range(len(feature_positions)):
+            level_values, level_codes = np.unique(values[:, j], return_inverse=True)
+            levels.append(level_values)
+            codes.append(level_codes)
+        num_cells = len(levels[0]) * len(levels[1])
+        cells = codes[0] * len(levels[1]) + codes[1]
+        cell_hours = np.maximum(np.bincount(cells, minlength=num_cells), 1)
+        tables = np.empty((len(y.columns), num_cells), dtype=np.float64)
+        for i, zone_id in enumerate(y.columns):
+            zone_demand = y[zone_id].to_numpy(dtype=np.float64)
+            if zone_id in constant_zones:
+                tables[i] = zone_demand.mean()
+            else:
+                tables[i] = (
+                    np.bincount(cells, weights=zone_demand, minlength=num_cells)
+                    / cell_hours
+                )
+        return cls(y.columns, feature_positions, levels, tables)
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        hour_codes = _nearest_level(self.levels[0], X[:, self.feature_positions[0]])
+        dow_codes = _nearest_level(self.levels[1], X[:, self.feature_positions[1]])
+        return self.tables[:, hour_codes * len(self.levels[1]) + dow_codes].T
+
+
+class ZoneBoosterEnsemble:
+    """Per-zone models, one per entry of ``zone_order``.
+
+    Zones whose strategy is "lightgbm" have a booster; "constant" and
+    "seasonal_mean" zones are answered by ``baseline`` and have ``None`` in
+    ``boosters``. ``train_seconds`` keeps the wall time each booster took to train
+    and ``best_iterations`` the early-stopping round prediction is truncated to.
+    """
+
+    def __init__(
+        self,
+        zone_order,
+        boosters,
+        train_seconds=None,
+        strategies=None,
+        baseline=None,
+        best_iterations=None,
+    ):
+        self.zone_order = list(zone_order)
+        self.boosters = list(boosters)
+        self.train_seconds = dict(train_seconds or {})
+        self.strategies = dict(
+            strategies or {zone_id: "lightgbm" for zone_id in self.zone_order}
+        )
+        self.baseline = baseline
+        self.best_iterations = dict(best_iterations or {})
+
+    def predict(self, X, outputs=None):
+        X = np.asarray(X, dtype=np.float64)
+        if outputs is None:
+            outputs = range(len(self.zone_order))
+        outputs = list(outputs)
+        predictions = np.zeros((len(X), len(outputs)), dtype=np.float64)
+        for column, i in enumerate(outputs):
+            booster = self.boosters[i]
+            if booster is not None:
+                predictions[:, column] = booster.predict(
+                    X, num_iteration=self.best_iterations.get(self.zone_order[i])
+                )
+        if self.baseline is not None:
+            baseline_positions = {
+                self.zone_order.index(z): j
+                for j, z in enumerate(self.baseline.zone_order)
+            }
+            columns = [c for c, i in enumerate(outputs) if i in baseline_positions]
+            if columns:
+                baseline_predictions = self.baseline.predict(X)
+                predictions[:, columns] = baseline_predictions[
+                    :, [baseline_positions[outputs[c]] for c in columns]
+                ]
+        return predictions
@@ -0,0 +1,98 @@
+import os
+import numpy as np
+import pandas as pd
+
+HOURS_PER_DAY = 24
+STATISTICS = ["count", "abs_error", "squared_error", "error", "ape", "ape_count"]
+METRIC_COLUMNS = ["MAE", "RMSE", "MAPE (%)", "Bias"]
+
+
+class ErrorStatistics:
+    """Additive error sums per (hour of day, zone), from one pass over the arrays.
+
+    Every report is an aggregation of the (24, zones, statistics) cube, so
+    per-zone, per-hour and overall metrics for any set of excluded zones need no
+    further passes over ``y_true``/``y_pred``. MAPE only counts cells with
+    positive actual demand; bias is mean(prediction - actual).
+    """
+
+    def __init__(self, y_true, y_pred, hours_of_day, zone_ids):
+        y_true = np.asarray(y_true, dtype=np.float64)
+        y_pred = np.asarray(y_pred, dtype=np.float64)
+        if y_true.shape != y_pred.shape:
+            raise ValueError(f"Shapes differ: {y_true.shape} vs {y_pred.shape}.")
+        self.zone_ids = np.asarray(zone_ids)
+        error = y_pred - y_true
+        abs_error = np.abs(error)
+        positive = y_true > 0
+        ape = np.divide(abs_error, y_true, out=np.zeros_like(y_true), where=positive)
+        values = np.stack(
+            [np.ones_like(error), abs_error, error * error, error, ape, positive],
+            axis=-1,
+        )
+        hour_rows = np.eye(HOURS_PER_DAY)[np.asarray(hours_of_day, dtype=np.intp)].T
+        self.cube = (hour_rows @ values.reshape(len(values), -1)).reshape(
+            HOURS_PER_DAY, len(self.zone_ids), len(STATISTICS)
+        )
+
+    def _zone_mask(self, exclude):
+        return ~np.isin(self.zone_ids, list(exclude or []))
+
+    @staticmethod
+    def _metrics(sums):
+        """Metric columns from summed statistics (last axis in STATISTICS order)."""
+        count, abs_error, squared_error, error, ape, ape_count = np.moveaxis(
+            sums, -1, 0
+        )
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return {
+                "MAE": abs_error / count,
+                "RMSE": np.sqrt(squared_error / count),
+                "MAPE (%)": np.where(ape_count > 0, ape / ape_count * 100, np.nan),
+                "Bias": error / count,
+            }
+
+    def per_zone(self, exclude=None):
+        keep = self._zone_mask(exclude)
+        metrics = self._metrics(self.cube[:, keep].sum(axis=0))
+        frame = pd.DataFrame(
+            metrics, index=pd.Index(self.zone_ids[keep], name="ZoneID")
+        )
+        return frame[METRIC_COLUMNS]
+
+    def per_hour(self, exclude=None):
+        keep = self._zone_mask(exclude)
+        metrics = self._metrics(self.cube[:, keep].sum(axis=1))
+        frame = pd.DataFrame(
+            metrics, index=pd.Index(np.arange(HOURS_PER_DAY), name="HourOfDay")
+        )
+        return frame[METRIC_COLUMNS]
+
+    def overall(self, exclude=None):
+        keep = self._zone_mask(exclude)
+        metrics = self._metrics(self.cube[:, keep].sum(axis=(0, 1)))
+        return {name: float(value) for name, value in metrics.items()}
+
+    def worst_zones(self, n, metric="MAE"):
+        return self.per_zone()[metric].nlargest(n).index.tolist()
+
+
+def write_reports(statistics, output_dir, variants, prefix="evaluation_metrics"):
+    """Writes the per-zone and per-hour CSVs of every exclusion variant and a summary.
+
+    ``variants`` maps a file suffix ("" for all zones) to the zone ids it leaves
+    out. Returns the summary frame, one row of overall metrics per variant.
+    """
+    summary = {}
+    for suffix, exclude in variants.items():
+        statistics.per_zone(exclude).to_csv(
+            os.path.join(output_dir, f"{prefix}_per_zone{suffix}.csv")
+        )
+        statistics.per_hour(exclude).to_csv(
+            os.path.join(output_dir, f"{prefix}_per_hour{suffix}.csv")
+        )
+        summary[suffix.lstrip("_") or "all"] = statistics.overall(exclude)
+    summary = pd.DataFrame.from_dict(summary, orient="index")[METRIC_COLUMNS]
+    summary.index.name = "Variant"
+    summary.to_csv(os.path.join(output_dir, f"{prefix}_summary.csv"))
+    return summary
@@ -1,50 +1,34 @@
 import pandas as pd
-from datetime import datetime
-from meteostat import Point, Hourly
 import os
+from weather_store import WeatherStore, weather_provider
 
-LAT = 40.7128
-LON = -74.0060
-ALTITUDE = 10
-location = Point(LAT, LON, ALTITUDE)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CODE_DIR = os.path.dirname(BASE_DIR)
+WEATHER_STORE_DIR = os.environ.get(
+    "WEATHER_STORE_DIR", os.path.join(CODE_DIR, "weather_store")
+)
+WEATHER_PROVIDER = os.environ.get("WEATHER_PROVIDER", "meteostat")
+LEGACY_CSV_FILE = os.path.join(CODE_DIR, "nyc_weather_2024_hourly_meteostat.csv")
 
-OUTPUT_FILE = "nyc_weather_2024_hourly_meteostat.csv"
-
-start_date = datetime(2024, 1, 1)
-end_date = datetime(2024, 12, 31, 23, 59, 59)
-print(f"Fetching historical weather using meteostat from {start_date} to {end_date}...")
+start_date = pd.Timestamp(os.environ.get("WEATHER_START", "2023-01-01 00:00"))
+end_date = pd.Timestamp(os.environ.get("WEATHER_END", "2024-12-31 23:00"))
+print(f"Backfilling historical weather from {start_date} to {end_date}...")
+print(f"Weather store: {WEATHER_STORE_DIR} (provider: {WEATHER_PROVIDER})")
 
 try:
-    data = Hourly(location, start_date, end_date)
-    df_weather = data.fetch()
-
-    if df_weather.empty:
-        print("ERROR: Meteostat fetch returned no data. Check location or date range.")
-        exit()
-
-    print(f"Fetched {len(df_weather)} hourly records.")
-    df_weather = df_weather.rename(
-        columns={
-            "temp": "temperature",
-            "prcp": "precipitation",
-            "snow": "snow_depth",
-            "rhum": "humidity",
-            "wspd": "wind_speed",
-        }
+    weather_store = WeatherStore(WEATHER_STORE_DIR, weather_provider(WEATHER_PROVIDER))
+    if os.path.exists(LEGACY_CSV_FILE):
+        weather_store.seed_once(LEGACY_CSV_FILE)
+    missing_hours = len(weather_store.missing_hours(start_date, end_date))
+    print(f"{missing_hours} hours missing from the store.")
+    weather_store.backfill(start_date, end_date)
+    df_weather = weather_store.read(start_date, end_date, backfill=False, fill=False)
+    print(
+        f"Store holds {len(df_weather)} hours for the range "
+        f"({int(df_weather.isnull().all(axis=1).sum())} without observations)."
     )
-    cols_to_keep = [
-        "temperature",
-        "precipitation",
-        "snow_depth",
-        "humidity",
-        "wind_speed",
-    ]
-    df_weather = df_weather[cols_to_keep]
-    df_weather = df_weather.interpolate(method="time").ffill().bfill()
-    df_weather.to_csv(OUTPUT_FILE)
-    print(f"Historical weather data saved to {OUTPUT_FILE}")
 except Exception as e:
-    print(f"ERROR during meteostat fetch or processing: {e}")
+    print(f"ERROR during weather backfill: {e}")
     import traceback
 
     traceback.print_exc()
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from trip_ingest import build_zone_lut, iter_file_counts
+
+MANIFEST_FILE_NAME = "ingest_manifest.json"
+PARTITION_DIR_NAME = "hourly_partitions"
+HASH_CHUNK_BYTES = 16 * 1024 * 1024
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(file_path, previous=None):
+    """Size, mtime and content hash; the hash is reused while size and mtime match."""
+    stat = os.stat(file_path)
+    fingerprint = {"size": stat.st_size, "mtime": stat.st_mtime}
+    if (
+        previous
+        and previous.get("size") == stat.st_size
+        and previous.get("mtime") == stat.st_mtime
+        and previous.get("sha256")
+    ):
+        fingerprint["sha256"] = previous["sha256"]
+    else:
+        fingerprint["sha256"] = file_sha256(file_path)
+    return fingerprint
+
+
+def load_manifest(output_dir):
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE_NAME)
+    if not os.path.exists(manifest_path):
+        return {"zone_ids": [], "first_hour_utc": None, "num_hours": None, "files": {}}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def save_manifest(output_dir, manifest):
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE_NAME)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def partition_file_name(file_path):
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    path_digest = hashlib.sha1(os.path.abspath(file_path).encode()).hexdigest()[:8]
+    return f"{stem}-{path_digest}.parquet"
+
+
+def write_partition(partition_path, counts, first_hour_utc, zone_ids):
+    """Stores the non-zero cells of one file's count matrix in long format."""
+    hour_pos, zone_pos = np.nonzero(counts)
+    hours_index = pd.date_range(start=first_hour_utc, periods=len(counts), freq="h")
+    df_partition = pd.DataFrame(
+        {
+            "pickup_hour": hours_index[hour_pos],
+            "PULocationID": np.asarray(zone_ids, dtype=np.int32)[zone_pos],
+            "demand": counts[hour_pos, zone_pos].astype(np.int32),
+        }
+    )
+    df_partition.to_parquet(partition_path, index=False)
+
+
+def add_partition(counts, partition_path, first_hour_utc, zone_ids):
+    """Adds a cached partition into an hours x zones count matrix in place."""
+    df_partition = pd.read_parquet(partition_path)
+    hours = df_partition["pickup_hour"].dt.tz_convert("UTC")
+    hour_pos = (
+        (hours - pd.Timestamp(first_hour_utc)) // pd.Timedelta(hours=1)
+    ).to_numpy()
+    zone_ids_part = df_partition["PULocationID"].to_numpy().astype(np.int64)
+    zone_lut = build_zone_lut(zone_ids)
+    zone_pos = np.full(len(zone_ids_part), -1, dtype=np.int32)
+    known = zone_ids_part < len(zone_lut)
+    zone_pos[known] = zone_lut[zone_ids_part[known]]
+    keep = (hour_pos >= 0) & (hour_pos < len(counts)) & (zone_pos >= 0)
+    counts[hour_pos[keep], zone_pos[keep]] += df_partition["demand"].to_numpy()[keep]
+
+
+def build_counts_incremental(
+    output_dir, file_specs, first_hour_utc, num_hours, zone_ids, max_workers=1
+):
+    """Re-counts only new or changed files and assembles the matrix from partitions.
+
+    Unchanged files are recognised through the manifest and contribute their cached
+    hourly partition; files that disappeared are dropped from the manifest.
+    Partitions only hold the hours of the window they were counted for, so a
+    different zone set or hour window invalidates all of them.
+    """
+    partition_dir = os.path.join(output_dir, PARTITION_DIR_NAME)
+    os.makedirs(partition_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    zone_ids = [int(z) for z in zone_ids]
+    window = {
+        "zone_ids": zone_ids,
+        "first_hour_utc": pd.Timestamp(first_hour_utc).isoformat(),
+        "num_hours": int(num_hours),
+    }
+    changed = [name for name, value in window.items() if manifest.get(name) != value]
+    if changed:
+        if manifest["files"]:
+            print(f"{', '.join(changed)} changed, invalidating all cached partitions.")
+        manifest = {**window, "files": {}}
+    entries = {}
+    stale_specs = []
+    for file_path, year in file_specs:
+        key = os.path.abspath(file_path)
+        previous = manifest["files"].get(key)
+        fingerprint = file_fingerprint(file_path, previous)
+        fingerprint["year"] = str(year)
+        fingerprint["partition"] = partition_file_name(file_path)
+        entries[key] = fingerprint
+        if (
+            previous is None
+            or previous.get("sha256") != fingerprint["sha256"]
+            or previous.get("year") != fingerprint["year"]
+            or not os.path.exists(os.path.join(partition_dir, fingerprint["partition"]))
+        ):
+            stale_specs.append((file_path, year))
+        else:
+            fingerprint["trips"] = previous.get("trips")
+    dropped = set(manifest["files"]) - set(entries)
+    print(
+        f"Manifest: {len(file_specs) - len(stale_specs)} cached, "
+        f"{len(stale_specs)} new/changed, {len(dropped)} removed files."
+    )
+    for key in dropped:
+        stale_partition = os.path.join(
+            partition_dir, manifest["files"][key].get("partition", "")
+        )
+        if os.path.isfile(stale_partition):
+            os.remove(stale_partition)
+    stale_keys = {os.path.abspath(f) for f, _ in stale_specs}
+    manifest["files"] = {
+        key: entry for key, entry in entries.items() if key not in stale_keys
+    }
+    save_manifest(output_dir, manifest)
+    for file_path, file_counts in iter_file_counts(
+        stale_specs, first_hour_utc, num_hours, zone_ids, max_workers
+    ):
+        key = os.path.abspath(file_path)
+        entry = entries[key]
+        write_partition(
+            os.path.join(partition_dir, entry["partition"]),
+            file_counts,
+            first_hour_utc,
+            zone_ids,
+        )
+        entry["trips"] = int(file_counts.sum(dtype=np.int64))
+        manifest["files"][key] = entry
+        save_manifest(output_dir, manifest)
+    for key in stale_keys - set(manifest["files"]):
+        print(f"  Warning: {key} failed and is left out of this build.")
+    counts = np.zeros((num_hours, len(zone_ids)), dtype=np.int32)
+    for entry in manifest["files"].values():
+        add_partition(
+            counts,
+            os.path.join(partition_dir, entry["partition"]),
+            first_hour_utc,
+            zone_ids,
+        )
+    return counts
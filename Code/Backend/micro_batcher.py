@@ -0,0 +1,139 @@
+import queue
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future, TimeoutError
+import numpy as np
+
+DELAY_SAMPLE_SIZE = 2048
+
+
+class MicroBatcher:
+    """Coalesces concurrent scoring requests into one call per batch.
+
+    ``submit(key, payload)`` returns a Future. A worker thread takes the first
+    waiting request, keeps collecting for up to ``max_wait_seconds`` or until
+    ``max_batch_size`` requests are in, then calls ``score(key, payloads)`` once per
+    distinct key; it must return one result per payload, in order. Requests
+    whose future was cancelled while queued (a timed-out or disconnected caller)
+    are dropped before scoring.
+    """
+
+    def __init__(self, score, max_batch_size=64, max_wait_seconds=0.002):
+        self.score = score
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.batches = 0
+        self.requests = 0
+        self.cancelled = 0
+        self.timeouts = 0
+        self.batch_sizes = {}
+        self.queue_delays = deque(maxlen=DELAY_SAMPLE_SIZE)
+        self.max_queue_delay = 0.0
+        self._queue = queue.Queue()
+        self._metrics_lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, key, payload):
+        future = Future()
+        self._queue.put((key, payload, future, time.perf_counter()))
+        return future
+
+    def result(self, future, timeout):
+        """``future.result(timeout)``; a caller that gives up abandons the request."""
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            self.abandon(future)
+            raise
+
+    def abandon(self, future):
+        """Cancels a timed-out request (dropped if still queued) and counts it."""
+        future.cancel()
+        with self._metrics_lock:
+            self.timeouts += 1
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _record(self, batch, started):
+        size_bucket = 1 << (len(batch) - 1).bit_length()
+        with self._metrics_lock:
+            self.batches += 1
+            self.requests += len(batch)
+            self.batch_sizes[size_bucket] = self.batch_sizes.get(size_bucket, 0) + 1
+            for _, _, _, submitted in batch:
+                delay = started - submitted
+                self.queue_delays.append(delay)
+                self.max_queue_delay = max(self.max_queue_delay, delay)
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            live = [item for item in batch if item[2].set_running_or_notify_cancel()]
+            if len(live) < len(batch):
+                with self._metrics_lock:
+                    self.cancelled += len(batch) - len(live)
+            if not live:
+                continue
+            batch = live
+            self._record(batch, time.perf_counter())
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[0], []).append(item)
+            for key, items in groups.items():
+                try:
+                    results = self.score(key, [payload for _, payload, _, _ in items])
+                except Exception as e:
+                    traceback.print_exc()
+                    for _, _, future, _ in items:
+                        future.set_exception(e)
+                    continue
+                for (_, _, future, _), result in zip(items, results):
+                    future.set_result(result)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="micro-batcher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def metrics(self):
+        """Batch size histogram (power-of-two buckets) and recent queueing delays."""
+        with self._metrics_lock:
+            delays_ms = np.asarray(self.queue_delays) * 1000
+            metrics = {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_seconds * 1000,
+                "batches": self.batches,
+                "requests": self.requests,
+                "cancelled": self.cancelled,
+                "timeouts": self.timeouts,
+                "mean_batch_size": (
+                    self.requests / self.batches if self.batches else None
+                ),
+                "batch_size_histogram": {
+                    f"<={bucket}": count
+                    for bucket, count in sorted(self.batch_sizes.items())
+                },
+                "queue_delay_ms_max": self.max_queue_delay * 1000,
+            }
+        for q in (50, 95, 99):
+            metrics[f"queue_delay_ms_p{q}"] = (
+                float(np.percentile(delays_ms, q)) if len(delays_ms) else None
+            )
+        return metrics
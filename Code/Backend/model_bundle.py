@@ -0,0 +1,359 @@
+import json
+import os
+import struct
+import numpy as np
+from demand_models import SeasonalBaseline
+from tree_engine import CompiledForest, source_fingerprint
+
+BUNDLE_FILE_NAME = "demand_model_2yr.bundle"
+MODEL_FILE_NAME = "lgbm_demand_model_2yr.joblib"
+SCALER_FILE_NAME = "feature_scaler_ml_2yr.joblib"
+ZONE_ORDER_FILE_NAME = "zone_order_ml.joblib"
+FEATURE_NAMES_FILE_NAME = "feature_names_ml_2yr.joblib"
+ZONE_LOOKUP_FILE_NAME = "zone_lookup_ml.json"
+CURRENT_BUNDLE_FILE_NAME = "current_bundle"
+VERSIONED_BUNDLE_PREFIX = "demand_model_2yr-"
+BUNDLE_MAGIC = b"NYCDEMB1"
+BUNDLE_FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def versioned_bundle_path(model_dir, version):
+    return os.path.join(model_dir, f"{VERSIONED_BUNDLE_PREFIX}{version}.bundle")
+
+
+def list_bundle_versions(model_dir):
+    return sorted(
+        name[len(VERSIONED_BUNDLE_PREFIX) : -len(".bundle")]
+        for name in os.listdir(model_dir)
+        if name.startswith(VERSIONED_BUNDLE_PREFIX) and name.endswith(".bundle")
+    )
+
+
+def _read_pointer(model_dir):
+    pointer_path = os.path.join(model_dir, CURRENT_BUNDLE_FILE_NAME)
+    if not os.path.exists(pointer_path):
+        return []
+    with open(pointer_path) as f:
+        return [line.strip() for line in f.read().splitlines()]
+
+
+def current_bundle_version(model_dir):
+    """Version named by the ``current_bundle`` pointer file (None if absent)."""
+    lines = _read_pointer(model_dir)
+    return (lines[0] or None) if lines else None
+
+
+def current_bundle_model_source(model_dir):
+    """Fingerprint of the joblib model when ``current_bundle`` was last set (None
+    for pointers written before it was recorded)."""
+    lines = _read_pointer(model_dir)
+    return (lines[1] or None) if len(lines) > 1 else None
+
+
+def set_current_bundle(model_dir, version):
+    """Points ``current_bundle`` at a versioned bundle, replacing the file atomically.
+
+    The joblib model's fingerprint is recorded with it, so a model trained after
+    the pointer was set is noticed by load_serving_model.
+    """
+    if not os.path.exists(versioned_bundle_path(model_dir, version)):
+        raise FileNotFoundError(f"No bundle for version {version} in {model_dir}")
+    pointer_path = os.path.join(model_dir, CURRENT_BUNDLE_FILE_NAME)
+    model_path = os.path.join(model_dir, MODEL_FILE_NAME)
+    model_source = source_fingerprint(model_path) if os.path.exists(model_path) else ""
+    with open(pointer_path + ".tmp", "w") as f:
+        f.write(f"{version}\n{model_source}\n")
+    os.replace(pointer_path + ".tmp", pointer_path)
+
+
+def write_bundle(
+    path,
+    forest,
+    zone_order,
+    feature_names,
+    scaler_min,
+    scaler_scale,
+    version=None,
+    model_strings=None,
+):
+    """Writes the compiled forest and its serving metadata as one mappable file.
+
+    Layout: magic, little-endian uint64 header length, JSON header, then every
+    array as raw bytes at a 64-byte aligned offset listed in the header.
+    ``model_strings`` (LightGBM text model per output, None for baseline zones)
+    are stored too, for batches too large for the compiled forest.
+    """
+    arrays = forest.serving_arrays()
+    if model_strings is not None:
+        encoded = [(text or "").encode() for text in model_strings]
+        arrays["booster_text"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        arrays["booster_text_offsets"] = np.concatenate(
+            [[0], np.cumsum([len(text) for text in encoded])]
+        ).astype(np.int64)
+    arrays["scaler_min"] = np.asarray(scaler_min, dtype=np.float64)
+    arrays["scaler_scale"] = np.asarray(scaler_scale, dtype=np.float64)
+    baseline = forest.baseline
+    if baseline is not None:
+        arrays["baseline_positions"] = np.asarray(baseline.zone_order, dtype=np.intp)
+        arrays["baseline_hour_levels"] = baseline.levels[0]
+        arrays["baseline_dow_levels"] = baseline.levels[1]
+        arrays["baseline_tables"] = baseline.tables
+    header = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "version": version,
+        "zone_order": [int(zone_id) for zone_id in zone_order],
+        "feature_names": list(feature_names),
+        "forest": {
+            "num_outputs": forest.num_outputs,
+            "num_features": forest.num_features,
+            "max_depth": forest.max_depth,
+            "link": forest.link,
+            "source": forest.source,
+        },
+        "baseline_feature_positions": (
+            None if baseline is None else [int(p) for p in baseline.feature_positions]
+        ),
+        "arrays": {},
+    }
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        header["arrays"][name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset = _aligned(offset + array.nbytes)
+    header_bytes = json.dumps(header).encode()
+    data_start = _aligned(len(BUNDLE_MAGIC) + 8 + len(header_bytes))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header["arrays"][name]["offset"])
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+class ModelBundle:
+    """A model bundle mapped read-only into memory.
+
+    The arrays are views on a shared file mapping, so every worker process serving
+    the same bundle uses the same physical pages from the OS page cache. Batches
+    of up to ``compiled_max_rows`` go to the compiled forest; larger ones to the
+    LightGBM boosters stored in the bundle, parsed on first use (bundles without
+    them use the forest throughout).
+    """
+
+    def __init__(self, path, compiled_max_rows=24):
+        with open(path, "rb") as f:
+            if f.read(len(BUNDLE_MAGIC)) != BUNDLE_MAGIC:
+                raise ValueError(f"{path} is not a model bundle.")
+            (header_length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_length))
+        if header["format_version"] != BUNDLE_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported bundle format version {header['format_version']}."
+            )
+        mapping = np.memmap(path, dtype=np.uint8, mode="r")
+        data_start = _aligned(len(BUNDLE_MAGIC) + 8 + header_length)
+        arrays = {
+            name: np.ndarray(
+                tuple(spec["shape"]),
+                dtype=np.dtype(spec["dtype"]),
+                buffer=mapping,
+                offset=data_start + spec["offset"],
+            )
+            for name, spec in header["arrays"].items()
+        }
+        baseline = None
+        if header["baseline_feature_positions"] is not None:
+            baseline = SeasonalBaseline(
+                arrays["baseline_positions"],
+                header["baseline_feature_positions"],
+                [arrays["baseline_hour_levels"], arrays["baseline_dow_levels"]],
+                arrays["baseline_tables"],
+            )
+        forest_meta = header["forest"]
+        self.path = path
+        self.compiled_max_rows = compiled_max_rows
+        self.booster_text = arrays.get("booster_text")
+        self.booster_text_offsets = arrays.get("booster_text_offsets")
+        self._boosters = None
+        self.zone_order = header["zone_order"]
+        self.feature_names = header["feature_names"]
+        self.scaler_min = arrays["scaler_min"]
+        self.scaler_scale = arrays["scaler_scale"]
+        self.source = forest_meta["source"]
+        self.version = header.get("version") or source_fingerprint(path)
+        self.forest = CompiledForest(
+            forest_meta["num_outputs"],
+            forest_meta["num_features"],
+            forest_meta["max_depth"],
+            forest_meta["link"],
+            arrays,
+            baseline,
+            self.source,
+        )
+
+    def transform(self, X):
+        """MinMaxScaler.transform with the scaler parameters stored in the bundle."""
+        X_scaled = np.array(X, dtype=np.float64)
+        X_scaled *= self.scaler_scale
+        X_scaled += self.scaler_min
+        return X_scaled
+
+    def boosters(self):
+        """LightGBM booster per output (None for baseline zones), parsed once."""
+        if self._boosters is None:
+            import lightgbm as lgb
+
+            offsets = self.booster_text_offsets
+            self._boosters = [
+                (
+                    lgb.Booster(
+                        model_str=self.booster_text[start:stop].tobytes().decode()
+                    )
+                    if stop > start
+                    else None
+                )
+                for start, stop in zip(offsets[:-1], offsets[1:])
+            ]
+        return self._boosters
+
+    def predict(self, X_scaled, outputs=None):
+        if self.booster_text is None or len(X_scaled) <= self.compiled_max_rows:
+            return self.forest.predict(X_scaled, outputs)
+        X_scaled = np.asarray(X_scaled, dtype=np.float64)
+        if outputs is None:
+            outputs = np.arange(len(self.zone_order))
+        outputs = np.asarray(outputs, dtype=np.intp)
+        boosters = self.boosters()
+        predictions = np.zeros((len(X_scaled), len(outputs)), dtype=np.float64)
+        for column, output in enumerate(outputs):
+            if boosters[output] is not None:
+                predictions[:, column] = boosters[output].predict(X_scaled)
+        return self.forest.add_baseline(X_scaled, outputs, predictions)
+
+
+class PickledModel:
+    """The joblib artifacts written by load_data.py and train_ml.py.
+
+    Small batches are answered by ``forest`` when an up-to-date compiled forest
+    is available.
+    """
+
+    def __init__(self, model_dir, forest=None, compiled_max_rows=24):
+        import joblib
+
+        self.path = os.path.join(model_dir, MODEL_FILE_NAME)
+        self.model = joblib.load(self.path)
+        self.scaler = joblib.load(os.path.join(model_dir, SCALER_FILE_NAME))
+        self.zone_order = list(
+            joblib.load(os.path.join(model_dir, ZONE_ORDER_FILE_NAME))
+        )
+        self.feature_names = list(
+            joblib.load(os.path.join(model_dir, FEATURE_NAMES_FILE_NAME))
+        )
+        self.source = source_fingerprint(self.path)
+        self.version = f"joblib-{self.source}"
+        self.forest = forest
+        self.compiled_max_rows = compiled_max_rows
+
+    def transform(self, X):
+        return self.scaler.transform(X)
+
+    def predict(self, X_scaled, outputs=None):
+        if self.forest is not None and len(X_scaled) <= self.compiled_max_rows:
+            return self.forest.predict(X_scaled, outputs)
+        from demand_models import predict_zones
+
+        return predict_zones(self.model, X_scaled, outputs)
+
+
+def load_zone_lookup(model_dir):
+    """LocationID -> {"borough", "zone"} as written by load_data.py ({} if missing)."""
+    lookup_path = os.path.join(model_dir, ZONE_LOOKUP_FILE_NAME)
+    if not os.path.exists(lookup_path):
+        return {}
+    with open(lookup_path) as f:
+        return {int(zone_id): entry for zone_id, entry in json.load(f).items()}
+
+
+def model_files_fingerprint(model_dir):
+    """Changes whenever a deployment could change what load_serving_model returns."""
+    paths = [
+        os.path.join(model_dir, name)
+        for name in [CURRENT_BUNDLE_FILE_NAME, BUNDLE_FILE_NAME, MODEL_FILE_NAME]
+    ]
+    return tuple(source_fingerprint(p) if os.path.exists(p) else None for p in paths)
+
+
+def load_serving_model(
+    model_dir, model_format="auto", compiled_max_rows=24, version=None
+):
+    """Returns a ModelBundle if an up-to-date one exists, otherwise a PickledModel.
+
+    The bundle is the ``version`` one, else the one ``current_bundle`` points at,
+    else the unversioned BUNDLE_FILE_NAME. An explicitly requested ``version`` is
+    served as it is (a rollback). Otherwise the bundle is out of date once the
+    joblib model differs from the one it was compiled from, or, for the pointer,
+    from the one it was set against; the joblib model is then served instead.
+    Either way a mismatch is kept in the returned model's ``source_mismatch``.
+    ``model_format`` "bundle" insists on the bundle and "joblib" on the pickles
+    (still using a matching bundle's forest for small batches).
+    """
+    requested = version is not None
+    version = version or current_bundle_version(model_dir)
+    if version is not None:
+        bundle_path = versioned_bundle_path(model_dir, version)
+    else:
+        bundle_path = os.path.join(model_dir, BUNDLE_FILE_NAME)
+    model_path = os.path.join(model_dir, MODEL_FILE_NAME)
+    bundle = None
+    if os.path.exists(bundle_path):
+        bundle = ModelBundle(bundle_path, compiled_max_rows)
+    model_source = (
+        source_fingerprint(model_path) if os.path.exists(model_path) else None
+    )
+    bundle_matches = bundle is not None and bundle.source == model_source
+    source_mismatch = None
+    if bundle is not None and model_source is not None and not bundle_matches:
+        expected_source = bundle.source
+        if version is not None and not requested:
+            expected_source = current_bundle_model_source(model_dir) or bundle.source
+        source_mismatch = {
+            "bundle_version": bundle.version,
+            "bundle_source": bundle.source,
+            "expected_model_source": expected_source,
+            "model_source": model_source,
+        }
+        if requested:
+            print(
+                f"Warning: bundle {version} was compiled from a different "
+                f"{MODEL_FILE_NAME}; serving it as requested."
+            )
+        elif model_source != expected_source:
+            print(
+                f"Warning: {MODEL_FILE_NAME} changed since bundle {bundle.version} "
+                "was compiled; serving the joblib model, rerun compile_model.py."
+            )
+            bundle = None
+    if model_format == "bundle" and bundle is None:
+        raise FileNotFoundError(f"No up-to-date model bundle at {bundle_path}")
+    if bundle is not None and model_format != "joblib":
+        model = bundle
+    else:
+        model = PickledModel(
+            model_dir, bundle.forest if bundle_matches else None, compiled_max_rows
+        )
+    model.source_mismatch = source_mismatch
+    return model
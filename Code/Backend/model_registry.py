@@ -0,0 +1,135 @@
+import threading
+import time
+import traceback
+
+
+class ModelState:
+    """One loaded model version and the zone lookups derived from its zone order.
+
+    Never changed after construction: a reload builds a new state and swaps the
+    registry's reference, so a request that picked up a state finishes on it.
+    """
+
+    def __init__(self, model, zone_lookup):
+        self.model = model
+        self.version = model.version
+        self.source_mismatch = getattr(model, "source_mismatch", None)
+        self.zone_order = list(model.zone_order)
+        self.num_zones = len(self.zone_order)
+        self.zone_positions = {
+            int(zone_id): i for i, zone_id in enumerate(self.zone_order)
+        }
+        self.borough_positions = {}
+        for zone_id, position in self.zone_positions.items():
+            borough = zone_lookup.get(zone_id, {}).get("borough")
+            if borough:
+                self.borough_positions.setdefault(borough.lower(), []).append(position)
+        self.loaded_at = time.time()
+
+
+class ModelRegistry:
+    """Holds the serving ModelState and replaces it without stopping the server.
+
+    ``load(version)`` builds a candidate state (None = the current version on
+    disk), ``validate(state)`` raises if it must not serve, ``fingerprint()``
+    summarizes the model files so a watcher thread can notice a new deployment,
+    and ``activate(version)`` records an explicitly requested version on disk.
+    """
+
+    def __init__(self, load, validate, fingerprint, activate=None, poll_seconds=30):
+        self.load = load
+        self.validate = validate
+        self.fingerprint = fingerprint
+        self.activate = activate
+        self.poll_seconds = poll_seconds
+        self.state = None
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_error = None
+        self.reloading = False
+        self._fingerprint = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def load_initial(self):
+        self._fingerprint = self.fingerprint()
+        self.state = self.load(None)
+        return self.state
+
+    def reload(self, version=None):
+        """Loads, validates and swaps in a state; False if skipped or rejected."""
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        self.reloading = True
+        try:
+            started = time.perf_counter()
+            fingerprint = self.fingerprint()
+            candidate = self.load(version)
+            if candidate.version == self.state.version:
+                return False
+            self.validate(candidate)
+            previous, self.state = self.state, candidate
+            if version is not None and self.activate is not None:
+                self.activate(version)
+                fingerprint = self.fingerprint()
+            self._fingerprint = fingerprint
+            self.reloads += 1
+            self.last_error = None
+            print(
+                f"Model {previous.version} replaced by {candidate.version} "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+            return True
+        except Exception as e:
+            self.failed_reloads += 1
+            self.last_error = str(e)
+            print(f"ERROR: Model reload failed, keeping {self.state.version}: {e}")
+            traceback.print_exc()
+            return False
+        finally:
+            self.reloading = False
+            self._reload_lock.release()
+
+    def reload_in_background(self, version=None):
+        if self.reloading:
+            return False
+        threading.Thread(
+            target=self.reload, args=(version,), name="model-reload", daemon=True
+        ).start()
+        return True
+
+    def _watch_loop(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                fingerprint = self.fingerprint()
+            except OSError:
+                continue
+            if fingerprint != self._fingerprint:
+                self._fingerprint = fingerprint
+                self.reload()
+
+    def start(self):
+        if self._thread is None and self.poll_seconds > 0:
+            self._thread = threading.Thread(
+                target=self._watch_loop, name="model-watcher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        state = self.state
+        return {
+            "version": None if state is None else state.version,
+            "model_type": None if state is None else type(state.model).__name__,
+            "loaded_at": None if state is None else state.loaded_at,
+            "source_mismatch": None if state is None else state.source_mismatch,
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+            "reloading": self.reloading,
+            "last_error": self.last_error,
+            "watch_seconds": self.poll_seconds,
+        }
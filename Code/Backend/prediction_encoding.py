@@ -0,0 +1,86 @@
+import numpy as np
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+INT32_MEDIA_TYPE = "application/octet-stream"
+MEDIA_TYPES = [JSON_MEDIA_TYPE, ARROW_MEDIA_TYPE, INT32_MEDIA_TYPE]
+
+
+def negotiate(accept_header):
+    """Preferred media type from an Accept header (JSON when nothing matches)."""
+    candidates = []
+    for i, part in enumerate((accept_header or "").split(",")):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        candidates.append((-q, i, media_type.lower()))
+    for neg_q, _, media_type in sorted(candidates):
+        if neg_q < 0 and media_type in MEDIA_TYPES:
+            return media_type
+    return JSON_MEDIA_TYPE
+
+
+def int32_body(prediction_matrix):
+    """Row-major little-endian int32 bytes of the matrix, without a copy if it is
+    already a C-contiguous ``<i4`` array."""
+    return memoryview(np.ascontiguousarray(prediction_matrix, dtype="<i4")).cast("B")
+
+
+def arrow_body(target_dts, prediction_matrix, zone_order):
+    """Arrow IPC stream with a ``timestamp`` column and a fixed-size-list
+    ``predictions`` column wrapping the matrix buffer (one list per row)."""
+    import pyarrow as pa
+
+    prediction_matrix = np.ascontiguousarray(prediction_matrix, dtype="<i4")
+    num_rows, num_zones = prediction_matrix.shape
+    predictions = pa.FixedSizeListArray.from_arrays(
+        pa.array(prediction_matrix.reshape(-1)), num_zones
+    )
+    schema = pa.schema(
+        [
+            ("timestamp", pa.timestamp("ns", tz=str(target_dts.tz))),
+            ("predictions", predictions.type),
+        ],
+        metadata={"zone_order": ",".join(str(int(z)) for z in zone_order)},
+    )
+    batch = pa.record_batch([pa.array(target_dts), predictions], schema=schema)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(batch)
+    return memoryview(sink.getvalue())
+
+
+BINARY_HEADERS = (
+    "X-Zone-Order",
+    "X-Prediction-Shape",
+    "X-Prediction-Dtype",
+    "X-Timestamps",
+)
+
+
+def binary_headers(media_type, target_dts, prediction_matrix, zone_order):
+    """Headers describing a binary body; the zone order is sent once here."""
+    headers = {
+        "Content-Type": media_type,
+        "Vary": "Accept",
+        "X-Zone-Order": ",".join(str(int(z)) for z in zone_order),
+        "X-Prediction-Shape": ",".join(str(n) for n in prediction_matrix.shape),
+    }
+    if media_type == INT32_MEDIA_TYPE:
+        headers["X-Prediction-Dtype"] = "<i4"
+        headers["X-Timestamps"] = ",".join(ts.isoformat() for ts in target_dts)
+    return headers
+
+
+def encode(media_type, target_dts, prediction_matrix, zone_order):
+    """(body, headers) for a binary media type picked by ``negotiate``."""
+    if media_type == ARROW_MEDIA_TYPE:
+        body = arrow_body(target_dts, prediction_matrix, zone_order)
+    else:
+        body = int32_body(prediction_matrix)
+    return body, binary_headers(media_type, target_dts, prediction_matrix, zone_order)
@@ -0,0 +1,146 @@
+import threading
+import time
+import traceback
+import numpy as np
+import pandas as pd
+
+NS_PER_HOUR = 3600 * 10**9
+
+
+def epoch_hours(target_dts_utc):
+    """Whole hours since the epoch for UTC timestamps (-1 where not on the hour)."""
+    ns = (
+        pd.DatetimeIndex(target_dts_utc)
+        .values.astype("datetime64[ns]")
+        .astype(np.int64)
+    )
+    return np.where(ns % NS_PER_HOUR == 0, ns // NS_PER_HOUR, -1)
+
+
+class PredictionGrid:
+    """All-zone predictions for a contiguous range of UTC hours.
+
+    ``key`` identifies the model and weather snapshot the grid was computed from;
+    row ``i`` holds the predictions for epoch hour ``first_hour + i``.
+    """
+
+    def __init__(self, key, first_hour, predictions, build_seconds):
+        self.key = key
+        self.first_hour = first_hour
+        self.predictions = predictions
+        self.build_seconds = build_seconds
+        self.built_at = time.time()
+
+    def rows_for(self, hours):
+        """Grid rows for epoch hours, or None unless every hour is in the grid."""
+        hours = np.asarray(hours, dtype=np.int64)
+        if len(hours) == 0 or (hours < 0).any():
+            return None
+        rows = hours - self.first_hour
+        if rows.min() < 0 or rows.max() >= len(self.predictions):
+            return None
+        return self.predictions[rows]
+
+
+class GridMaterializer:
+    """Keeps a PredictionGrid in line with the current model and weather snapshot.
+
+    ``current_key`` returns whatever the predictions depend on, ``hours_for(key)``
+    the UTC hours to materialize and ``predict(hours_utc, key)`` the hours x zones
+    matrix. A daemon thread polls ``current_key`` and rebuilds when it changes;
+    readers only get the grid if it was built from the current key.
+    """
+
+    def __init__(self, current_key, hours_for, predict, poll_seconds=5):
+        self.current_key = current_key
+        self.hours_for = hours_for
+        self.predict = predict
+        self.poll_seconds = poll_seconds
+        self.grid = None
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self.last_error = None
+        self._build_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def rebuild(self, key=None):
+        if not self._build_lock.acquire(blocking=False):
+            return False
+        try:
+            key = self.current_key() if key is None else key
+            if key is None or (self.grid is not None and self.grid.key == key):
+                return False
+            started = time.perf_counter()
+            hours_utc = pd.DatetimeIndex(self.hours_for(key))
+            predictions = np.asarray(self.predict(hours_utc, key), dtype=np.int32)
+            self.grid = PredictionGrid(
+                key,
+                int(epoch_hours(hours_utc[:1])[0]),
+                predictions,
+                time.perf_counter() - started,
+            )
+            self.rebuilds += 1
+            self.last_error = None
+            print(
+                f"Prediction grid rebuilt: {len(hours_utc)} hours "
+                f"in {self.grid.build_seconds:.2f}s"
+            )
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"ERROR: Prediction grid rebuild failed: {e}")
+            traceback.print_exc()
+            return False
+        finally:
+            self._build_lock.release()
+
+    def _rebuild_loop(self):
+        self.rebuild()
+        while not self._stop.wait(self.poll_seconds):
+            self.rebuild()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._rebuild_loop, name="prediction-grid", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def lookup(self, target_dts_utc, key):
+        """Cached hours x zones predictions, or None on a miss (counted either way)."""
+        grid = self.grid
+        rows = None
+        if grid is not None and grid.key == key:
+            rows = grid.rows_for(epoch_hours(target_dts_utc))
+        with self._counter_lock:
+            if rows is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return rows
+
+    def metrics(self):
+        grid = self.grid
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "rebuilds": self.rebuilds,
+            "grid_hours": 0 if grid is None else len(grid.predictions),
+            "grid_first_hour_utc": (
+                None
+                if grid is None
+                else pd.Timestamp(grid.first_hour * NS_PER_HOUR, tz="UTC").isoformat()
+            ),
+            "grid_built_at": None if grid is None else grid.built_at,
+            "grid_build_seconds": None if grid is None else grid.build_seconds,
+            "last_error": self.last_error,
+        }
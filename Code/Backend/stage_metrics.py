@@ -0,0 +1,183 @@
+import cProfile
+import json
+import os
+import pstats
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+PROFILE_TOP_N = 15
+
+
+def _rss_mb(maxrss):
+    # ru_maxrss is in KB on Linux and bytes on macOS.
+    return maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    return _rss_mb(resource.getrusage(who).ru_maxrss)
+
+
+def current_rss_mb():
+    """Resident set size now (None where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class RunReport:
+    """Wall time, CPU time, memory and row counts per stage of a pipeline script.
+
+    ``stage`` is a context manager yielding the stage's record, in which the
+    script can set ``rows``. Stages named in ``profile_stages`` ("all" for every
+    stage) also run under the ``profilers``: "cprofile" dumps a .prof file next
+    to the report and lists the top functions by cumulative time, "tracemalloc"
+    adds the traced allocation peak and top allocation sites. Profilers run for
+    the outermost profiled stage only; a profiled stage nested inside it is
+    covered by the outer profile and notes which stage that is. The report is
+    written by ``save`` and, so the failing stage shows up, when a stage raises.
+    """
+
+    def __init__(
+        self, script, report_path, settings=None, profile_stages=(), profilers=()
+    ):
+        self.report_path = report_path
+        os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+        self.profile_stages = set(profile_stages)
+        self.profilers = set(profilers)
+        self.started = time.time()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.report = {
+            "script": script,
+            "pid": os.getpid(),
+            "started_at": time.strftime(
+                "%Y-%m-%dT%H:%M:%S%z", time.localtime(self.started)
+            ),
+            "settings": settings or {},
+            "profile_stages": sorted(self.profile_stages),
+            "profilers": sorted(self.profilers),
+            "stages": [],
+        }
+        self._active = []
+        self._profiling_stage = None
+
+    def _profiled(self, name):
+        return "all" in self.profile_stages or name in self.profile_stages
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        record = {"name": name, "rows": rows}
+        if self._active:
+            record["parent"] = self._active[-1]
+        profiled = self._profiled(name) and bool(self.profilers)
+        if profiled and self._profiling_stage is not None:
+            record["profiled_in"] = self._profiling_stage
+            profiled = False
+        elif profiled:
+            self._profiling_stage = name
+        profiler = None
+        started_tracemalloc = False
+        if profiled and "tracemalloc" in self.profilers:
+            started_tracemalloc = not tracemalloc.is_tracing()
+            if started_tracemalloc:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        if profiled and "cprofile" in self.profilers:
+            profiler = cProfile.Profile()
+        self._active.append(name)
+        rss_start = current_rss_mb()
+        peak_start = peak_rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        status = "failed"
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+            status = "ok"
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            self._active.pop()
+            if profiled:
+                self._profiling_stage = None
+            rss_end = current_rss_mb()
+            record.update(
+                {
+                    "status": status,
+                    "wall_seconds": time.perf_counter() - wall_start,
+                    "cpu_seconds": time.process_time() - cpu_start,
+                    "rss_start_mb": rss_start,
+                    "rss_end_mb": rss_end,
+                    "peak_rss_mb": peak_rss_mb(),
+                    "peak_rss_delta_mb": peak_rss_mb() - peak_start,
+                    "children_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+                }
+            )
+            if profiler is not None:
+                record["cprofile"] = self._cprofile_summary(name, profiler)
+            if profiled and "tracemalloc" in self.profilers:
+                record["tracemalloc"] = self._tracemalloc_summary()
+                if started_tracemalloc:
+                    tracemalloc.stop()
+            self.report["stages"].append(record)
+            print(
+                f"[{name}] {record['wall_seconds']:.2f}s wall, "
+                f"{record['cpu_seconds']:.2f}s CPU, "
+                f"peak RSS +{record['peak_rss_delta_mb']:.0f} MB"
+                + (f", {int(record['rows']):,} rows" if record["rows"] else "")
+            )
+            if status == "failed":
+                self.save()
+
+    def _cprofile_summary(self, name, profiler):
+        profile_path = os.path.join(
+            os.path.dirname(self.report_path) or ".",
+            f"{self.report['script']}_{name}.prof",
+        )
+        profiler.dump_stats(profile_path)
+        stats = pstats.Stats(profiler).stats
+        top = []
+        for (file_name, line, function), entry in sorted(
+            stats.items(), key=lambda item: item[1][3], reverse=True
+        )[:PROFILE_TOP_N]:
+            top.append(
+                {
+                    "function": f"{os.path.basename(file_name)}:{line}({function})",
+                    "calls": entry[1],
+                    "total_seconds": entry[2],
+                    "cumulative_seconds": entry[3],
+                }
+            )
+        return {"profile_path": profile_path, "top_cumulative": top}
+
+    @staticmethod
+    def _tracemalloc_summary():
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        return {
+            "current_mb": current / (1024 * 1024),
+            "peak_mb": peak / (1024 * 1024),
+            "top_allocations": [
+                {"site": str(stat.traceback), "size_mb": stat.size / (1024 * 1024)}
+                for stat in snapshot.statistics("lineno")[:PROFILE_TOP_N]
+            ],
+        }
+
+    def save(self):
+        """Writes the report JSON (atomically) and returns its path."""
+        self.report["wall_seconds"] = time.perf_counter() - self.wall_start
+        self.report["cpu_seconds"] = time.process_time() - self.cpu_start
+        self.report["peak_rss_mb"] = peak_rss_mb()
+        self.report["children_peak_rss_mb"] = peak_rss_mb(resource.RUSAGE_CHILDREN)
+        tmp_path = self.report_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.report, f, indent=2)
+        os.replace(tmp_path, self.report_path)
+        return self.report_path
@@ -0,0 +1,108 @@
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import holidays
+
+TIME_FEATURE_NAMES = [
+    "year",
+    "hour",
+    "dayofweek",
+    "dayofmonth",
+    "month",
+    "quarter",
+    "dayofyear",
+    "weekofyear",
+    "is_weekend",
+    "is_holiday",
+    "hour_sin",
+    "hour_cos",
+    "month_sin",
+    "month_cos",
+]
+SECONDS_IN_DAY = 24 * 60 * 60
+SECONDS_IN_YEAR = 365.2425 * SECONDS_IN_DAY
+
+
+@lru_cache(maxsize=None)
+def holiday_lookup(year):
+    """Boolean array indexed by day-of-year - 1, True on US holidays."""
+    lookup = np.zeros(366, dtype=bool)
+    for holiday_date in holidays.US(years=[year]):
+        lookup[holiday_date.timetuple().tm_yday - 1] = True
+    lookup.setflags(write=False)
+    return lookup
+
+
+def _iso_weeks_in_year(years):
+    def jan1_weekday_shift(y):
+        return (y + y // 4 - y // 100 + y // 400) % 7
+
+    long_year = (jan1_weekday_shift(years) == 4) | (jan1_weekday_shift(years - 1) == 3)
+    return 52 + long_year.astype(np.int64)
+
+
+def time_feature_block(timestamps):
+    """Computes all time features for UTC timestamps as an (n, 14) float64 array.
+
+    Columns follow TIME_FEATURE_NAMES and match what the pandas calendar accessors
+    produce for the same index.
+    """
+    index = pd.DatetimeIndex(timestamps)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    ns = index.values.astype("datetime64[ns]").astype(np.int64)
+    days = index.values.astype("datetime64[D]")
+    months = days.astype("datetime64[M]")
+    years_start = days.astype("datetime64[Y]")
+    year = years_start.astype(np.int64) + 1970
+    month = (months - years_start.astype("datetime64[M]")).astype(np.int64) + 1
+    dayofmonth = (days - months.astype("datetime64[D]")).astype(np.int64) + 1
+    dayofyear = (days - years_start.astype("datetime64[D]")).astype(np.int64) + 1
+    hour = (ns // (3600 * 10**9)) % 24
+    dayofweek = (days.astype(np.int64) + 3) % 7
+    weekofyear = (dayofyear - (dayofweek + 1) + 10) // 7
+    previous_year = weekofyear < 1
+    next_year = weekofyear > _iso_weeks_in_year(year)
+    weekofyear[previous_year] = _iso_weeks_in_year(year[previous_year] - 1)
+    weekofyear[next_year] = 1
+    is_holiday = np.zeros(len(ns), dtype=bool)
+    for y in np.unique(year):
+        in_year = year == y
+        is_holiday[in_year] = holiday_lookup(int(y))[dayofyear[in_year] - 1]
+    seconds = ns / 10**9
+    day_angle = seconds * (2 * np.pi / SECONDS_IN_DAY)
+    year_angle = seconds * (2 * np.pi / SECONDS_IN_YEAR)
+    block = np.empty((len(ns), len(TIME_FEATURE_NAMES)), dtype=np.float64)
+    block[:, 0] = year
+    block[:, 1] = hour
+    block[:, 2] = dayofweek
+    block[:, 3] = dayofmonth
+    block[:, 4] = month
+    block[:, 5] = (month - 1) // 3 + 1
+    block[:, 6] = dayofyear
+    block[:, 7] = weekofyear
+    block[:, 8] = dayofweek >= 5
+    block[:, 9] = is_holiday
+    block[:, 10] = np.sin(day_angle)
+    block[:, 11] = np.cos(day_angle)
+    block[:, 12] = np.sin(year_angle)
+    block[:, 13] = np.cos(year_angle)
+    return block
+
+
+def time_features_frame(index, columns=None):
+    """Time features as a DataFrame on ``index`` (optionally restricted to ``columns``)."""
+    df_time_features = pd.DataFrame(
+        time_feature_block(index), index=index, columns=TIME_FEATURE_NAMES
+    )
+    integer_cols = [
+        c
+        for c in TIME_FEATURE_NAMES
+        if not c.endswith("_sin") and not c.endswith("_cos")
+    ]
+    df_time_features[integer_cols] = df_time_features[integer_cols].astype(int)
+    if columns is not None:
+        df_time_features = df_time_features[
+            [c for c in columns if c in df_time_features.columns]
+        ]
+    return df_time_features
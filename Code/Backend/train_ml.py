@@ -3,9 +3,16 @@ import numpy as np
 import lightgbm as lgb
 from sklearn.multioutput import MultiOutputRegressor
 import os
+import io
+import json
+import time
 import joblib
 import warnings
 import traceback
+from demand_models import GlobalZoneRegressor, predict_zones, zone_static_features
+from zone_training import plan_worker_budget, train_zone_boosters
+from stage_metrics import RunReport
+from compact_frames import compact_counts, compact_features, frame_mb
 
 warnings.filterwarnings("ignore", message="Found `n_estimators` in params")
 warnings.filterwarnings(
@@ -38,60 +45,257 @@ LGBM_PARAMS = {
     "boosting_type": "gbdt",
 }
 WRAPPER_N_JOBS = -1
-print("--- Model Training Script (2-Year Data) ---")
-print(f"Loading data from: {os.path.abspath(OUTPUT_DIR)}")
-print(f"Saving model components to: {os.path.abspath(MODEL_DIR)}")
-print("\nLoading 2-year processed data...")
-try:
-    df_target = pd.read_parquet(PROCESSED_TARGET_FILE)
-    df_scaled_features = pd.read_parquet(PROCESSED_FEATURES_FILE)
-    zone_order = joblib.load(ZONE_ORDER_FILE)
-    NUM_ZONES = len(zone_order)
+GLOBAL_LGBM_PARAMS = {**LGBM_PARAMS, "num_leaves": 255, "min_data_in_leaf": 50}
+TRAINING_MODES = ("multioutput", "per_zone", "global", "compare")
+TRAINING_MODE = os.environ.get("TRAINING_MODE", "per_zone")
+GLOBAL_USE_ZONE_FEATURES = os.environ.get("GLOBAL_USE_ZONE_FEATURES", "1") == "1"
+COMPARE_HOLDOUT_HOURS = int(os.environ.get("COMPARE_HOLDOUT_HOURS", 4 * 7 * 24))
+COMPARISON_REPORT_PATH = os.path.join(MODEL_DIR, "training_mode_comparison.json")
+RUN_REPORT_PATH = os.path.join(OUTPUT_DIR, "train_ml_run_report.json")
+VALIDATION_WEEKS = int(os.environ.get("VALIDATION_WEEKS", 4))
+EARLY_STOPPING_ROUNDS = int(os.environ.get("EARLY_STOPPING_ROUNDS", 50))
+REFIT_FULL_DATA = os.environ.get("REFIT_FULL_DATA", "1") == "1"
+SPARSE_ZONE_THRESHOLD = float(os.environ.get("SPARSE_ZONE_THRESHOLD", 0.5))
+ZONE_TRAIN_PROCESSES, ZONE_TRAIN_THREADS = plan_worker_budget(
+    int(os.environ.get("ZONE_TRAIN_CORES", os.cpu_count() or 1)),
+    int(os.environ.get("ZONE_TRAIN_THREADS", 1)),
+)
+COMPACT_DTYPES = os.environ.get("COMPACT_DTYPES", "1") == "1"
+PROFILE_STAGES = [s for s in os.environ.get("PROFILE_STAGES", "").split(",") if s]
+PROFILERS = [p for p in os.environ.get("PROFILERS", "cprofile").split(",") if p]
+
+
+def split_validation(X, y):
+    """Holds out the last VALIDATION_WEEKS of the time index for early stopping."""
+    valid_hours = VALIDATION_WEEKS * 7 * 24
+    if valid_hours <= 0 or valid_hours >= len(X):
+        return X, y, None, None
+    return (
+        X.iloc[:-valid_hours],
+        y.iloc[:-valid_hours],
+        X.iloc[-valid_hours:],
+        y.iloc[-valid_hours:],
+    )
+
+
+def fit_model(mode, X_train, y_train, refit=False, n_estimators=None):
+    """Fits ``mode`` with early stopping on split_validation's held-out weeks.
+
+    With ``refit`` the early-stopped model is trained again on all of
+    ``X_train``/``y_train`` for the rounds early stopping chose (per zone, with
+    the held-out run's zone strategies), so the saved model also learns from the
+    most recent weeks. ``n_estimators`` caps the boosting rounds of LGBM_PARAMS
+    and GLOBAL_LGBM_PARAMS.
+    """
+    params, global_params = LGBM_PARAMS, GLOBAL_LGBM_PARAMS
+    if n_estimators is not None:
+        params = {**params, "n_estimators": n_estimators}
+        global_params = {**global_params, "n_estimators": n_estimators}
+    if mode == "multioutput":
+        base_lgbm_estimator = lgb.LGBMRegressor(**params)
+        model = MultiOutputRegressor(base_lgbm_estimator, n_jobs=WRAPPER_N_JOBS)
+        return model.fit(X_train, y_train)
+    X_fit, y_fit, X_valid, y_valid = split_validation(X_train, y_train)
+    refit = refit and X_valid is not None
+    if mode == "per_zone":
+        zone_kwargs = {
+            "processes": ZONE_TRAIN_PROCESSES,
+            "threads": ZONE_TRAIN_THREADS,
+            "sparse_threshold": SPARSE_ZONE_THRESHOLD,
+        }
+        model = train_zone_boosters(
+            X_fit,
+            y_fit,
+            params,
+            X_valid=X_valid,
+            y_valid=y_valid,
+            early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+            **zone_kwargs,
+        )
+        if not refit:
+            return model
+        print(f"Refitting per-zone boosters on all {len(X_train)} hours...")
+        return train_zone_boosters(
+            X_train,
+            y_train,
+            params,
+            num_boost_rounds=model.best_iterations,
+            strategies=model.strategies,
+            **zone_kwargs,
+        )
+    elif mode == "global":
+        zone_features = (
+            zone_static_features(y_fit) if GLOBAL_USE_ZONE_FEATURES else None
+        )
+        model = GlobalZoneRegressor(global_params, y_fit.columns, zone_features)
+        model.fit(X_fit, y_fit, X_valid, y_valid, EARLY_STOPPING_ROUNDS)
+        print(f"Global booster stopped at iteration {model.best_iteration_}.")
+        if not refit:
+            return model
+        print(
+            f"Refitting global booster on all {len(X_train)} hours for "
+            f"{model.best_iteration_} rounds..."
+        )
+        zone_features = (
+            zone_static_features(y_train) if GLOBAL_USE_ZONE_FEATURES else None
+        )
+        params = {**global_params, "n_estimators": model.best_iteration_}
+        return GlobalZoneRegressor(params, y_train.columns, zone_features).fit(
+            X_train, y_train
+        )
+    raise ValueError(f"Unknown training mode {mode!r}.")
+
+
+def load_training_data(
+    target_file=PROCESSED_TARGET_FILE,
+    features_file=PROCESSED_FEATURES_FILE,
+    zone_order_file=ZONE_ORDER_FILE,
+    compact=COMPACT_DTYPES,
+):
+    """Scaled features (X) and zone demand (y, zone order columns) as written by
+    load_data.py; raises ValueError if they are empty, misaligned or contain NaNs."""
+    df_target = pd.read_parquet(target_file)
+    df_scaled_features = pd.read_parquet(features_file)
+    zone_order = joblib.load(zone_order_file)
     df_target = df_target.reindex(df_scaled_features.index)
     df_target = df_target[zone_order]
-    print("Data loaded successfully.")
-    print(f"Features shape: {df_scaled_features.shape}")
-    print(f"Target shape: {df_target.shape}")
-except FileNotFoundError as fnf:
-    print(f"ERROR: Required file not found: {fnf}. Run load_data.py first.")
-    exit()
-except Exception as e:
-    print(f"Error loading data: {e}")
-    traceback.print_exc()
-    exit()
-if df_scaled_features.empty or df_target.empty:
-    print("ERROR: Loaded data is empty.")
-    exit()
-if len(df_scaled_features) != len(df_target):
-    print("ERROR: Row count mismatch.")
-    exit()
-if df_scaled_features.isnull().values.any():
-    print("ERROR: NaNs in features.")
-    exit()
-if df_target.isnull().values.any():
-    print("ERROR: NaNs in target.")
-    exit()
-X = df_scaled_features
-y = df_target
-print("\nDefining Base Estimator (LightGBM)...")
-base_lgbm_estimator = lgb.LGBMRegressor(**LGBM_PARAMS)
-print(f"\nSkipping Time Series Cross-Validation step.")
-print("\nAttempting to train final Multi-Output LightGBM model (2-Year Data)...")
-final_model_wrapped = MultiOutputRegressor(base_lgbm_estimator, n_jobs=WRAPPER_N_JOBS)
-print(f"Using n_jobs={WRAPPER_N_JOBS} for parallel training.")
-try:
-    print(f"Fitting final model with X shape {X.shape} and y shape {y.shape}...")
-    start_time = pd.Timestamp.now()
-    final_model_wrapped.fit(X, y)
-    end_time = pd.Timestamp.now()
-    print(f"Final model training complete. Duration: {end_time - start_time}")
-    print(f"\nSaving final model to {MODEL_SAVE_PATH}...")
-    joblib.dump(final_model_wrapped, MODEL_SAVE_PATH)
-    print(f"Final wrapped LightGBM model (2-Year) saved successfully.")
-except Exception as fit_err:
-    print(f"---!!! FINAL FITTING FAILED !!!---")
-    print(f"Error: {fit_err}")
-    traceback.print_exc()
-    exit()
+    if compact:
+        df_target = compact_counts(df_target)
+        df_scaled_features = compact_features(df_scaled_features)
+    if df_scaled_features.empty or df_target.empty:
+        raise ValueError("Loaded data is empty.")
+    if len(df_scaled_features) != len(df_target):
+        raise ValueError("Row count mismatch.")
+    if df_scaled_features.isnull().values.any():
+        raise ValueError("NaNs in features.")
+    if df_target.isnull().values.any():
+        raise ValueError("NaNs in target.")
+    return df_scaled_features, df_target
+
 
-print("\n--- Model Training Script End ---")
+if __name__ == "__main__":
+    RUN_REPORT = RunReport(
+        "train_ml",
+        RUN_REPORT_PATH,
+        settings={
+            "training_mode": TRAINING_MODE,
+            "zone_train_processes": ZONE_TRAIN_PROCESSES,
+            "zone_train_threads": ZONE_TRAIN_THREADS,
+            "compact_dtypes": COMPACT_DTYPES,
+            "refit_full_data": REFIT_FULL_DATA,
+        },
+        profile_stages=PROFILE_STAGES,
+        profilers=PROFILERS,
+    )
+    print("--- Model Training Script (2-Year Data) ---")
+    print(f"Training mode: {TRAINING_MODE}")
+    if TRAINING_MODE not in TRAINING_MODES:
+        print(
+            f"ERROR: Unknown TRAINING_MODE '{TRAINING_MODE}'. "
+            f"Use one of: {', '.join(TRAINING_MODES)}."
+        )
+        exit()
+    print(f"Loading data from: {os.path.abspath(OUTPUT_DIR)}")
+    print(f"Saving model components to: {os.path.abspath(MODEL_DIR)}")
+    with RUN_REPORT.stage("load_data") as stage:
+        print("\nLoading 2-year processed data...")
+        try:
+            df_scaled_features, df_target = load_training_data()
+            print("Data loaded successfully.")
+            print(f"Features shape: {df_scaled_features.shape}")
+            print(f"Target shape: {df_target.shape}")
+            stage["rows"] = len(df_scaled_features)
+            stage["target_mb"] = frame_mb(df_target)
+            stage["features_mb"] = frame_mb(df_scaled_features)
+            print(
+                f"In memory: target {stage['target_mb']:.1f} MB "
+                f"({df_target.dtypes.iloc[0]}), features {stage['features_mb']:.1f} MB "
+                f"({df_scaled_features.dtypes.iloc[0]})"
+            )
+        except FileNotFoundError as fnf:
+            print(f"ERROR: Required file not found: {fnf}. Run load_data.py first.")
+            exit()
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            exit()
+        except Exception as e:
+            print(f"Error loading data: {e}")
+            traceback.print_exc()
+            exit()
+    X = df_scaled_features
+    y = df_target
+    if TRAINING_MODE == "compare":
+        print(
+            f"\nComparing training modes on the last "
+            f"{COMPARE_HOLDOUT_HOURS} hours..."
+        )
+        X_train, X_test = (
+            X.iloc[:-COMPARE_HOLDOUT_HOURS],
+            X.iloc[-COMPARE_HOLDOUT_HOURS:],
+        )
+        y_train, y_test = (
+            y.iloc[:-COMPARE_HOLDOUT_HOURS],
+            y.iloc[-COMPARE_HOLDOUT_HOURS:],
+        )
+        comparison = {"holdout_hours": COMPARE_HOLDOUT_HOURS, "modes": {}}
+        for mode in ("multioutput", "per_zone", "global"):
+            with RUN_REPORT.stage(f"fit_{mode}", rows=int(y_train.size)):
+                try:
+                    start = time.perf_counter()
+                    model = fit_model(mode, X_train, y_train)
+                    train_seconds = time.perf_counter() - start
+                    start = time.perf_counter()
+                    y_pred = predict_zones(model, X_test)
+                    predict_seconds = time.perf_counter() - start
+                    buffer = io.BytesIO()
+                    joblib.dump(model, buffer)
+                    y_pred_rounded = np.maximum(0, np.round(y_pred))
+                    result = {
+                        "train_seconds": train_seconds,
+                        "predict_seconds": predict_seconds,
+                        "mae": float(np.mean(np.abs(y_test.to_numpy() - y_pred))),
+                        "mae_rounded": float(
+                            np.mean(np.abs(y_test.to_numpy() - y_pred_rounded))
+                        ),
+                        "model_bytes": buffer.getbuffer().nbytes,
+                    }
+                except Exception as fit_err:
+                    print(f"---!!! {mode} FITTING FAILED !!!---")
+                    traceback.print_exc()
+                    exit()
+            comparison["modes"][mode] = result
+            print(
+                f"  {mode}: train {train_seconds:.1f}s, predict {predict_seconds:.3f}s, "
+                f"MAE {result['mae']:.4f} (rounded {result['mae_rounded']:.4f}), "
+                f"model {result['model_bytes'] / 1e6:.1f} MB"
+            )
+        with open(COMPARISON_REPORT_PATH, "w") as f:
+            json.dump(comparison, f, indent=2)
+        print(f"Comparison saved to {COMPARISON_REPORT_PATH}")
+    else:
+        print(f"\nSkipping Time Series Cross-Validation step.")
+        print(
+            f"\nAttempting to train final {TRAINING_MODE} LightGBM model (2-Year Data)..."
+        )
+        if TRAINING_MODE == "multioutput":
+            print(f"Using n_jobs={WRAPPER_N_JOBS} for parallel training.")
+        try:
+            print(
+                f"Fitting final model with X shape {X.shape} and y shape {y.shape}..."
+            )
+            with RUN_REPORT.stage("fit", rows=int(y.size)):
+                start_time = pd.Timestamp.now()
+                final_model_wrapped = fit_model(TRAINING_MODE, X, y, REFIT_FULL_DATA)
+                end_time = pd.Timestamp.now()
+            print(f"Final model training complete. Duration: {end_time - start_time}")
+            print(f"\nSaving final model to {MODEL_SAVE_PATH}...")
+            with RUN_REPORT.stage("save_model"):
+                joblib.dump(final_model_wrapped, MODEL_SAVE_PATH)
+            print(f"Final {TRAINING_MODE} LightGBM model (2-Year) saved successfully.")
+        except Exception as fit_err:
+            print(f"---!!! FINAL FITTING FAILED !!!---")
+            print(f"Error: {fit_err}")
+            traceback.print_exc()
+            exit()
+    print(f"Run report saved to {RUN_REPORT.save()}")
+    print("\n--- Model Training Script End ---")
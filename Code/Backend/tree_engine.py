@@ -0,0 +1,340 @@
+import os
+import numpy as np
+from demand_models import SeasonalBaseline, ZoneBoosterEnsemble
+
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+MISSING_TYPES = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+ZERO_THRESHOLD = 1e-35
+# Row x tree pairs walked at once; bounds leaf_nodes' working arrays to ~50 MB.
+PREDICT_CHUNK_PAIRS = 1 << 20
+IDENTITY_OBJECTIVES = {
+    "regression",
+    "regression_l1",
+    "huber",
+    "fair",
+    "quantile",
+    "mape",
+}
+EXP_OBJECTIVES = {"poisson", "gamma", "tweedie"}
+
+
+def source_fingerprint(model_path):
+    stat = os.stat(model_path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _flatten_tree(tree_structure, nodes):
+    """Appends one dumped tree to ``nodes`` and returns the index of its root.
+
+    Leaves become nodes that point to themselves with an infinite threshold, so a
+    row that reached a leaf stays there for the remaining depth steps.
+    """
+    stack = [(tree_structure, None, None)]
+    root = None
+    while stack:
+        node, parent, side = stack.pop()
+        index = len(nodes["split_feature"])
+        if "leaf_value" in node:
+            nodes["split_feature"].append(0)
+            nodes["threshold"].append(np.inf)
+            nodes["left_child"].append(index)
+            nodes["right_child"].append(index)
+            nodes["default_left"].append(True)
+            nodes["missing_type"].append(MISSING_NONE)
+            nodes["value"].append(node["leaf_value"])
+        else:
+            if node.get("decision_type", "<=") != "<=":
+                raise ValueError("Only numerical '<=' splits can be compiled.")
+            nodes["split_feature"].append(node["split_feature"])
+            nodes["threshold"].append(node["threshold"])
+            nodes["left_child"].append(-1)
+            nodes["right_child"].append(-1)
+            nodes["default_left"].append(node.get("default_left", True))
+            nodes["missing_type"].append(
+                MISSING_TYPES[node.get("missing_type", "None")]
+            )
+            nodes["value"].append(0.0)
+            stack.append((node["right_child"], index, "right_child"))
+            stack.append((node["left_child"], index, "left_child"))
+        if parent is None:
+            root = index
+        else:
+            nodes[side][parent] = index
+    return root
+
+
+def _tree_depth(tree_structure):
+    depth = 0
+    stack = [(tree_structure, 0)]
+    while stack:
+        node, level = stack.pop()
+        depth = max(depth, level)
+        if "leaf_value" not in node:
+            stack.append((node["left_child"], level + 1))
+            stack.append((node["right_child"], level + 1))
+    return depth
+
+
+def output_boosters(model):
+    """(booster, num_iteration) per output of a MultiOutputRegressor of
+    LGBMRegressors or a ZoneBoosterEnsemble (None for baseline zones)."""
+    if isinstance(model, ZoneBoosterEnsemble):
+        return [
+            None if booster is None else (booster, model.best_iterations.get(zone_id))
+            for zone_id, booster in zip(model.zone_order, model.boosters)
+        ]
+    if hasattr(model, "estimators_"):
+        return [
+            (est.booster_, est.best_iteration_ or None) for est in model.estimators_
+        ]
+    raise ValueError(f"Cannot compile a {type(model).__name__} model.")
+
+
+def booster_model_strings(model):
+    """LightGBM text model per output, truncated like the compiled trees."""
+    return [
+        None if entry is None else entry[0].model_to_string(num_iteration=entry[1])
+        for entry in output_boosters(model)
+    ]
+
+
+def _objective_link(dumped):
+    objective = (dumped.get("objective") or "regression").split()[0]
+    if objective in IDENTITY_OBJECTIVES:
+        return "identity"
+    if objective in EXP_OBJECTIVES:
+        return "exp"
+    raise ValueError(f"Objective '{objective}' cannot be compiled.")
+
+
+class CompiledForest:
+    """All zones' regression trees as flat node arrays, scored in one vectorized pass.
+
+    Every tree of every output column shares the node arrays; ``tree_roots`` are
+    ordered by output so ``output_tree_starts`` delimits each column's trees.
+    Columns without trees are answered by ``baseline`` (a SeasonalBaseline whose
+    ``zone_order`` holds column positions) or are zero. ``source`` fingerprints
+    the model file the forest was compiled from.
+    """
+
+    ARRAY_NAMES = [
+        "split_feature",
+        "threshold",
+        "left_child",
+        "right_child",
+        "default_left",
+        "missing_type",
+        "value",
+        "tree_roots",
+        "tree_outputs",
+        "output_tree_starts",
+    ]
+
+    def __init__(
+        self,
+        num_outputs,
+        num_features,
+        max_depth,
+        link,
+        arrays,
+        baseline=None,
+        source=None,
+    ):
+        self.num_outputs = num_outputs
+        self.num_features = num_features
+        self.max_depth = max_depth
+        self.link = link
+        self.arrays = arrays
+        self.baseline = baseline
+        self.source = source
+        for name in self.ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        self._baseline_columns = np.full(num_outputs, -1, dtype=np.intp)
+        if baseline is not None:
+            self._baseline_columns[np.asarray(baseline.zone_order, dtype=np.intp)] = (
+                np.arange(len(baseline.zone_order))
+            )
+        self.has_missing_rules = bool((self.missing_type != MISSING_NONE).any())
+        self._roots = self.tree_roots.astype(np.intp, copy=False)
+        self._split_feature = self.split_feature.astype(np.intp, copy=False)
+        if "children" in arrays:
+            self.is_leaf = arrays["is_leaf"]
+            self._children = arrays["children"]
+        else:
+            self.is_leaf = self.left_child == np.arange(len(self.left_child))
+            self._children = (
+                np.column_stack([self.left_child, self.right_child])
+                .reshape(-1)
+                .astype(np.intp)
+            )
+
+    @classmethod
+    def from_dumps(cls, dumps, num_features, baseline=None):
+        """Compiles one ``Booster.dump_model()`` dict per output column (None = no trees)."""
+        nodes = {
+            name: []
+            for name in [
+                "split_feature",
+                "threshold",
+                "left_child",
+                "right_child",
+                "default_left",
+                "missing_type",
+                "value",
+            ]
+        }
+        tree_roots, tree_outputs = [], []
+        output_tree_starts = np.zeros(len(dumps) + 1, dtype=np.int64)
+        max_depth = 0
+        links = set()
+        for output, dumped in enumerate(dumps):
+            if dumped is not None:
+                links.add(_objective_link(dumped))
+                for tree in dumped["tree_info"]:
+                    tree_roots.append(_flatten_tree(tree["tree_structure"], nodes))
+                    tree_outputs.append(output)
+                    max_depth = max(max_depth, _tree_depth(tree["tree_structure"]))
+            output_tree_starts[output + 1] = len(tree_roots)
+        if len(links) > 1:
+            raise ValueError("All boosters must share one objective link.")
+        arrays = {
+            "split_feature": np.asarray(nodes["split_feature"], dtype=np.int32),
+            "threshold": np.asarray(nodes["threshold"], dtype=np.float64),
+            "left_child": np.asarray(nodes["left_child"], dtype=np.int32),
+            "right_child": np.asarray(nodes["right_child"], dtype=np.int32),
+            "default_left": np.asarray(nodes["default_left"], dtype=bool),
+            "missing_type": np.asarray(nodes["missing_type"], dtype=np.int8),
+            "value": np.asarray(nodes["value"], dtype=np.float64),
+            "tree_roots": np.asarray(tree_roots, dtype=np.int32),
+            "tree_outputs": np.asarray(tree_outputs, dtype=np.int32),
+            "output_tree_starts": output_tree_starts,
+        }
+        return cls(
+            len(dumps),
+            num_features,
+            max_depth,
+            links.pop() if links else "identity",
+            arrays,
+            baseline,
+        )
+
+    @classmethod
+    def from_model(cls, model):
+        """Compiles a MultiOutputRegressor of LGBMRegressors or a ZoneBoosterEnsemble."""
+        boosters = output_boosters(model)
+        dumps = [
+            None if entry is None else entry[0].dump_model(num_iteration=entry[1])
+            for entry in boosters
+        ]
+        num_features = next(e[0].num_feature() for e in boosters if e is not None)
+        baseline = None
+        if isinstance(model, ZoneBoosterEnsemble) and model.baseline is not None:
+            b = model.baseline
+            baseline = SeasonalBaseline(
+                [model.zone_order.index(z) for z in b.zone_order],
+                b.feature_positions,
+                b.levels,
+                b.tables,
+            )
+        return cls.from_dumps(dumps, num_features, baseline)
+
+    def leaf_nodes(self, X, roots=None):
+        """Node index of the leaf each (row, tree) pair ends in, as an (n, trees) array.
+
+        ``roots`` restricts scoring to a subset of trees. All pairs descend one level
+        per step. Pairs that reached a leaf stay put, and
+        the working set is compacted once less than half of it is still descending.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        n = len(X)
+        roots = self._roots if roots is None else roots
+        num_trees = len(roots)
+        if not self.has_missing_rules:
+            X = np.where(np.isnan(X), 0.0, X)
+        X_flat = X.reshape(-1)
+        nodes = np.tile(roots, n)
+        active = np.arange(len(nodes))
+        row_offsets = (active // num_trees) * self.num_features
+        current = nodes.copy()
+        for _ in range(self.max_depth):
+            positions = np.take(self._split_feature, current)
+            positions += row_offsets
+            values = np.take(X_flat, positions)
+            if not self.has_missing_rules:
+                go_right = values > np.take(self.threshold, current)
+            else:
+                missing_type = np.take(self.missing_type, current)
+                is_nan = np.isnan(values)
+                values = np.where(is_nan & (missing_type != MISSING_NAN), 0.0, values)
+                missing = (
+                    (missing_type == MISSING_ZERO) & (np.abs(values) <= ZERO_THRESHOLD)
+                ) | ((missing_type == MISSING_NAN) & is_nan)
+                go_right = np.where(
+                    missing,
+                    ~np.take(self.default_left, current),
+                    ~(values <= np.take(self.threshold, current)),
+                )
+            current *= 2
+            current += go_right
+            current = np.take(self._children, current)
+            descending = ~np.take(self.is_leaf, current)
+            num_descending = np.count_nonzero(descending)
+            if num_descending == 0:
+                break
+            if num_descending < len(current) // 2:
+                nodes[active] = current
+                active = active[descending]
+                row_offsets = row_offsets[descending]
+                current = current[descending]
+        nodes[active] = current
+        return nodes.reshape(n, num_trees)
+
+    def predict(self, X, outputs=None):
+        """Returns the (n_rows, len(outputs)) raw predictions, all outputs by default.
+
+        Only the trees of the requested outputs are walked, PREDICT_CHUNK_PAIRS
+        row x tree pairs at a time.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if outputs is None:
+            outputs = np.arange(self.num_outputs)
+        outputs = np.asarray(outputs, dtype=np.intp)
+        predictions = np.zeros((len(X), len(outputs)), dtype=np.float64)
+        starts = self.output_tree_starts[outputs]
+        counts = self.output_tree_starts[outputs + 1] - starts
+        with_trees = np.flatnonzero(counts)
+        if len(with_trees):
+            counts = counts[with_trees]
+            segment_starts = np.cumsum(counts) - counts
+            tree_ids = np.repeat(starts[with_trees] - segment_starts, counts)
+            tree_ids += np.arange(len(tree_ids))
+            roots = self._roots[tree_ids]
+            chunk_rows = max(1, PREDICT_CHUNK_PAIRS // len(roots))
+            for start in range(0, len(X), chunk_rows):
+                rows = slice(start, start + chunk_rows)
+                leaf_values = self.value[self.leaf_nodes(X[rows], roots)]
+                sums = np.add.reduceat(leaf_values, segment_starts, axis=1)
+                predictions[rows, with_trees] = (
+                    np.exp(sums) if self.link == "exp" else sums
+                )
+        return self.add_baseline(X, outputs, predictions)
+
+    def add_baseline(self, X, outputs, predictions):
+        """Fills the columns of seasonal-baseline outputs in ``predictions``."""
+        if self.baseline is not None:
+            baseline_columns = self._baseline_columns[outputs]
+            from_baseline = baseline_columns >= 0
+            if from_baseline.any():
+                predictions[:, from_baseline] = self.baseline.predict(X)[
+                    :, baseline_columns[from_baseline]
+                ]
+        return predictions
+
+    def serving_arrays(self):
+        """Node arrays in the dtypes prediction indexes with, so a reload needs no copies."""
+        arrays = dict(self.arrays)
+        arrays["split_feature"] = self._split_feature
+        arrays["tree_roots"] = self._roots
+        arrays["children"] = self._children
+        arrays["is_leaf"] = self.is_leaf
+        return arrays
@@ -0,0 +1,235 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+TRIP_COLUMNS = ["pickup_datetime", "PULocationID"]
+NS_PER_HOUR = 3600 * 10**9
+
+
+def build_zone_lut(zone_ids):
+    """Maps a LocationID to its column position in the demand matrix (-1 if unknown)."""
+    zone_lut = np.full(int(max(zone_ids)) + 1, -1, dtype=np.int32)
+    zone_lut[np.asarray(zone_ids, dtype=np.int64)] = np.arange(
+        len(zone_ids), dtype=np.int32
+    )
+    return zone_lut
+
+
+def to_epoch_hour(ts):
+    return int(pd.Timestamp(ts).value // NS_PER_HOUR)
+
+
+def _time_scalar(ts, time_type):
+    """``ts`` as a scalar of the pickup column's type (naive times are UTC)."""
+    ts = pd.Timestamp(ts)
+    ts = ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
+    if time_type.tz is None:
+        ts = ts.tz_localize(None)
+    return pa.scalar(ts, type=time_type)
+
+
+def pushdown_filter(schema, start_utc=None, end_utc=None, zone_ids=None):
+    """Dataset filter for pickups in [start_utc, end_utc) within the zone id range.
+
+    Only columns whose type can be compared against Parquet row group statistics
+    get a condition, so row groups outside the window are skipped unread; the
+    exact zone check is left to the lookup table.
+    """
+    conditions = []
+    time_type = schema.field("pickup_datetime").type
+    if pa.types.is_timestamp(time_type):
+        if start_utc is not None:
+            conditions.append(
+                ds.field("pickup_datetime") >= _time_scalar(start_utc, time_type)
+            )
+        if end_utc is not None:
+            conditions.append(
+                ds.field("pickup_datetime") < _time_scalar(end_utc, time_type)
+            )
+    if zone_ids is not None and pa.types.is_integer(schema.field("PULocationID").type):
+        conditions.append(ds.field("PULocationID") >= int(min(zone_ids)))
+        conditions.append(ds.field("PULocationID") <= int(max(zone_ids)))
+    if not conditions:
+        return None
+    expression = conditions[0]
+    for condition in conditions[1:]:
+        expression = expression & condition
+    return expression
+
+
+def scan_trips(file_path, start_utc=None, end_utc=None, zone_ids=None):
+    """Record batches of TRIP_COLUMNS from one Parquet file with pushdown_filter
+    applied, reading only the row groups that can hold matching trips."""
+    dataset = ds.dataset(file_path, format="parquet")
+    return dataset.scanner(
+        columns=TRIP_COLUMNS,
+        filter=pushdown_filter(dataset.schema, start_utc, end_utc, zone_ids),
+    ).to_batches()
+
+
+def _pickup_hours(column):
+    if pa.types.is_timestamp(column.type):
+        values = column.to_numpy(zero_copy_only=False)
+    else:
+        values = pd.to_datetime(column.to_pandas(), errors="coerce").to_numpy()
+    return values.astype("datetime64[h]").astype(np.int64)
+
+
+def _zone_positions(column, zone_lut):
+    if pa.types.is_integer(column.type) and column.null_count == 0:
+        ids = column.to_numpy().astype(np.int64)
+    else:
+        ids = pd.to_numeric(column.to_pandas(), errors="coerce")
+        ids = ids.fillna(-1).to_numpy().astype(np.int64)
+    positions = np.full(len(ids), -1, dtype=np.int32)
+    known = (ids >= 0) & (ids < len(zone_lut))
+    positions[known] = zone_lut[ids[known]]
+    return positions
+
+
+def accumulate_counts(counts, hours, positions, first_hour, min_hour, max_hour):
+    """Adds trips (epoch hour, zone position) into a flat hours x zones count matrix."""
+    num_zones = counts.shape[1]
+    keep = (positions >= 0) & (hours >= min_hour) & (hours <= max_hour)
+    if not keep.any():
+        return 0
+    cells = (hours[keep] - first_hour) * num_zones + positions[keep]
+    lowest = cells.min()
+    binned = np.bincount(cells - lowest)
+    flat = counts.reshape(-1)
+    flat[lowest : lowest + len(binned)] += binned.astype(counts.dtype)
+    return int(keep.sum())
+
+
+def count_file_trips(file_path, year, first_hour_utc, num_hours, zone_ids):
+    """Streams one fhvhv month batch by batch into an hours x zones int32 matrix.
+
+    Only trips inside ``year`` and inside the index starting at ``first_hour_utc`` are
+    counted; row groups outside that window are pruned by their statistics, and
+    peak memory is one batch plus the count matrix.
+    """
+    zone_lut = build_zone_lut(zone_ids)
+    first_hour = to_epoch_hour(first_hour_utc)
+    min_hour = max(first_hour, to_epoch_hour(f"{year}-01-01"))
+    max_hour = min(
+        first_hour + num_hours - 1, to_epoch_hour(f"{int(year) + 1}-01-01") - 1
+    )
+    counts = np.zeros((num_hours, len(zone_ids)), dtype=np.int32)
+    if min_hour > max_hour:
+        return counts
+    for batch in scan_trips(
+        file_path,
+        pd.Timestamp(min_hour * NS_PER_HOUR, tz="UTC"),
+        pd.Timestamp((max_hour + 1) * NS_PER_HOUR, tz="UTC"),
+        zone_ids,
+    ):
+        accumulate_counts(
+            counts,
+            _pickup_hours(batch.column("pickup_datetime")),
+            _zone_positions(batch.column("PULocationID"), zone_lut),
+            first_hour,
+            min_hour,
+            max_hour,
+        )
+    return counts
+
+
+def read_trips(file_path, start_utc, end_utc, zone_ids):
+    """Pickups in [start_utc, end_utc) at ``zone_ids`` as a pickup_datetime /
+    PULocationID frame, filtered while scanning instead of after loading."""
+    zone_lut = build_zone_lut(zone_ids)
+    first_hour = to_epoch_hour(start_utc)
+    last_hour = to_epoch_hour(end_utc) - 1
+    frames = []
+    for batch in scan_trips(file_path, start_utc, end_utc, zone_ids):
+        hours = _pickup_hours(batch.column("pickup_datetime"))
+        positions = _zone_positions(batch.column("PULocationID"), zone_lut)
+        keep = (positions >= 0) & (hours >= first_hour) & (hours <= last_hour)
+        if not keep.any():
+            continue
+        pickups = batch.column("pickup_datetime")
+        if not pa.types.is_timestamp(pickups.type):
+            pickups = pd.to_datetime(pickups.to_pandas(), errors="coerce")
+        frames.append(
+            pd.DataFrame(
+                {
+                    "pickup_datetime": np.asarray(pickups)[keep],
+                    "PULocationID": np.asarray(zone_ids, dtype=np.int64)[
+                        positions[keep]
+                    ],
+                }
+            )
+        )
+    if not frames:
+        return pd.DataFrame(
+            {
+                "pickup_datetime": pd.Series(dtype="datetime64[ns]"),
+                "PULocationID": pd.Series(dtype=np.int64),
+            }
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def _count_file_task(file_path, year, first_hour_utc, num_hours, zone_ids):
+    return file_path, count_file_trips(
+        file_path, year, first_hour_utc, num_hours, zone_ids
+    )
+
+
+def iter_file_counts(file_specs, first_hour_utc, num_hours, zone_ids, max_workers=1):
+    """Yields ``(file_path, counts)`` per file, fanning out over processes if asked.
+
+    Worker processes are forked so the calling script is not re-imported; where fork
+    is unavailable the files are processed one after another.
+    """
+    if max_workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+        print("  Warning: fork start method unavailable, ingesting serially.")
+        max_workers = 1
+    if max_workers <= 1:
+        for file_path, year in file_specs:
+            print(f"Streaming file ({year}): {file_path}...")
+            try:
+                result = _count_file_task(
+                    file_path, year, first_hour_utc, num_hours, zone_ids
+                )
+            except Exception as e:
+                print(f"  Warning: Error processing file {file_path}: {e}")
+                continue
+            yield result
+        return
+    print(f"Streaming {len(file_specs)} files over {max_workers} worker processes...")
+    with ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("fork")
+    ) as executor:
+        futures = {
+            executor.submit(
+                _count_file_task,
+                file_path,
+                year,
+                first_hour_utc,
+                num_hours,
+                zone_ids,
+            ): file_path
+            for file_path, year in file_specs
+        }
+        for future in as_completed(futures):
+            try:
+                file_path, counts = future.result()
+            except Exception as e:
+                print(f"  Warning: Error processing file {futures[future]}: {e}")
+                continue
+            print(f"Finished file: {file_path}")
+            yield file_path, counts
+
+
+def count_trips(file_specs, first_hour_utc, num_hours, zone_ids, max_workers=1):
+    """Sums per-file hourly counts for ``(file_path, year)`` specs into one matrix."""
+    counts = np.zeros((num_hours, len(zone_ids)), dtype=np.int32)
+    for _, file_counts in iter_file_counts(
+        file_specs, first_hour_utc, num_hours, zone_ids, max_workers
+    ):
+        counts += file_counts
+    return counts
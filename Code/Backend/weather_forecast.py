@@ -0,0 +1,228 @@
+import asyncio
+import threading
+import time
+import traceback
+import numpy as np
+import pandas as pd
+
+
+class ForecastSnapshot:
+    """One downloaded forecast: block start times (unix s, sorted) and their features."""
+
+    def __init__(self, block_times, block_features, fetched_at):
+        self.block_times = block_times
+        self.block_features = block_features
+        self.fetched_at = fetched_at
+
+    def age_seconds(self, now=None):
+        return (now or time.time()) - self.fetched_at
+
+    def closest_blocks(self, unix_times):
+        """Index of the block closest to each time (the earlier block on ties)."""
+        unix_times = np.asarray(unix_times, dtype=np.int64)
+        upper = np.searchsorted(self.block_times, unix_times).clip(
+            0, len(self.block_times) - 1
+        )
+        lower = (upper - 1).clip(0)
+        closer_lower = np.abs(unix_times - self.block_times[lower]) <= np.abs(
+            self.block_times[upper] - unix_times
+        )
+        return np.where(closer_lower, lower, upper)
+
+    def features_for(self, target_dts_utc):
+        target_dts_utc = pd.DatetimeIndex(target_dts_utc)
+        unix_times = target_dts_utc.values.astype("datetime64[s]").astype(np.int64)
+        features = self.block_features.iloc[self.closest_blocks(unix_times)]
+        features.index = target_dts_utc
+        return features
+
+
+class ForecastCache:
+    """In-process cache of the OpenWeatherMap 5-day / 3-hour forecast.
+
+    A daemon thread re-downloads the forecast every ``refresh_interval_seconds``;
+    readers get the latest snapshot without touching the network. Once a snapshot
+    is older than ``ttl_seconds`` a refresh is also kicked off on read. If the
+    upstream is down the previous snapshot keeps being served until it is
+    ``max_stale_seconds`` old. ``block_transform`` maps one forecast block to a dict
+    of model features. Asyncio servers run ``run_async`` instead of ``start``.
+    ``fetch`` (a callable returning the forecast block list) replaces the HTTP
+    download and ``clock`` the unix time snapshots are aged by, e.g. in tests.
+    """
+
+    def __init__(
+        self,
+        endpoint,
+        params,
+        block_transform,
+        ttl_seconds=1800,
+        refresh_interval_seconds=900,
+        max_stale_seconds=5 * 24 * 3600,
+        timeout_seconds=10,
+        fetch=None,
+        clock=time.time,
+    ):
+        self.endpoint = endpoint
+        self.params = dict(params)
+        self.block_transform = block_transform
+        self.ttl_seconds = ttl_seconds
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.timeout_seconds = timeout_seconds
+        self.fetch = fetch
+        self.clock = clock
+        self.last_error = None
+        self._snapshot = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+        self._wake_async = None
+
+    def build_snapshot(self, forecast_list, fetched_at=None):
+        forecast_list = sorted(forecast_list, key=lambda block: block["dt"])
+        block_times = np.array([block["dt"] for block in forecast_list], dtype=np.int64)
+        block_features = pd.DataFrame(
+            [self.block_transform(block) for block in forecast_list]
+        )
+        return ForecastSnapshot(block_times, block_features, fetched_at or self.clock())
+
+    def download(self):
+        if self.fetch is not None:
+            return self.fetch()
+        import requests
+
+        response = requests.get(
+            self.endpoint, params=self.params, timeout=self.timeout_seconds
+        )
+        response.raise_for_status()
+        return response.json().get("list") or []
+
+    def install(self, forecast_list):
+        if not forecast_list:
+            raise ValueError("Forecast response contained no blocks.")
+        self._snapshot = self.build_snapshot(forecast_list)
+        self.last_error = None
+        self._ready.set()
+
+    def refresh(self):
+        """Downloads a new forecast; on failure the current snapshot is kept."""
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            self.install(self.download())
+            print(
+                f"Weather forecast refreshed ({len(self._snapshot.block_times)} blocks)"
+            )
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"ERROR: Weather forecast refresh failed: {e}")
+            if not isinstance(e, OSError):
+                traceback.print_exc()
+            return False
+        finally:
+            self._refresh_lock.release()
+
+    async def download_async(self, session):
+        if self.fetch is not None:
+            return self.fetch()
+        import aiohttp
+
+        async with session.get(
+            self.endpoint,
+            params={key: str(value) for key, value in self.params.items()},
+            timeout=aiohttp.ClientTimeout(total=self.timeout_seconds),
+        ) as response:
+            response.raise_for_status()
+            payload = await response.json(content_type=None)
+        return payload.get("list") or []
+
+    async def refresh_async(self, session):
+        """refresh() for asyncio servers, downloading through an aiohttp session."""
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            self.install(await self.download_async(session))
+            print(
+                f"Weather forecast refreshed ({len(self._snapshot.block_times)} blocks)"
+            )
+            return True
+        except Exception as e:
+            self.last_error = str(e) or type(e).__name__
+            print(f"ERROR: Weather forecast refresh failed: {self.last_error}")
+            return False
+        finally:
+            self._refresh_lock.release()
+
+    async def run_async(self, session):
+        """Refresh loop for asyncio servers, used instead of start().
+
+        Refreshes right away, then every ``refresh_interval_seconds`` or as soon as a
+        reader finds the snapshot past its TTL.
+        """
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        self._wake_async = lambda: loop.call_soon_threadsafe(wake.set)
+        while not self._stop.is_set():
+            wake.clear()
+            await self.refresh_async(session)
+            try:
+                await asyncio.wait_for(wake.wait(), self.refresh_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def wait_ready(self, timeout=None):
+        return self._ready.wait(self.timeout_seconds if timeout is None else timeout)
+
+    def _request_refresh(self):
+        if self._wake_async is not None:
+            self._wake_async()
+        else:
+            threading.Thread(target=self.refresh, daemon=True).start()
+
+    def _refresh_loop(self):
+        self.refresh()
+        while not self._stop.wait(self.refresh_interval_seconds):
+            self.refresh()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._refresh_loop, name="forecast-refresh", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def get_snapshot(self, wait=True):
+        """Latest usable snapshot, or None if there has never been a valid one.
+
+        Only a cold cache waits (up to the HTTP timeout) for the first download, and
+        only when ``wait`` is set; event-loop callers pass ``wait=False``.
+        """
+        if not self._ready.is_set() and wait:
+            if self._thread is None and self._wake_async is None:
+                self.refresh()
+            else:
+                self._ready.wait(self.timeout_seconds)
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        age = snapshot.age_seconds(self.clock())
+        if age > self.ttl_seconds and not self._refresh_lock.locked():
+            self._request_refresh()
+        if age > self.max_stale_seconds:
+            return None
+        return snapshot
+
+    def status(self):
+        snapshot = self._snapshot
+        age = None if snapshot is None else snapshot.age_seconds(self.clock())
+        return {
+            "age_seconds": age,
+            "stale": age is None or age > self.ttl_seconds,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,324 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+WEATHER_COLUMNS = [
+    "temperature",
+    "precipitation",
+    "snow_depth",
+    "humidity",
+    "wind_speed",
+]
+METEOSTAT_COLUMNS = {
+    "temp": "temperature",
+    "prcp": "precipitation",
+    "snow": "snow_depth",
+    "rhum": "humidity",
+    "wspd": "wind_speed",
+}
+NYC_LAT = 40.7128
+NYC_LON = -74.0060
+NYC_ALTITUDE = 10
+PARTITION_FILE_NAME = "weather.parquet"
+COVERAGE_FILE_NAME = "coverage.json"
+STORE_MANIFEST_FILE_NAME = "store_manifest.json"
+
+
+def utc_hour(ts):
+    ts = pd.Timestamp(ts)
+    ts = ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
+    return ts.floor("h")
+
+
+def utc_hours(index):
+    """Hour floors of a datetime index, treating naive times as UTC."""
+    index = pd.DatetimeIndex(index)
+    index = index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+    return index.floor("h")
+
+
+def hour_range(start, end):
+    """Every UTC hour from ``start`` to ``end`` inclusive."""
+    return pd.date_range(utc_hour(start), utc_hour(end), freq="h")
+
+
+def epoch_hours(hours):
+    return hours.values.astype("datetime64[h]").astype(np.int64)
+
+
+def file_fingerprint(path):
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _write_json(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def contiguous_ranges(hours):
+    """(first, last) hour of each run of consecutive hours in a sorted index."""
+    if len(hours) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(epoch_hours(hours)) != 1)
+    starts = np.concatenate([[0], breaks + 1])
+    stops = np.concatenate([breaks, [len(hours) - 1]])
+    return [(hours[a], hours[b]) for a, b in zip(starts, stops)]
+
+
+class MeteostatProvider:
+    """Hourly observations for NYC from Meteostat, renamed to WEATHER_COLUMNS."""
+
+    name = "meteostat"
+
+    def __init__(self, lat=NYC_LAT, lon=NYC_LON, altitude=NYC_ALTITUDE):
+        self.lat = lat
+        self.lon = lon
+        self.altitude = altitude
+
+    def fetch(self, start_utc, end_utc):
+        from meteostat import Point, Hourly
+
+        location = Point(self.lat, self.lon, self.altitude)
+        df_weather = Hourly(
+            location,
+            start_utc.to_pydatetime().replace(tzinfo=None),
+            end_utc.to_pydatetime().replace(tzinfo=None),
+        ).fetch()
+        df_weather.index = pd.to_datetime(df_weather.index, utc=True)
+        return df_weather.rename(columns=METEOSTAT_COLUMNS).reindex(
+            columns=WEATHER_COLUMNS
+        )
+
+
+class StubProvider:
+    """Deterministic synthetic weather for offline runs.
+
+    Values depend only on the hour, so overlapping fetches agree. Every call is
+    recorded in ``requests``; ``missing_hours`` are left out of the result like
+    the gaps Meteostat has.
+    """
+
+    name = "stub"
+
+    def __init__(self, missing_hours=()):
+        self.missing_hours = utc_hours(list(missing_hours))
+        self.requests = []
+
+    def fetch(self, start_utc, end_utc):
+        self.requests.append((start_utc, end_utc))
+        hours = hour_range(start_utc, end_utc).difference(self.missing_hours)
+        hour_values = epoch_hours(hours)
+        noise = ((hour_values * 2654435761) % 2**32) / 2**32
+        day_angle = 2 * np.pi * (hour_values % 24 - 9) / 24
+        year_angle = 2 * np.pi * (hours.dayofyear.to_numpy() - 15) / 365.25
+        temperature = 12 - 11 * np.cos(year_angle) + 4 * np.sin(day_angle)
+        return pd.DataFrame(
+            {
+                "temperature": np.round(temperature + 4 * (noise - 0.5), 1),
+                "precipitation": np.where(noise > 0.92, (noise - 0.92) * 40, 0.0),
+                "snow_depth": np.where(temperature < 0, 10.0, 0.0),
+                "humidity": np.round(45 + 40 * noise),
+                "wind_speed": np.round(5 + 20 * noise, 1),
+            },
+            index=hours,
+        )
+
+
+def weather_provider(name):
+    if name == "stub":
+        return StubProvider()
+    if name == "meteostat":
+        return MeteostatProvider()
+    raise ValueError(f"Unknown weather provider {name!r}.")
+
+
+class WeatherStore:
+    """Hourly weather archived as ``year=YYYY/month=MM`` Parquet partitions.
+
+    ``read`` returns any UTC range from the archive, first backfilling the hours
+    it lacks from ``provider``. Only hours the provider returned observations for
+    are archived. Each partition's ``coverage.json`` separately lists the hour
+    ranges already requested, so a station gap inside a fetched range is not
+    fetched again; ``read`` interpolates over it. A fetch that raises, or returns
+    no observations at all (an outage or rate limit looks the same), is not
+    recorded and is retried by the next backfill. All-NaN rows count as missing.
+    """
+
+    def __init__(self, root, provider=None):
+        self.root = root
+        self.provider = provider
+
+    def partition_path(self, year, month):
+        return os.path.join(
+            self.root, f"year={year}", f"month={month:02d}", PARTITION_FILE_NAME
+        )
+
+    def coverage_path(self, year, month):
+        return os.path.join(
+            self.root, f"year={year}", f"month={month:02d}", COVERAGE_FILE_NAME
+        )
+
+    def _months(self, hours):
+        return sorted(set(zip(hours.year, hours.month)))
+
+    def _read_partition(self, year, month):
+        path = self.partition_path(year, month)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=WEATHER_COLUMNS, dtype=np.float64)
+        return pd.read_parquet(path).dropna(how="all")
+
+    def _write_partition(self, year, month, frame):
+        path = self.partition_path(year, month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        frame.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+
+    def _read_coverage(self, year, month):
+        """Requested (first, last) epoch hour ranges of one partition."""
+        path = self.coverage_path(year, month)
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return [tuple(r) for r in json.load(f)["requested_epoch_hours"]]
+
+    def requested(self, hours):
+        """Whether each of ``hours`` lies in a range already requested."""
+        values = epoch_hours(hours)
+        mask = np.zeros(len(hours), dtype=bool)
+        for year, month in self._months(hours):
+            for first, last in self._read_coverage(year, month):
+                mask |= (values >= first) & (values <= last)
+        return mask
+
+    def mark_requested(self, first, last):
+        """Records that the provider was asked for [first, last]."""
+        hours = hour_range(first, last)
+        for year, month in self._months(hours):
+            in_month = epoch_hours(hours[(hours.year == year) & (hours.month == month)])
+            ranges = sorted(
+                self._read_coverage(year, month)
+                + [(int(in_month[0]), int(in_month[-1]))]
+            )
+            merged = [list(ranges[0])]
+            for a, b in ranges[1:]:
+                if a <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], b)
+                else:
+                    merged.append([a, b])
+            _write_json(
+                self.coverage_path(year, month), {"requested_epoch_hours": merged}
+            )
+
+    def missing_hours(self, start, end):
+        """Hours in [start, end] neither archived nor already requested."""
+        hours = hour_range(start, end)
+        archived = self.requested(hours)
+        for year, month in self._months(hours):
+            archived |= hours.isin(self._read_partition(year, month).index)
+        return hours[~archived]
+
+    def write(self, frame, hours=None, overwrite=False):
+        """Archives ``frame`` (UTC hourly index, WEATHER_COLUMNS) over ``hours``.
+
+        Hours already archived keep their values unless ``overwrite``.
+        """
+        frame = frame.copy()
+        frame.index = utc_hours(frame.index)
+        frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+        frame = frame.reindex(columns=WEATHER_COLUMNS).astype(np.float64)
+        if hours is None:
+            hours = frame.index
+        frame = frame.reindex(hours)
+        for year, month in self._months(hours):
+            in_month = (hours.year == year) & (hours.month == month)
+            existing = self._read_partition(year, month)
+            new = frame[in_month]
+            if not overwrite:
+                new = new[~new.index.isin(existing.index)]
+            if new.empty:
+                continue
+            if not existing.empty:
+                new = pd.concat([existing[~existing.index.isin(new.index)], new])
+            merged = new.sort_index()
+            merged.index.name = "time"
+            self._write_partition(year, month, merged)
+        return len(hours)
+
+    def backfill(self, start, end):
+        """Fetches every run of missing hours in [start, end]; returns the hours
+        archived (0 when the archive already covers the range)."""
+        missing = self.missing_hours(start, end)
+        if len(missing) and self.provider is None:
+            raise LookupError(
+                f"{len(missing)} weather hours missing and no provider configured."
+            )
+        archived = 0
+        for first, last in contiguous_ranges(missing):
+            print(f"Backfilling weather {first} to {last} from {self.provider.name}...")
+            fetched = self.provider.fetch(first, last)
+            fetched = fetched.reindex(columns=WEATHER_COLUMNS).dropna(how="all")
+            fetched = fetched[utc_hours(fetched.index).isin(hour_range(first, last))]
+            if fetched.empty:
+                print(
+                    f"Warning: {self.provider.name} returned no observations for "
+                    f"{first} to {last}; leaving those hours missing."
+                )
+                continue
+            archived += self.write(fetched)
+            self.mark_requested(first, last)
+        return archived
+
+    def seed_from_csv(self, csv_path):
+        """Archives the hours of a weather CSV (as fetch_historical_weather.py used
+        to write) that the store does not have yet."""
+        frame = pd.read_csv(csv_path, index_col=0, parse_dates=True)
+        return self.write(frame.reindex(columns=WEATHER_COLUMNS))
+
+    def _manifest_path(self):
+        return os.path.join(self.root, STORE_MANIFEST_FILE_NAME)
+
+    def seed_once(self, csv_path):
+        """seed_from_csv unless this CSV, unchanged, was seeded before; returns
+        whether it was read."""
+        manifest = {"seeded_csv": {}}
+        if os.path.exists(self._manifest_path()):
+            with open(self._manifest_path()) as f:
+                manifest = json.load(f)
+        key = os.path.abspath(csv_path)
+        fingerprint = file_fingerprint(csv_path)
+        if manifest["seeded_csv"].get(key) == fingerprint:
+            return False
+        print(f"Seeding weather store from {csv_path}...")
+        self.seed_from_csv(csv_path)
+        manifest["seeded_csv"][key] = fingerprint
+        _write_json(self._manifest_path(), manifest)
+        return True
+
+    def read(self, start, end, backfill=True, fill=True):
+        """Hourly WEATHER_COLUMNS on the UTC hours from ``start`` to ``end``.
+
+        With ``fill`` snow depth gaps become 0 and the rest are interpolated in
+        time and edge-filled, as the pipeline scripts did after each fetch.
+        """
+        if backfill:
+            self.backfill(start, end)
+        hours = hour_range(start, end)
+        partitions = [
+            self._read_partition(year, month) for year, month in self._months(hours)
+        ]
+        partitions = [p for p in partitions if not p.empty]
+        if partitions:
+            frame = pd.concat(partitions).reindex(hours)
+        else:
+            frame = pd.DataFrame(index=hours, columns=WEATHER_COLUMNS, dtype=np.float64)
+        frame.index.name = "time"
+        if fill:
+            frame["snow_depth"] = frame["snow_depth"].fillna(0)
+            frame = frame.interpolate(method="time").ffill().bfill()
+        return frame
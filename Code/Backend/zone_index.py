@@ -0,0 +1,200 @@
+import json
+import math
+import numpy as np
+
+ZONE_ID_PROPERTIES = ["LocationID", "location_id", "OBJECTID"]
+OUTSIDE = -1
+BOUNDARY = -2
+
+
+def _feature_zone_id(properties):
+    for name in ZONE_ID_PROPERTIES:
+        value = (properties or {}).get(name)
+        if value is not None:
+            return int(value)
+    return None
+
+
+def _polygon_rings(geometry):
+    if geometry is None:
+        return []
+    if geometry["type"] == "Polygon":
+        return list(geometry["coordinates"])
+    if geometry["type"] == "MultiPolygon":
+        return [ring for polygon in geometry["coordinates"] for ring in polygon]
+    return []
+
+
+def _expand_ranges(starts, stops):
+    """Item index and value for every integer in each [start, stop] range."""
+    counts = stops - starts + 1
+    items = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.arange(len(items)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return items, starts[items] + offsets
+
+
+class ZoneIndex:
+    """Grid bucket index over taxi zone polygons for point-to-zone lookups.
+
+    The zones' bounding box is cut into ``cells_per_side`` x ``cells_per_side``
+    cells. A cell no polygon edge can touch is answered directly with the zone
+    (or no zone) it lies in. Points in the other cells are tested against the
+    edges of their row strip with an eastward ray: crossing a zone's edges an
+    odd number of times puts the point in that zone. Rings are combined
+    even-odd, so holes and multipolygons need no special handling.
+    """
+
+    def __init__(self, zone_ids, edges, edge_zones, cells_per_side=512):
+        self.zone_ids = np.asarray(zone_ids, dtype=np.int64)
+        self.cells_per_side = cells_per_side
+        x0, y0, x1, y1 = edges.T
+        self.origin = np.array([min(x0.min(), x1.min()), min(y0.min(), y1.min())])
+        extent = np.array([max(x0.max(), x1.max()), max(y0.max(), y1.max())])
+        self.cell_size = (extent - self.origin) * (1 + 1e-9) / cells_per_side
+        col0, row0 = self._cells(np.minimum(x0, x1), np.minimum(y0, y1))
+        col1, row1 = self._cells(np.maximum(x0, x1), np.maximum(y0, y1))
+
+        sloped = y0 != y1
+        strip_edges, strip_rows = _expand_ranges(row0[sloped], row1[sloped])
+        order = np.argsort(strip_rows, kind="stable")
+        strip_edges = np.flatnonzero(sloped)[strip_edges[order]]
+        self.strip_starts = np.searchsorted(
+            strip_rows[order], np.arange(cells_per_side + 1)
+        )
+        self.strip_edges = np.ascontiguousarray(edges[strip_edges])
+        self.strip_edge_zones = edge_zones[strip_edges].astype(np.intp)
+
+        edge_rows, rows = _expand_ranges(row0, row1)
+        row_items, cols = _expand_ranges(col0[edge_rows], col1[edge_rows])
+        self.cell_zones = np.full(cells_per_side * cells_per_side, OUTSIDE, np.intp)
+        self.cell_zones[rows[row_items] * cells_per_side + cols] = BOUNDARY
+        for row in range(cells_per_side):
+            cells = row * cells_per_side + np.arange(cells_per_side)
+            interior = cells[self.cell_zones[cells] != BOUNDARY]
+            if len(interior):
+                self.cell_zones[interior] = self._sweep_row(
+                    row,
+                    self.origin[0] + (interior - cells[0] + 0.5) * self.cell_size[0],
+                )
+
+    def _sweep_row(self, row, x):
+        """Zone position at each x on the centre line of a row strip.
+
+        The line's edge crossings are sorted once and the zones it is inside of
+        are tracked from the east end, so each interval between crossings is
+        resolved once instead of ray testing every cell.
+        """
+        y = self.origin[1] + (row + 0.5) * self.cell_size[1]
+        edges = self.strip_edges[self.strip_starts[row] : self.strip_starts[row + 1]]
+        zones = self.strip_edge_zones[
+            self.strip_starts[row] : self.strip_starts[row + 1]
+        ]
+        ex0, ey0, ex1, ey1 = edges.T
+        spans = (ey0 > y) != (ey1 > y)
+        crossing_x = ex0[spans] + (y - ey0[spans]) * (ex1[spans] - ex0[spans]) / (
+            ey1[spans] - ey0[spans]
+        )
+        order = np.argsort(crossing_x)
+        crossing_x, zones = crossing_x[order], zones[spans][order]
+        interval_zones = np.full(len(crossing_x) + 1, OUTSIDE, dtype=np.intp)
+        inside = set()
+        for i in range(len(crossing_x) - 1, -1, -1):
+            inside ^= {zones[i]}
+            interval_zones[i] = max(inside) if inside else OUTSIDE
+        return interval_zones[np.searchsorted(crossing_x, x, side="right")]
+
+    @classmethod
+    def from_geojson(cls, path, cells_per_side=512):
+        """Builds the index from a zones GeoJSON (zone id in LocationID, location_id
+        or OBJECTID; lon/lat coordinates)."""
+        with open(path) as f:
+            features = json.load(f)["features"]
+        zone_ids, edges, edge_zones = [], [], []
+        for feature in features:
+            zone_id = _feature_zone_id(feature.get("properties"))
+            rings = _polygon_rings(feature.get("geometry"))
+            if zone_id is None or not rings:
+                continue
+            if zone_id not in zone_ids:
+                zone_ids.append(zone_id)
+            zone = zone_ids.index(zone_id)
+            for ring in rings:
+                ring = np.asarray(ring, dtype=np.float64)[:, :2]
+                if len(ring) < 3:
+                    continue
+                closed = np.vstack([ring, ring[:1]])
+                edges.append(np.hstack([closed[:-1], closed[1:]]))
+                edge_zones.append(np.full(len(ring), zone))
+        if not edges:
+            raise ValueError(f"No zone polygons found in {path}.")
+        edges = np.vstack(edges)
+        keep = (edges[:, 0] != edges[:, 2]) | (edges[:, 1] != edges[:, 3])
+        return cls(
+            zone_ids, edges[keep], np.concatenate(edge_zones)[keep], cells_per_side
+        )
+
+    def _cells(self, x, y):
+        col = np.floor((np.asarray(x) - self.origin[0]) / self.cell_size[0])
+        row = np.floor((np.asarray(y) - self.origin[1]) / self.cell_size[1])
+        return col.astype(np.int64), row.astype(np.int64)
+
+    def _ray_test(self, x, y, rows):
+        """Zone position containing each point (OUTSIDE if none), one strip per point."""
+        result = np.full(len(x), OUTSIDE, dtype=np.intp)
+        starts = self.strip_starts[rows]
+        counts = self.strip_starts[rows + 1] - starts
+        points = np.repeat(np.arange(len(x)), counts)
+        if len(points) == 0:
+            return result
+        edge_ids = np.arange(len(points)) - np.repeat(
+            np.cumsum(counts) - counts - starts, counts
+        )
+        ex0, ey0, ex1, ey1 = self.strip_edges[edge_ids].T
+        px, py = x[points], y[points]
+        spans = (ey0 > py) != (ey1 > py)
+        crossing_x = ex0 + (py - ey0) * (ex1 - ex0) / np.where(spans, ey1 - ey0, 1.0)
+        crosses = spans & (px < crossing_x)
+        keys = (
+            points[crosses] * len(self.zone_ids)
+            + self.strip_edge_zones[edge_ids[crosses]]
+        )
+        keys, crossings = np.unique(keys, return_counts=True)
+        inside = keys[crossings % 2 == 1]
+        result[inside // len(self.zone_ids)] = inside % len(self.zone_ids)
+        return result
+
+    def lookup(self, lat, lon):
+        """LocationID containing each point, -1 for points outside every zone."""
+        lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+        lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+        col, row = self._cells(lon, lat)
+        in_grid = (
+            (col >= 0)
+            & (col < self.cells_per_side)
+            & (row >= 0)
+            & (row < self.cells_per_side)
+        )
+        positions = np.full(len(lat), OUTSIDE, dtype=np.intp)
+        positions[in_grid] = self.cell_zones[
+            row[in_grid] * self.cells_per_side + col[in_grid]
+        ]
+        boundary = np.flatnonzero(positions == BOUNDARY)
+        if len(boundary):
+            positions[boundary] = self._ray_test(
+                lon[boundary], lat[boundary], row[boundary]
+            )
+        return np.where(positions >= 0, self.zone_ids[positions], -1)
+
+    def zone_at(self, lat, lon):
+        """LocationID containing one point (None if outside), skipping array setup
+        for points in cells no edge touches."""
+        col = math.floor((lon - self.origin[0]) / self.cell_size[0])
+        row = math.floor((lat - self.origin[1]) / self.cell_size[1])
+        if not (0 <= col < self.cells_per_side and 0 <= row < self.cells_per_side):
+            return None
+        position = self.cell_zones[row * self.cells_per_side + col]
+        if position == BOUNDARY:
+            position = self._ray_test(
+                np.array([float(lon)]), np.array([float(lat)]), np.array([row])
+            )[0]
+        return None if position < 0 else int(self.zone_ids[position])
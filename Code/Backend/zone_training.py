@@ -0,0 +1,188 @@
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import lightgbm as lgb
+from demand_models import SeasonalBaseline, ZoneBoosterEnsemble
+
+_worker_state = {}
+
+
+def plan_worker_budget(total_cores=None, threads_per_process=1):
+    """Splits the core budget into P processes x T threads with P * T <= cores."""
+    total_cores = total_cores or os.cpu_count() or 1
+    threads_per_process = max(1, min(threads_per_process, total_cores))
+    return max(1, total_cores // threads_per_process), threads_per_process
+
+
+def classify_zones(y, sparse_threshold):
+    """Assigns each zone "constant" (never any demand), "seasonal_mean" (mean hourly
+    demand below ``sparse_threshold``) or "lightgbm"."""
+    mean_demand = y.mean(axis=0)
+    strategies = {}
+    for zone_id in y.columns:
+        if not y[zone_id].any():
+            strategies[zone_id] = "constant"
+        elif mean_demand[zone_id] < sparse_threshold:
+            strategies[zone_id] = "seasonal_mean"
+        else:
+            strategies[zone_id] = "lightgbm"
+    return strategies
+
+
+def _booster_params(params, threads):
+    booster_params = {k: v for k, v in params.items() if k != "n_estimators"}
+    booster_params["n_jobs"] = threads
+    return booster_params
+
+
+def _init_worker(binary_path, params, X_valid=None):
+    train_set = lgb.Dataset(binary_path, params=params).construct()
+    _worker_state["train_set"] = train_set
+    _worker_state["valid_set"] = None
+    if X_valid is not None:
+        _worker_state["valid_set"] = lgb.Dataset(
+            X_valid,
+            label=np.zeros(len(X_valid)),
+            reference=train_set,
+            params=params,
+        ).construct()
+
+
+def _train_zone(zone_id, label, valid_label, params, num_boost_round, stop_rounds):
+    start = time.perf_counter()
+    train_set = _worker_state["train_set"]
+    valid_set = _worker_state["valid_set"]
+    train_set.set_label(label)
+    train_kwargs = {}
+    if valid_set is not None and valid_label is not None:
+        valid_set.set_label(valid_label)
+        train_kwargs["valid_sets"] = [valid_set]
+        train_kwargs["callbacks"] = [lgb.early_stopping(stop_rounds, verbose=False)]
+    booster = lgb.train(
+        params, train_set, num_boost_round=num_boost_round, **train_kwargs
+    )
+    best_iteration = booster.best_iteration or booster.current_iteration()
+    model_str = booster.model_to_string(num_iteration=best_iteration)
+    return zone_id, model_str, best_iteration, time.perf_counter() - start
+
+
+def train_zone_boosters(
+    X,
+    y,
+    params,
+    processes=1,
+    threads=1,
+    sparse_threshold=0.0,
+    X_valid=None,
+    y_valid=None,
+    early_stopping_rounds=50,
+    num_boost_rounds=None,
+    strategies=None,
+):
+    """Trains one booster per zone column of ``y`` on a single binned copy of ``X``.
+
+    Zones are first classified with ``classify_zones``; only "lightgbm" zones get
+    boosting rounds, the near-zero tail is fitted with a ``SeasonalBaseline``.
+    With a time-ordered validation split (``X_valid``/``y_valid``) each zone stops
+    early and its booster is truncated to the best iteration. ``num_boost_rounds``
+    (zone ID -> rounds, e.g. the ``best_iterations`` of an early-stopped run)
+    overrides ``n_estimators`` for the zones it lists. ``strategies`` (zone ID ->
+    strategy) replaces the classification, so a refit keeps the zones of the run
+    whose rounds it reuses.
+
+    The feature Dataset is binned once, saved in LightGBM's binary format and loaded
+    by every worker, so only the label changes between zones. Workers are forked;
+    where fork is unavailable all zones run in this process with ``processes *
+    threads`` LightGBM threads.
+    """
+    num_boost_round = params.get("n_estimators", 100)
+    if processes > 1 and "fork" not in multiprocessing.get_all_start_methods():
+        print("  Warning: fork start method unavailable, training zones in-process.")
+        threads, processes = processes * threads, 1
+    booster_params = _booster_params(params, threads)
+    zone_order = list(y.columns)
+    if strategies is None:
+        strategies = classify_zones(y, sparse_threshold)
+        source = f"threshold {sparse_threshold} trips/hour"
+    else:
+        strategies = {zone_id: strategies[zone_id] for zone_id in zone_order}
+        source = "given"
+    boosted_zones = [z for z in zone_order if strategies[z] == "lightgbm"]
+    baseline_zones = [z for z in zone_order if strategies[z] != "lightgbm"]
+    print(
+        f"Zone strategies: {len(boosted_zones)} lightgbm, "
+        f"{sum(s == 'seasonal_mean' for s in strategies.values())} seasonal_mean, "
+        f"{sum(s == 'constant' for s in strategies.values())} constant "
+        f"({source})."
+    )
+    baseline = None
+    if baseline_zones:
+        baseline = SeasonalBaseline.fit(
+            X,
+            y[baseline_zones],
+            constant_zones=[z for z in baseline_zones if strategies[z] == "constant"],
+        )
+    labels = np.asarray(y[boosted_zones], dtype=np.float64)
+    valid_labels = None
+    if X_valid is not None:
+        X_valid = np.asarray(X_valid, dtype=np.float64)
+        valid_labels = np.asarray(y_valid[boosted_zones], dtype=np.float64)
+        print(
+            f"Early stopping on {len(X_valid)} validation hours "
+            f"(patience {early_stopping_rounds} rounds)."
+        )
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        binary_path = os.path.join(tmp_dir, "features.bin")
+        # Bin single-threaded so forked workers do not inherit an OpenMP pool.
+        lgb.Dataset(
+            np.asarray(X, dtype=np.float64),
+            label=np.asarray(y.iloc[:, 0], dtype=np.float64),
+            feature_name=[str(c) for c in X.columns],
+            params={**booster_params, "n_jobs": 1},
+            free_raw_data=True,
+        ).save_binary(binary_path)
+        zone_args = (
+            boosted_zones,
+            [np.ascontiguousarray(labels[:, i]) for i in range(len(boosted_zones))],
+            [
+                None if valid_labels is None else valid_labels[:, i]
+                for i in range(len(boosted_zones))
+            ],
+            [booster_params] * len(boosted_zones),
+            [(num_boost_rounds or {}).get(z, num_boost_round) for z in boosted_zones],
+            [early_stopping_rounds] * len(boosted_zones),
+        )
+        print(
+            f"Training {len(boosted_zones)} zones on {processes} process(es) x "
+            f"{threads} thread(s)..."
+        )
+        if processes <= 1:
+            _init_worker(binary_path, booster_params, X_valid)
+            outcomes = map(_train_zone, *zone_args)
+            for zone_id, model_str, best_iteration, seconds in outcomes:
+                results[zone_id] = (model_str, best_iteration, seconds)
+                print(f"  Zone {zone_id}: {seconds:.2f}s, {best_iteration} rounds")
+        else:
+            with ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_init_worker,
+                initargs=(binary_path, booster_params, X_valid),
+            ) as executor:
+                outcomes = executor.map(_train_zone, *zone_args)
+                for zone_id, model_str, best_iteration, seconds in outcomes:
+                    results[zone_id] = (model_str, best_iteration, seconds)
+                    print(f"  Zone {zone_id}: {seconds:.2f}s, {best_iteration} rounds")
+    boosters = [
+        lgb.Booster(model_str=results[z][0]) if z in results else None
+        for z in zone_order
+    ]
+    best_iterations = {z: best for z, (_, best, _) in results.items()}
+    train_seconds = {z: seconds for z, (_, _, seconds) in results.items()}
+    return ZoneBoosterEnsemble(
+        zone_order, boosters, train_seconds, strategies, baseline, best_iterations
+    )
@@ -0,0 +1,343 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+import platform
+import resource
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+CODE_DIR = os.path.dirname(BENCHMARKS_DIR)
+BACKEND_DIR = os.path.join(CODE_DIR, "Backend")
+sys.path.insert(0, BACKEND_DIR)
+import synthetic_tlc
+
+REPORT_PATH = os.environ.get(
+    "BENCHMARK_REPORT_PATH", os.path.join(BENCHMARKS_DIR, "pipeline_benchmark.json")
+)
+WORK_DIR = os.environ.get(
+    "BENCHMARK_WORK_DIR", os.path.join(BENCHMARKS_DIR, "synthetic_data")
+)
+FIRST_MONTH = os.environ.get("BENCHMARK_FIRST_MONTH", "2023-01")
+NUM_MONTHS = int(os.environ.get("BENCHMARK_MONTHS", 1))
+NUM_ZONES = int(os.environ.get("NUM_ZONES", 265))
+TRIPS_PER_HOUR = float(os.environ.get("TRIPS_PER_HOUR", 2000))
+SEED = int(os.environ.get("BENCHMARK_SEED", 0))
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", 1))
+TRAINING_MODE = os.environ.get("TRAINING_MODE", "global")
+# Caps train_ml's n_estimators so a run stays short.
+TRAIN_ESTIMATORS = int(os.environ.get("TRAIN_ESTIMATORS", 100))
+REQUEST_REPEATS = int(os.environ.get("REQUEST_REPEATS", 200))
+
+
+def work_paths():
+    return {
+        "data_dir": os.path.join(WORK_DIR, "Dataset"),
+        "output_dir": os.path.join(WORK_DIR, "processed_data_ml"),
+        "model_dir": os.path.join(WORK_DIR, "models_ml"),
+        "zone_lookup": os.path.join(WORK_DIR, "Dataset", "taxi_zone_lookup.csv"),
+        "weather": os.path.join(WORK_DIR, "nyc_weather_hourly_synthetic.csv"),
+        "weather_store": os.path.join(WORK_DIR, "weather_store"),
+        "counts": os.path.join(WORK_DIR, "processed_data_ml", "demand_counts.npy"),
+        "target": os.path.join(
+            WORK_DIR, "processed_data_ml", "target_demand_ml_2yr.parquet"
+        ),
+        "features": os.path.join(
+            WORK_DIR, "processed_data_ml", "scaled_features_ml_2yr.parquet"
+        ),
+    }
+
+
+def hour_index():
+    """UTC hours covered by the generated months."""
+    starts = synthetic_tlc.month_starts(FIRST_MONTH, NUM_MONTHS + 1)
+    return pd.date_range(starts[0], starts[-1], freq="h", inclusive="left", tz="UTC")
+
+
+def file_specs(paths):
+    return [
+        (os.path.join(paths["data_dir"], synthetic_tlc.trip_file_name(m)), str(m.year))
+        for m in synthetic_tlc.month_starts(FIRST_MONTH, NUM_MONTHS)
+    ]
+
+
+def zone_ids():
+    return list(range(1, NUM_ZONES + 1))
+
+
+def peak_rss_mb(who):
+    """ru_maxrss in MB (reported in KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def stage_generate(paths):
+    for key in ["data_dir", "output_dir", "model_dir"]:
+        os.makedirs(paths[key], exist_ok=True)
+    synthetic_tlc.write_zone_lookup(paths["zone_lookup"], NUM_ZONES)
+    specs = synthetic_tlc.write_trip_months(
+        paths["data_dir"], FIRST_MONTH, NUM_MONTHS, NUM_ZONES, TRIPS_PER_HOUR, SEED
+    )
+    hours = hour_index()
+    synthetic_tlc.write_weather_csv(
+        paths["weather"], hours[0].tz_localize(None), len(hours), SEED
+    )
+    return {
+        "files": len(specs),
+        "bytes": sum(os.path.getsize(path) for path, _ in specs),
+    }
+
+
+def stage_ingest(paths):
+    """load_data.py's streaming (or, with INGEST_WORKERS > 1, parallel) ingest."""
+    from load_data import count_demand
+
+    hours = hour_index()
+    counts = count_demand(
+        file_specs(paths),
+        hours[0],
+        len(hours),
+        zone_ids(),
+        mode="parallel" if INGEST_WORKERS > 1 else "streaming",
+        workers=INGEST_WORKERS,
+        incremental=False,
+    )
+    np.save(paths["counts"], counts)
+    trips = int(counts.sum(dtype=np.int64))
+    return {"rows": trips, "hours": len(hours), "zones": counts.shape[1]}
+
+
+def stage_features(paths):
+    """load_data.py's reindex, feature, weather, scaling and output steps on the
+    ingested counts, with weather from the store seeded by the synthetic CSV."""
+    from load_data import (
+        COMPACT_DTYPES,
+        align_demand,
+        merge_weather,
+        read_weather,
+        read_zone_lookup,
+        scale_features,
+        write_outputs,
+    )
+    from time_features import time_features_frame
+
+    hours = hour_index()
+    zone_lookup_df = read_zone_lookup(paths["zone_lookup"])
+    df_target = align_demand(
+        pd.DataFrame(np.load(paths["counts"]), index=hours, columns=zone_ids()),
+        hours,
+        zone_ids(),
+    )
+    df_weather = read_weather(
+        hours[0], hours[-1], paths["weather_store"], "stub", paths["weather"]
+    )
+    df_features = merge_weather(time_features_frame(hours), df_weather)
+    feature_scaler, df_scaled = scale_features(df_features)
+    sizes = write_outputs(
+        df_target,
+        df_scaled,
+        feature_scaler,
+        zone_lookup_df,
+        paths["output_dir"],
+        paths["model_dir"],
+    )
+    return {
+        "rows": len(df_scaled),
+        "features": df_scaled.shape[1],
+        "compact_dtypes": COMPACT_DTYPES,
+        **sizes,
+        "target_file_mb": os.path.getsize(paths["target"]) / (1024 * 1024),
+        "features_file_mb": os.path.getsize(paths["features"]) / (1024 * 1024),
+    }
+
+
+def stage_train(paths):
+    """train_ml.py's load and fit_model for TRAINING_MODE, n_estimators capped."""
+    import joblib
+    from model_bundle import MODEL_FILE_NAME, ZONE_ORDER_FILE_NAME
+    from train_ml import (
+        GLOBAL_LGBM_PARAMS,
+        LGBM_PARAMS,
+        REFIT_FULL_DATA,
+        fit_model,
+        load_training_data,
+    )
+
+    X, y = load_training_data(
+        paths["target"],
+        paths["features"],
+        os.path.join(paths["model_dir"], ZONE_ORDER_FILE_NAME),
+    )
+    model = fit_model(TRAINING_MODE, X, y, REFIT_FULL_DATA, TRAIN_ESTIMATORS)
+    model_path = os.path.join(paths["model_dir"], MODEL_FILE_NAME)
+    joblib.dump(model, model_path)
+    return {
+        "rows": int(y.size),
+        "mode": TRAINING_MODE,
+        "params": {
+            **(GLOBAL_LGBM_PARAMS if TRAINING_MODE == "global" else LGBM_PARAMS),
+            "n_estimators": TRAIN_ESTIMATORS,
+        },
+        "model_bytes": os.path.getsize(model_path),
+    }
+
+
+def stage_batch_scoring(paths):
+    from model_bundle import load_serving_model
+
+    model = load_serving_model(paths["model_dir"], "joblib", compiled_max_rows=0)
+    X_scaled = pd.read_parquet(paths["features"]).to_numpy()
+    start = time.perf_counter()
+    predictions = model.predict(X_scaled)
+    predict_seconds = time.perf_counter() - start
+    return {
+        "rows": int(predictions.size),
+        "hours": len(X_scaled),
+        "predict_seconds": predict_seconds,
+        "zone_hours_per_second": predictions.size / predict_seconds,
+    }
+
+
+def forecast_blocks(df_weather):
+    """The synthetic weather as OpenWeatherMap 3-hour forecast blocks."""
+    return [
+        {
+            "dt": int(ts.timestamp()),
+            "main": {"temp": float(row.temperature), "humidity": float(row.humidity)},
+            "wind": {"speed": float(row.wind_speed)},
+            "rain": {"3h": float(row.precipitation) * 3},
+        }
+        for ts, row in df_weather.iloc[::3].iterrows()
+    ]
+
+
+def stage_single_request(paths):
+    """One-hour GET /predict through API.py's Flask app (test client), with the
+    forecast served from the synthetic weather instead of OpenWeatherMap."""
+    os.environ["MODEL_DIR"] = paths["model_dir"]
+    # Background forecast, grid and model-watch threads stay off.
+    os.environ["SERVING_MODE"] = "async"
+    start = time.perf_counter()
+    import API
+
+    load_seconds = time.perf_counter() - start
+    df_weather = pd.read_csv(paths["weather"], index_col=0, parse_dates=True)
+    df_weather.index = df_weather.index.tz_localize("UTC")
+    API.FORECAST_CACHE.fetch = lambda: forecast_blocks(df_weather)
+    if not API.FORECAST_CACHE.refresh():
+        raise RuntimeError(API.FORECAST_CACHE.last_error)
+    client = API.app.test_client()
+    local_hours = hour_index().tz_convert(API.LOCAL_TZ_NAME)
+
+    def request_hour(local_hour):
+        response = client.get(
+            f"/predict?date={local_hour:%Y-%m-%d}&time={local_hour:%H:%M}"
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"/predict returned {response.status_code}")
+        return response
+
+    request_hour(local_hours[0])
+    rng = np.random.default_rng(SEED)
+    latencies = []
+    for local_hour in local_hours[rng.integers(0, len(local_hours), REQUEST_REPEATS)]:
+        start = time.perf_counter()
+        request_hour(local_hour)
+        latencies.append(time.perf_counter() - start)
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "rows": REQUEST_REPEATS,
+        "model": type(API.MODEL_REGISTRY.state.model).__name__,
+        "api_startup_seconds": load_seconds,
+        "latency_ms_p50": float(np.percentile(latencies_ms, 50)),
+        "latency_ms_p95": float(np.percentile(latencies_ms, 95)),
+        "latency_ms_p99": float(np.percentile(latencies_ms, 99)),
+        "micro_batcher": API.PREDICTION_BATCHER.metrics(),
+    }
+
+
+STAGE_FUNCTIONS = {
+    "generate": stage_generate,
+    "ingest": stage_ingest,
+    "features": stage_features,
+    "train": stage_train,
+    "batch_scoring": stage_batch_scoring,
+    "single_request": stage_single_request,
+}
+
+
+def run_stage(name):
+    """Runs one stage in this (fresh) process and adds its cost to its result."""
+    paths = work_paths()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    result = STAGE_FUNCTIONS[name](paths)
+    result["wall_seconds"] = time.perf_counter() - wall_start
+    result["cpu_seconds"] = time.process_time() - cpu_start
+    result["peak_rss_mb"] = peak_rss_mb(resource.RUSAGE_SELF)
+    result["children_peak_rss_mb"] = peak_rss_mb(resource.RUSAGE_CHILDREN)
+    return result
+
+
+def library_versions():
+    versions = {"python": platform.python_version()}
+    for module_name in ["numpy", "pandas", "pyarrow", "sklearn", "lightgbm"]:
+        try:
+            versions[module_name] = __import__(module_name).__version__
+        except ImportError:
+            versions[module_name] = None
+    return versions
+
+
+if __name__ == "__main__":
+    hours = hour_index()
+    print("--- End-to-End Pipeline Benchmark (synthetic TLC data) ---")
+    print(
+        f"{NUM_MONTHS} month(s) from {FIRST_MONTH}: {len(hours)} hours x "
+        f"{NUM_ZONES} zones at ~{TRIPS_PER_HOUR:.0f} trips/hour."
+    )
+    print(f"Working directory: {WORK_DIR}")
+    report = {
+        "created_at": pd.Timestamp.now(tz="UTC").isoformat(),
+        "config": {
+            "first_month": FIRST_MONTH,
+            "months": NUM_MONTHS,
+            "zones": NUM_ZONES,
+            "trips_per_hour": TRIPS_PER_HOUR,
+            "seed": SEED,
+            "ingest_workers": INGEST_WORKERS,
+            "training_mode": TRAINING_MODE,
+            "train_estimators": TRAIN_ESTIMATORS,
+            "request_repeats": REQUEST_REPEATS,
+        },
+        "environment": {
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "versions": library_versions(),
+        },
+        "stages": {},
+    }
+    # Each stage runs in a freshly spawned process so its peak RSS is its own.
+    context = multiprocessing.get_context("spawn")
+    for name in STAGE_FUNCTIONS:
+        print(f"\nRunning stage: {name}...")
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(run_stage, name).result()
+        except Exception as e:
+            print(f"ERROR: Stage {name} failed: {e}")
+            traceback.print_exc()
+            report["stages"][name] = {"error": str(e)}
+            break
+        report["stages"][name] = result
+        print(
+            f"  {result['wall_seconds']:.2f}s wall, {result['cpu_seconds']:.2f}s CPU, "
+            f"peak RSS {result['peak_rss_mb']:.0f} MB"
+        )
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nBenchmark report saved to {REPORT_PATH}")
@@ -0,0 +1,100 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+CODE_DIR = os.path.dirname(BENCHMARKS_DIR)
+BACKEND_DIR = os.path.join(CODE_DIR, "Backend")
+sys.path.insert(0, BACKEND_DIR)
+import prediction_encoding
+from prediction_encoding import ARROW_MEDIA_TYPE, INT32_MEDIA_TYPE
+
+REPORT_PATH = os.path.join(BENCHMARKS_DIR, "response_formats_benchmark.json")
+NUM_ZONES = int(os.environ.get("NUM_ZONES", 265))
+BENCHMARK_HOURS = [1, 24, 168]
+BENCHMARK_REPEATS = int(os.environ.get("BENCHMARK_REPEATS", 50))
+LOCAL_TZ_NAME = "America/New_York"
+
+
+def median_seconds(fn, repeats):
+    fn()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def json_round_trip(timestamps, matrix, zone_order):
+    """Encodes like /predict_batch's JSON body and decodes back into a matrix."""
+    body = json.dumps(
+        {
+            "timezone": LOCAL_TZ_NAME,
+            "timestamps": [ts.isoformat() for ts in timestamps],
+            "zones": [int(zone_id) for zone_id in zone_order],
+            "predictions": matrix.tolist(),
+        }
+    ).encode()
+    return body, np.asarray(json.loads(body)["predictions"], dtype=np.int32)
+
+
+def int32_round_trip(timestamps, matrix, zone_order):
+    body, headers = prediction_encoding.encode(
+        INT32_MEDIA_TYPE, timestamps, matrix, zone_order
+    )
+    shape = [int(n) for n in headers["X-Prediction-Shape"].split(",")]
+    return body, np.frombuffer(body, dtype="<i4").reshape(shape)
+
+
+def arrow_round_trip(timestamps, matrix, zone_order):
+    import pyarrow as pa
+
+    body, _ = prediction_encoding.encode(
+        ARROW_MEDIA_TYPE, timestamps, matrix, zone_order
+    )
+    table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    predictions = table.column("predictions").combine_chunks()
+    return body, predictions.flatten().to_numpy().reshape(len(table), -1)
+
+
+rng = np.random.default_rng(0)
+zone_order = list(range(1, NUM_ZONES + 1))
+report = {"num_zones": NUM_ZONES, "repeats": BENCHMARK_REPEATS, "hours": {}}
+print(f"Benchmarking response formats for {NUM_ZONES} zones (median round trip)...")
+for hours in BENCHMARK_HOURS:
+    timestamps = pd.date_range("2024-06-01", periods=hours, freq="h", tz=LOCAL_TZ_NAME)
+    matrix = rng.poisson(40, size=(hours, NUM_ZONES)).astype(np.int32)
+    results = {}
+    for name, round_trip in [
+        ("json", json_round_trip),
+        ("int32", int32_round_trip),
+        ("arrow", arrow_round_trip),
+    ]:
+        body, decoded = round_trip(timestamps, matrix, zone_order)
+        if not np.array_equal(decoded, matrix):
+            print(f"ERROR: {name} round trip changed the predictions.")
+            sys.exit(1)
+        seconds = median_seconds(
+            lambda: round_trip(timestamps, matrix, zone_order), BENCHMARK_REPEATS
+        )
+        results[name] = {"bytes": len(body), "round_trip_ms": seconds * 1000}
+    for name in ["int32", "arrow"]:
+        results[name]["speedup_vs_json"] = (
+            results["json"]["round_trip_ms"] / results[name]["round_trip_ms"]
+        )
+    report["hours"][str(hours)] = results
+    print(
+        f"  {hours:>3}h: "
+        + ", ".join(
+            f"{name} {r['round_trip_ms']:.3f} ms / {r['bytes']} B"
+            for name, r in results.items()
+        )
+    )
+
+with open(REPORT_PATH, "w") as f:
+    json.dump(report, f, indent=2)
+print(f"Benchmark report saved to {REPORT_PATH}")
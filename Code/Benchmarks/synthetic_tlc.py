@@ -0,0 +1,150 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+BOROUGHS = ["Manhattan", "Brooklyn", "Queens", "Bronx", "Staten Island", "EWR"]
+LICENSES = ["HV0003", "HV0004", "HV0005"]
+WEATHER_COLUMNS = [
+    "temperature",
+    "precipitation",
+    "snow_depth",
+    "humidity",
+    "wind_speed",
+]
+
+
+def month_starts(first_month, num_months):
+    """Timestamps of the first hour of ``num_months`` months from ``first_month``."""
+    return pd.date_range(pd.Timestamp(first_month), periods=num_months, freq="MS")
+
+
+def trip_file_name(month_start):
+    return f"fhvhv_tripdata_{month_start:%Y-%m}.parquet"
+
+
+def zone_weights(num_zones, rng):
+    """Heavy-tailed share of trips per zone; the last tenth is near empty, like the
+    airports-and-parks tail of the real lookup."""
+    weights = rng.lognormal(mean=0.0, sigma=1.2, size=num_zones)
+    weights[-max(1, num_zones // 10) :] *= 0.002
+    return weights / weights.sum()
+
+
+def hourly_profile(hours):
+    """Relative demand per hour: evening peak, night trough, busier weekends."""
+    hour_of_day = hours.hour.to_numpy()
+    profile = 1.0 + 0.6 * np.sin(2 * np.pi * (hour_of_day - 11) / 24)
+    weekend = hours.dayofweek.to_numpy() >= 5
+    return profile * np.where(weekend, 1.15, 1.0)
+
+
+def write_zone_lookup(path, num_zones):
+    """taxi_zone_lookup.csv with LocationIDs 1..num_zones."""
+    zone_ids = np.arange(1, num_zones + 1)
+    pd.DataFrame(
+        {
+            "LocationID": zone_ids,
+            "Borough": [BOROUGHS[i % len(BOROUGHS)] for i in range(num_zones)],
+            "Zone": [f"Synthetic Zone {z}" for z in zone_ids],
+            "service_zone": ["Boro Zone"] * num_zones,
+        }
+    ).to_csv(path, index=False)
+    return zone_ids.tolist()
+
+
+def synthetic_month(month_start, num_zones, trips_per_hour, rng, invalid_share=0.001):
+    """One fhvhv month as an Arrow table in the TLC column layout.
+
+    Hourly counts per zone are Poisson draws around ``trips_per_hour`` shaped by
+    ``hourly_profile`` and ``zone_weights``. A small ``invalid_share`` of pickups
+    names a LocationID outside the lookup so ingest has rows to drop.
+    """
+    hours = pd.date_range(
+        month_start, month_start + pd.offsets.MonthBegin(1), freq="h", inclusive="left"
+    )
+    weights = zone_weights(num_zones, np.random.default_rng(num_zones))
+    rates = trips_per_hour * hourly_profile(hours)[:, None] * weights[None, :]
+    counts = rng.poisson(rates).reshape(-1)
+    num_trips = int(counts.sum())
+    cells = np.repeat(np.arange(len(counts)), counts)
+    hour_starts = hours.values.astype("datetime64[us]")[cells // num_zones]
+    pickup = hour_starts + rng.integers(0, 3600 * 10**6, num_trips).astype(
+        "timedelta64[us]"
+    )
+    duration = rng.gamma(2.0, 600.0, num_trips).astype(np.int64) + 60
+    pickup_zone = (cells % num_zones + 1).astype(np.int64)
+    invalid = rng.random(num_trips) < invalid_share
+    pickup_zone[invalid] = num_zones + 1 + rng.integers(0, 10, int(invalid.sum()))
+    trip_miles = np.round(duration / 180.0 * rng.uniform(0.5, 1.5, num_trips), 2)
+    return pa.table(
+        {
+            "hvfhs_license_num": pa.array(
+                np.asarray(LICENSES)[rng.integers(0, len(LICENSES), num_trips)]
+            ),
+            "pickup_datetime": pa.array(pickup, type=pa.timestamp("us")),
+            "dropoff_datetime": pa.array(
+                pickup + duration.astype("timedelta64[s]"), type=pa.timestamp("us")
+            ),
+            "PULocationID": pa.array(pickup_zone),
+            "DOLocationID": pa.array(rng.integers(1, num_zones + 1, num_trips)),
+            "trip_miles": pa.array(trip_miles),
+            "trip_time": pa.array(duration),
+            "base_passenger_fare": pa.array(np.round(2.5 + trip_miles * 2.1, 2)),
+        }
+    )
+
+
+def write_trip_months(
+    data_dir,
+    first_month,
+    num_months,
+    num_zones,
+    trips_per_hour,
+    seed=0,
+    row_group_size=1_000_000,
+):
+    """Writes one fhvhv Parquet file per month; returns ``(file_path, year)`` specs
+    as trip_ingest.count_trips takes them."""
+    rng = np.random.default_rng(seed)
+    file_specs = []
+    for month_start in month_starts(first_month, num_months):
+        file_path = os.path.join(data_dir, trip_file_name(month_start))
+        table = synthetic_month(month_start, num_zones, trips_per_hour, rng)
+        pq.write_table(table, file_path, row_group_size=row_group_size)
+        file_specs.append((file_path, str(month_start.year)))
+        del table
+    return file_specs
+
+
+def write_weather_csv(path, first_hour, num_hours, seed=0):
+    """Hourly weather CSV in the renamed Meteostat layout fetch_historical_weather.py
+    saves (UTC ``time`` index, WEATHER_COLUMNS)."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(first_hour, periods=num_hours, freq="h", name="time")
+    day_of_year = index.dayofyear.to_numpy()
+    hour_of_day = index.hour.to_numpy()
+    temperature = (
+        12
+        - 11 * np.cos(2 * np.pi * (day_of_year - 15) / 365.25)
+        + 4 * np.sin(2 * np.pi * (hour_of_day - 9) / 24)
+        + rng.normal(0, 2, num_hours)
+    )
+    wet = rng.random(num_hours) < 0.08
+    precipitation = np.where(wet, rng.exponential(1.5, num_hours), 0.0)
+    snow_depth = np.where(
+        temperature < 0, np.round(rng.exponential(20, num_hours)), 0.0
+    )
+    frame = pd.DataFrame(
+        {
+            "temperature": np.round(temperature, 1),
+            "precipitation": np.round(precipitation, 1),
+            "snow_depth": snow_depth,
+            "humidity": np.clip(np.round(rng.normal(65, 15, num_hours)), 15, 100),
+            "wind_speed": np.round(rng.gamma(3.0, 4.0, num_hours), 1),
+        },
+        index=index,
+    )
+    frame.to_csv(path)
+    return frame
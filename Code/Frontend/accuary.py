@@ -1,37 +1,36 @@
 import pandas as pd
 import numpy as np
 import joblib
-from sklearn.metrics import (
-    mean_absolute_error,
-    mean_squared_error,
-    mean_absolute_percentage_error,
-)
 from sklearn.preprocessing import MinMaxScaler
-import holidays
 import os
+import sys
 import traceback
 import lightgbm as lgb
 from sklearn.multioutput import MultiOutputRegressor
-from meteostat import Point, Hourly
-from datetime import timezone
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CODE_DIR = os.path.dirname(SCRIPT_DIR)
 DATA_DIR = os.path.join(CODE_DIR, "Dataset")
 BACKEND_DIR = os.path.join(CODE_DIR, "Backend")
 MODEL_DIR = os.path.join(BACKEND_DIR, "models_ml/")
+sys.path.insert(0, BACKEND_DIR)
+from time_features import time_features_frame
+from evaluation import ErrorStatistics, write_reports
+from weather_store import WeatherStore, weather_provider
+from trip_ingest import count_file_trips
+from compact_frames import compact_counts, frame_mb
+from stage_metrics import peak_rss_mb
+
 EVAL_DATA_PATH = os.path.join(SCRIPT_DIR, "jan-2025.parquet")
 ZONE_LOOKUP_PATH = os.path.join(DATA_DIR, "taxi_zone_lookup.csv")
-WEATHER_COLS_TO_USE = [
-    "temperature",
-    "precipitation",
-    "snow_depth",
-    "humidity",
-    "wind_speed",
-]
-NYC_LAT = 40.7128
-NYC_LON = -74.0060
-NYC_ALTITUDE = 10
+WEATHER_STORE_DIR = os.environ.get(
+    "WEATHER_STORE_DIR", os.path.join(CODE_DIR, "weather_store")
+)
+WEATHER_PROVIDER = os.environ.get("WEATHER_PROVIDER", "meteostat")
+LOCAL_TZ_NAME = "America/New_York"
+EXCLUDED_ZONE_IDS = [138]
+WORST_ZONES_EXCLUDED = 5
+COMPACT_DTYPES = os.environ.get("COMPACT_DTYPES", "1") == "1"
 print("--- Model Evaluation Script (Evaluating 2-Year Model) ---")
 print(f"Evaluating using Taxi Data: {EVAL_DATA_PATH}")
 print(f"Loading 2-Year assets from: {MODEL_DIR}")
@@ -70,57 +69,33 @@ try:
     )
     VALID_ZONE_IDS = sorted(list(zone_lookup_df["LocationID"].unique()))
     print(f"Using {len(VALID_ZONE_IDS)} zones.")
-    parquet_cols_to_read = ["pickup_datetime", "PULocationID"]
-    df_eval_raw = pd.read_parquet(EVAL_DATA_PATH, columns=parquet_cols_to_read)
-    df_eval_raw.dropna(subset=parquet_cols_to_read, inplace=True)
-    df_eval_raw["PULocationID"] = pd.to_numeric(
-        df_eval_raw["PULocationID"], errors="coerce"
+    start_eval_utc = pd.Timestamp("2025-01-01 00:00:00", tz="UTC")
+    end_eval_utc = pd.Timestamp("2025-01-31 23:00:00", tz="UTC")
+    all_hours_eval_utc = pd.date_range(start=start_eval_utc, end=end_eval_utc, freq="h")
+    eval_counts = count_file_trips(
+        EVAL_DATA_PATH,
+        "2025",
+        start_eval_utc,
+        len(all_hours_eval_utc),
+        VALID_ZONE_IDS,
     )
-    df_eval_raw.dropna(subset=["PULocationID"], inplace=True)
-    df_eval_raw["PULocationID"] = df_eval_raw["PULocationID"].astype(int)
-    df_eval_raw = df_eval_raw[df_eval_raw["PULocationID"].isin(VALID_ZONE_IDS)]
-    df_eval_raw["pickup_datetime"] = pd.to_datetime(df_eval_raw["pickup_datetime"])
-    start_eval_dt = pd.Timestamp("2025-01-01 00:00:00")
-    end_eval_dt = pd.Timestamp("2025-01-31 23:59:59")
-    df_eval_raw = df_eval_raw[
-        (df_eval_raw["pickup_datetime"] >= start_eval_dt)
-        & (df_eval_raw["pickup_datetime"] <= end_eval_dt)
-    ]
-    if df_eval_raw.empty:
+    if not eval_counts.any():
         print("ERROR: No valid trip data found for Jan 2025.")
         exit()
-    print(f"Loaded {len(df_eval_raw)} valid trips for Jan 2025.")
-    df_eval_raw["pickup_hour"] = df_eval_raw["pickup_datetime"].dt.floor("h")
-    df_eval_demand = (
-        df_eval_raw.groupby(["pickup_hour", "PULocationID"])
-        .size()
-        .reset_index(name="demand")
+    print(f"Loaded {int(eval_counts.sum(dtype=np.int64))} valid trips for Jan 2025.")
+    df_eval_pivot = pd.DataFrame(
+        eval_counts, index=all_hours_eval_utc, columns=VALID_ZONE_IDS
     )
-    del df_eval_raw
-    df_eval_pivot = df_eval_demand.pivot_table(
-        index="pickup_hour", columns="PULocationID", values="demand", fill_value=0
-    )
-    print("Applying Timezone (Converting Eval Index to UTC)...")
-    try:
-        if df_eval_pivot.index.tz is None:
-            df_eval_pivot.index = df_eval_pivot.index.tz_localize("UTC")
-        elif df_eval_pivot.index.tz != "UTC":
-            df_eval_pivot.index = df_eval_pivot.index.tz_convert("UTC")
-        else:
-            print("Eval index already UTC.")
-    except Exception as tz_err:
-        print(f"ERROR: TZ handling failed for eval data: {tz_err}.")
-        traceback.print_exc()
-        exit()
-    start_eval_utc = pd.Timestamp("2025-01-01 00:00:00", tz="UTC")
-    end_eval_utc = pd.Timestamp("2025-01-31 23:00:00", tz="UTC")
-    all_hours_eval_utc = pd.date_range(start=start_eval_utc, end=end_eval_utc, freq="h")
-    df_eval_pivot = df_eval_pivot.reindex(all_hours_eval_utc, fill_value=0)
     df_eval_pivot = df_eval_pivot.reindex(columns=ZONE_ORDER, fill_value=0)
     df_eval_pivot.fillna(0, inplace=True)
-    df_eval_pivot = df_eval_pivot.astype(int)
+    df_eval_pivot = (
+        compact_counts(df_eval_pivot) if COMPACT_DTYPES else df_eval_pivot.astype(int)
+    )
     y_true = df_eval_pivot
-    print(f"Processed ground truth data shape (y_true UTC): {y_true.shape}")
+    print(
+        f"Processed ground truth data shape (y_true UTC): {y_true.shape} "
+        f"({y_true.dtypes.iloc[0]}, {frame_mb(y_true):.1f} MB)"
+    )
 except FileNotFoundError:
     print(f"ERROR: Eval taxi data file not found: {EVAL_DATA_PATH}")
     exit()
@@ -131,96 +106,22 @@ except Exception as e:
 print("\nGenerating time features for evaluation period (from UTC index)...")
 try:
     eval_index = y_true.index
-    df_eval_time_features = pd.DataFrame(index=eval_index)
-    df_eval_time_features["year"] = (
-        df_eval_time_features.index.year
-    )  # Year will be 2025
-    df_eval_time_features["hour"] = df_eval_time_features.index.hour
-    df_eval_time_features["dayofweek"] = df_eval_time_features.index.dayofweek
-    df_eval_time_features["dayofmonth"] = df_eval_time_features.index.day
-    df_eval_time_features["month"] = df_eval_time_features.index.month
-    df_eval_time_features["quarter"] = df_eval_time_features.index.quarter
-    df_eval_time_features["dayofyear"] = df_eval_time_features.index.dayofyear
-    df_eval_time_features["weekofyear"] = (
-        df_eval_time_features.index.isocalendar().week.astype(int)
-    )
-    df_eval_time_features["is_weekend"] = (
-        df_eval_time_features["dayofweek"].isin([5, 6]).astype(int)
-    )
-    us_holidays_eval = holidays.US(years=[2025])
-    eval_dates = df_eval_time_features.index.date
-    df_eval_time_features["is_holiday"] = np.isin(
-        eval_dates, [d for d in us_holidays_eval]
-    ).astype(int)
-    seconds_in_day = 24 * 60 * 60
-    seconds_in_year = 365.2425 * seconds_in_day
-    timestamps_sec = df_eval_time_features.index.astype(np.int64) // 10**9
-    df_eval_time_features["hour_sin"] = np.sin(
-        timestamps_sec * (2 * np.pi / seconds_in_day)
-    )
-    df_eval_time_features["hour_cos"] = np.cos(
-        timestamps_sec * (2 * np.pi / seconds_in_day)
-    )
-    df_eval_time_features["month_sin"] = np.sin(
-        timestamps_sec * (2 * np.pi / seconds_in_year)
-    )
-    df_eval_time_features["month_cos"] = np.cos(
-        timestamps_sec * (2 * np.pi / seconds_in_year)
-    )
+    df_eval_time_features = time_features_frame(eval_index)
     print(f"Generated time features shape: {df_eval_time_features.shape}")
 except Exception as e:
     print(f"Error generating time features: {e}")
     traceback.print_exc()
     exit()
-print(
-    "\nFetching & processing weather data for evaluation period (Jan 2025) using Meteostat..."
-)
+print(f"\nReading weather for the evaluation period from {WEATHER_STORE_DIR}...")
 try:
-    location = Point(NYC_LAT, NYC_LON, NYC_ALTITUDE)
-    fetch_start_utc = y_true.index.min()
-    fetch_end_utc = y_true.index.max()
-    print(f"Fetching weather from {fetch_start_utc} to {fetch_end_utc}")
-    fetch_start_dt_naive = fetch_start_utc.to_pydatetime().replace(tzinfo=None)
-    fetch_end_dt_naive = fetch_end_utc.to_pydatetime().replace(tzinfo=None)
-    weather_fetch_data = Hourly(location, fetch_start_dt_naive, fetch_end_dt_naive)
-    df_eval_weather_hist = weather_fetch_data.fetch()
-    if df_eval_weather_hist.empty:
-        print("ERROR: Meteostat fetch returned no data.")
-        exit()
-    print(f"Fetched {len(df_eval_weather_hist)} hourly weather records.")
-    df_eval_weather_hist.index = pd.to_datetime(df_eval_weather_hist.index, utc=True)
-    if df_eval_weather_hist.index.tz is None:
-        df_eval_weather_hist.index = df_eval_weather_hist.index.tz_localize("UTC")
-    elif df_eval_weather_hist.index.tz != "UTC":
-        df_eval_weather_hist.index = df_eval_weather_hist.index.tz_convert("UTC")
-    df_eval_weather_hist = df_eval_weather_hist.rename(
-        columns={
-            "temp": "temperature",
-            "prcp": "precipitation",
-            "snow": "snow_depth",
-            "rhum": "humidity",
-            "wspd": "wind_speed",
-        }
-    )
-    missing_weather_cols = [
-        col for col in WEATHER_COLS_TO_USE if col not in df_eval_weather_hist.columns
-    ]
-    if missing_weather_cols:
-        print(f"Warning: Weather cols missing: {missing_weather_cols}. Filling with 0.")
-        for col in missing_weather_cols:
-            df_eval_weather_hist[col] = 0.0
-    df_eval_weather_hist = df_eval_weather_hist[WEATHER_COLS_TO_USE]
-    if "snow_depth" in df_eval_weather_hist.columns:
-        df_eval_weather_hist["snow_depth"].fillna(0, inplace=True)
-    df_eval_weather_hist = (
-        df_eval_weather_hist.interpolate(method="time").ffill().bfill()
-    )
+    weather_store = WeatherStore(WEATHER_STORE_DIR, weather_provider(WEATHER_PROVIDER))
+    df_eval_weather_hist = weather_store.read(y_true.index.min(), y_true.index.max())
     if df_eval_weather_hist.isnull().values.any():
-        print("ERROR: NaNs still in fetched eval weather data!")
+        print("ERROR: NaNs still in eval weather data!")
         exit()
     print(f"Processed eval weather data shape: {df_eval_weather_hist.shape}")
 except Exception as e:
-    print(f"Error fetching/processing eval weather data: {e}")
+    print(f"Error reading/backfilling eval weather data: {e}")
     traceback.print_exc()
     exit()
 print("\nCombining Time and Weather features for evaluation...")
@@ -272,40 +173,47 @@ if not y_true.index.equals(df_pred.index) or not y_true.columns.equals(df_pred.c
         print("ERROR: Reindex failed.")
         exit()
 try:
-    mae_overall = mean_absolute_error(y_true, df_pred)
-    rmse_overall = np.sqrt(mean_squared_error(y_true, df_pred))
-    mask = y_true > 0
-    mape_overall = np.mean(np.abs((y_true[mask] - df_pred[mask]) / y_true[mask])) * 100
+    statistics = ErrorStatistics(
+        y_true.values,
+        df_pred.values,
+        y_true.index.tz_convert(LOCAL_TZ_NAME).hour,
+        y_true.columns,
+    )
+    overall = statistics.overall()
     print("\n--- Overall Metrics (Jan 2025 - Using 2-Year Model) ---")
-    print(f"Mean Absolute Error (MAE):  {mae_overall:.4f}")
-    print(f"Root Mean Squared Error (RMSE): {rmse_overall:.4f}")
-    print(f"Mean Absolute Percentage Error (MAPE): {mape_overall:.2f}% (Actual > 0)")
+    print(f"Mean Absolute Error (MAE):  {overall['MAE']:.4f}")
+    print(f"Root Mean Squared Error (RMSE): {overall['RMSE']:.4f}")
+    print(
+        f"Mean Absolute Percentage Error (MAPE): {overall['MAPE (%)']:.2f}% (Actual > 0)"
+    )
+    print(f"Bias (mean prediction - actual): {overall['Bias']:.4f}")
     print("\n--- Per-Zone Metrics (Examples - Using 2-Year Model) ---")
     zone_total_demand = y_true.sum().sort_values(ascending=False)
     top_n = 5
     print(f"Metrics for Top {top_n} Zones by Actual Demand:")
+    per_zone = statistics.per_zone()
     for zone_id in zone_total_demand.head(top_n).index:
-        mae_zone = mean_absolute_error(y_true[zone_id], df_pred[zone_id])
-        rmse_zone = np.sqrt(mean_squared_error(y_true[zone_id], df_pred[zone_id]))
-        mask_zone = y_true[zone_id] > 0
-        mape_zone = (
-            np.mean(
-                np.abs(
-                    (y_true[zone_id][mask_zone] - df_pred[zone_id][mask_zone])
-                    / y_true[zone_id][mask_zone]
-                )
-            )
-            * 100
-            if mask_zone.any()
-            else np.nan
-        )
+        row = per_zone.loc[zone_id]
+        mape_text = "N/A" if np.isnan(row["MAPE (%)"]) else f"{row['MAPE (%)']:.1f}%"
         print(
-            f"  Zone {zone_id}: MAE={mae_zone:.2f}, RMSE={rmse_zone:.2f}, MAPE={mape_zone:.1f}%"
-            if not np.isnan(mape_zone)
-            else f"  Zone {zone_id}: MAE={mae_zone:.2f}, RMSE={rmse_zone:.2f}, MAPE=N/A"
+            f"  Zone {zone_id}: MAE={row['MAE']:.2f}, RMSE={row['RMSE']:.2f}, "
+            f"MAPE={mape_text}, Bias={row['Bias']:.2f}"
         )
+    worst_zones = statistics.worst_zones(WORST_ZONES_EXCLUDED)
+    variants = {
+        "": [],
+        "_full": [],
+        "_excluding_" + "_".join(str(z) for z in EXCLUDED_ZONE_IDS): EXCLUDED_ZONE_IDS,
+        f"_excluding_worst{WORST_ZONES_EXCLUDED}MAE": worst_zones,
+    }
+    summary = write_reports(statistics, SCRIPT_DIR, variants)
+    print(f"\nWorst {WORST_ZONES_EXCLUDED} zones by MAE: {worst_zones}")
+    print("Overall metrics per report variant:")
+    print(summary.to_string(float_format=lambda v: f"{v:.4f}"))
+    print(f"Per-zone and per-hour reports saved to {SCRIPT_DIR}")
 except Exception as e:
     print(f"\nError calculating metrics: {e}")
     traceback.print_exc()
 
+print(f"Peak RSS: {peak_rss_mb():.0f} MB (compact dtypes: {COMPACT_DTYPES})")
 print("\n--- Evaluation Complete ---")
@@ -44,6 +44,35 @@ function findClosestZoneID(latitude, longitude) {
     return closestZoneId;
 }
 
+/**
+ * Asks the API which taxi zone polygon contains the given lat/lon.
+ * Falls back to the closest zone center if the API cannot be reached.
+ * @param {number} latitude Latitude of the target point.
+ * @param {number} longitude Longitude of the target point.
+ * @returns {Promise<number|null>} The zone ID, or null if the point is in no zone.
+ */
+async function lookupZoneID(latitude, longitude) {
+    try {
+        const response = await fetch(
+            `${API_BASE_URL}/get_zone?lat=${latitude}&lon=${longitude}`
+        );
+        if (response.status === 404) {
+            return null;
+        }
+        if (!response.ok) {
+            throw new Error(`API Error (${response.status})`);
+        }
+        const data = await response.json();
+        return data.locationID ?? null;
+    } catch (error) {
+        console.warn(
+            "Zone lookup via API failed, using closest zone center:",
+            error
+        );
+        return findClosestZoneID(latitude, longitude);
+    }
+}
+
 /**
  * Loads the taxi zone GeoJSON, adds it to the map, and calculates zone centers.
  * @param {Cesium.Viewer} viewer The Cesium Viewer instance.
@@ -433,7 +462,7 @@ $(document).ready(function () {
                     viewModel: {
                         scene: cesiumViewer.scene,
                     },
-                    destinationFound: function (viewModel, destination) {
+                    destinationFound: async function (viewModel, destination) {
                         console.log("✅ Geocode completed!");
                         let centerLon, centerLat;
 
@@ -463,7 +492,7 @@ $(document).ready(function () {
                             centerLon = Cesium.Math.toDegrees(
                                 targetCartographic.longitude
                             );
-                            let locationID = findClosestZoneID(
+                            let locationID = await lookupZoneID(
                                 centerLat,
                                 centerLon
                             );
@@ -481,13 +510,13 @@ $(document).ready(function () {
                                 document.getElementById("locationpicker");
                             if (locationID !== null) {
                                 console.log(
-                                    `📍 Mapped to PULocationID: ${locationID} (Closest Zone Center)`
+                                    `📍 Mapped to PULocationID: ${locationID}`
                                 );
                                 if (locationPickerInput)
                                     locationPickerInput.value = locationID;
                             } else {
                                 console.log(
-                                    "Could not map geocoded point to a known taxi zone center."
+                                    "Could not map geocoded point to a known taxi zone."
                                 );
                                 if (locationPickerInput)
                                     locationPickerInput.value = "";
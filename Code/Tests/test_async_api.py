@@ -0,0 +1,159 @@
+import os
+import sys
+import asyncio
+import threading
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Backend")
+BENCHMARKS_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Benchmarks")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+import synthetic_tlc
+from load_data import read_zone_lookup, scale_features, write_outputs
+from model_bundle import MODEL_FILE_NAME
+from pipeline_benchmark import forecast_blocks
+from time_features import time_features_frame
+from train_ml import fit_model
+from trip_ingest import count_trips
+
+NUM_ZONES = 6
+CONCURRENT_REQUESTS = 8
+
+
+@pytest.fixture(scope="module")
+def served(tmp_path_factory):
+    """async_api serving a small model trained on a synthetic_tlc month, with the
+    synthetic weather as its forecast."""
+    work_dir = tmp_path_factory.mktemp("async_api")
+    file_specs = synthetic_tlc.write_trip_months(
+        str(work_dir), "2024-01", 1, NUM_ZONES, 100, seed=4
+    )
+    hours = pd.date_range("2024-01-01", "2024-02-01", freq="h", inclusive="left")
+    weather_path = str(work_dir / "weather.csv")
+    df_weather = synthetic_tlc.write_weather_csv(weather_path, hours[0], len(hours), 4)
+    zone_lookup_path = str(work_dir / "taxi_zone_lookup.csv")
+    synthetic_tlc.write_zone_lookup(zone_lookup_path, NUM_ZONES)
+    hours = hours.tz_localize("UTC")
+    df_weather.index = hours
+    zone_ids = list(range(1, NUM_ZONES + 1))
+    df_target = pd.DataFrame(
+        count_trips(file_specs, hours[0], len(hours), zone_ids),
+        index=hours,
+        columns=zone_ids,
+    )
+    scaler, df_scaled = scale_features(time_features_frame(hours).join(df_weather))
+    model_dir = str(work_dir / "models_ml")
+    os.makedirs(model_dir)
+    write_outputs(
+        df_target,
+        df_scaled,
+        scaler,
+        read_zone_lookup(zone_lookup_path),
+        str(work_dir),
+        model_dir,
+    )
+    model = fit_model("multioutput", df_scaled, df_target, n_estimators=20)
+    joblib.dump(model, os.path.join(model_dir, MODEL_FILE_NAME))
+    with pytest.MonkeyPatch.context() as env:
+        env.setenv("MODEL_DIR", model_dir)
+        env.setenv("SERVING_MODE", "async")
+        env.setenv("ZONES_GEOJSON_PATH", str(work_dir / "missing.geojson"))
+        import async_api
+    async_api.API.FORECAST_CACHE.fetch = lambda: forecast_blocks(df_weather)
+    return async_api
+
+
+def test_concurrent_identical_requests_share_one_computation(served, monkeypatch):
+    API = served.API
+    direct_predict = API.predict_demand_matrix
+    release = threading.Event()
+
+    def held_predict(*args, **kwargs):
+        release.wait(5)
+        return direct_predict(*args, **kwargs)
+
+    # Scoring is held until every request joined the flight, so the coalescing
+    # does not depend on how fast the model answers.
+    monkeypatch.setattr(API, "predict_demand_matrix", held_predict)
+    params = {"date": "2024-01-15", "time": "08:00"}
+
+    async def scenario():
+        async with TestClient(TestServer(served.create_app())) as client:
+            before = served.SCORING.metrics()
+            requests = [
+                asyncio.ensure_future(client.get("/predict", params=params))
+                for _ in range(CONCURRENT_REQUESTS)
+            ]
+            for _ in range(500):
+                joined = served.SCORING.coalesced - before["coalesced"]
+                if joined == CONCURRENT_REQUESTS - 1:
+                    break
+                await asyncio.sleep(0.01)
+            release.set()
+            responses = await asyncio.gather(*requests)
+            bodies = [await response.json() for response in responses]
+            return before, served.SCORING.metrics(), responses, bodies
+
+    before, after, responses, bodies = asyncio.run(scenario())
+    assert [r.status for r in responses] == [200] * CONCURRENT_REQUESTS
+    assert {r.headers["X-Prediction-Cache"] for r in responses} == {"miss"}
+    assert after["computations"] - before["computations"] == 1
+    assert after["coalesced"] - before["coalesced"] == CONCURRENT_REQUESTS - 1
+    assert after["inflight"] == 0
+
+    state = API.MODEL_REGISTRY.state
+    target_dt_utc = API.localize_to_utc([pd.Timestamp("2024-01-15 08:00")])
+    snapshot = API.FORECAST_CACHE.get_snapshot(wait=False)
+    expected = direct_predict(state, target_dt_utc, snapshot)
+    assert expected.sum() > 0
+    for body in bodies:
+        assert body == API.zone_predictions(state, expected[0])
+
+
+def test_zone_filters_match_the_full_response(served):
+    state = served.API.MODEL_REGISTRY.state
+    borough, borough_positions = sorted(state.borough_positions.items())[0]
+    in_borough = [str(state.zone_order[p]) for p in borough_positions]
+    outside = [str(z) for z in state.zone_order if str(z) not in in_borough]
+    params = {"date": "2024-01-20", "time": "18:00"}
+    queries = [
+        ("/predict", params),
+        ("/predict", {**params, "locationID": "5,2"}),
+        ("/predict", {**params, "borough": borough}),
+        ("/predict", {**params, "locationID": f"{outside[0]},{in_borough[0]}"}),
+        (
+            "/predict",
+            {
+                **params,
+                "locationID": f"{outside[0]},{in_borough[0]}",
+                "borough": borough,
+            },
+        ),
+        ("/predict", {**params, "locationID": outside[0], "borough": borough}),
+        ("/predict_demand", {**params, "locationID": "4"}),
+    ]
+
+    async def scenario():
+        async with TestClient(TestServer(served.create_app())) as client:
+            results = []
+            for path, query in queries:
+                response = await client.get(path, params=query)
+                results.append((response.status, await response.json()))
+            return results
+
+    results = asyncio.run(scenario())
+    statuses = [status for status, _ in results]
+    assert statuses == [200, 200, 200, 200, 200, 400, 200]
+    full, by_id, by_borough, mixed, both, _, demand = [body for _, body in results]
+    assert len(full) == NUM_ZONES
+    assert by_id == {"5": full["5"], "2": full["2"]}
+    assert by_borough == {zone_id: full[zone_id] for zone_id in in_borough}
+    assert list(mixed) == [outside[0], in_borough[0]]
+    assert mixed == {z: full[z] for z in mixed}
+    assert both == {in_borough[0]: full[in_borough[0]]}
+    assert demand["num_rides"] == full["4"]
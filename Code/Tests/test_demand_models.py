@@ -0,0 +1,58 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+import pytest
+from sklearn.multioutput import MultiOutputRegressor
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Backend")
+BENCHMARKS_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Benchmarks")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+import synthetic_tlc
+from demand_models import GlobalZoneRegressor, predict_zones
+from time_features import time_features_frame
+from trip_ingest import count_trips
+from zone_training import train_zone_boosters
+
+NUM_ZONES = 6
+PARAMS = {"n_estimators": 20, "num_leaves": 15, "verbose": -1}
+OUTPUTS = [4, 0, 2]
+
+
+@pytest.fixture(scope="module")
+def synthetic_demand(tmp_path_factory):
+    work_dir = str(tmp_path_factory.mktemp("demand_models"))
+    file_specs = synthetic_tlc.write_trip_months(work_dir, "2024-06", 1, NUM_ZONES, 80)
+    hours = pd.date_range("2024-06-01", "2024-07-01", freq="h", inclusive="left")
+    hours = hours.tz_localize("UTC")
+    zone_ids = list(range(1, NUM_ZONES + 1))
+    counts = count_trips(file_specs, hours[0], len(hours), zone_ids)
+    return time_features_frame(hours), pd.DataFrame(counts, columns=zone_ids)
+
+
+def multioutput_model(X, y):
+    return MultiOutputRegressor(lgb.LGBMRegressor(**PARAMS)).fit(X, y)
+
+
+def global_model(X, y):
+    return GlobalZoneRegressor(PARAMS, y.columns).fit(X, y)
+
+
+def zone_ensemble(X, y):
+    strategies = {zone_id: "lightgbm" for zone_id in y.columns}
+    strategies.update({3: "seasonal_mean", 5: "constant"})
+    return train_zone_boosters(X, y, PARAMS, strategies=strategies)
+
+
+@pytest.mark.parametrize("fit", [multioutput_model, global_model, zone_ensemble])
+def test_zone_subset_matches_full_prediction(synthetic_demand, fit):
+    X, y = synthetic_demand
+    model = fit(X, y)
+    X_test = X.to_numpy(dtype=np.float64)[::5]
+    full = predict_zones(model, X_test)
+    assert full.shape == (len(X_test), NUM_ZONES)
+    np.testing.assert_allclose(predict_zones(model, X_test, OUTPUTS), full[:, OUTPUTS])
+    np.testing.assert_allclose(predict_zones(model, X_test, [3]), full[:, [3]])
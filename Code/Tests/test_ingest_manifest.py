@@ -0,0 +1,67 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Backend")
+sys.path.insert(0, BACKEND_DIR)
+from ingest_manifest import build_counts_incremental, load_manifest
+from trip_ingest import count_trips
+
+ZONE_IDS = [1, 2, 3]
+
+
+def write_trips(path):
+    rng = np.random.default_rng(0)
+    pickups = pd.Timestamp("2024-01-01") + pd.to_timedelta(
+        rng.integers(0, 60 * 24 * 3600, 5000), unit="s"
+    )
+    pd.DataFrame(
+        {
+            "pickup_datetime": pickups,
+            "PULocationID": rng.choice(ZONE_IDS, 5000).astype(np.int64),
+        }
+    ).to_parquet(path)
+
+
+def test_widened_window_rebuilds_partitions(tmp_path):
+    trip_path = str(tmp_path / "fhvhv_tripdata_2024-01.parquet")
+    write_trips(trip_path)
+    file_specs = [(trip_path, "2024")]
+    output_dir = str(tmp_path / "processed")
+    first_hour = pd.Timestamp("2024-01-01", tz="UTC")
+    january = build_counts_incremental(
+        output_dir, file_specs, first_hour, 31 * 24, ZONE_IDS
+    )
+    assert january.sum() > 0
+    assert load_manifest(output_dir)["num_hours"] == 31 * 24
+
+    counts = build_counts_incremental(
+        output_dir, file_specs, first_hour, 60 * 24, ZONE_IDS
+    )
+    expected = count_trips(file_specs, first_hour, 60 * 24, ZONE_IDS)
+    assert counts[31 * 24 :].sum() > 0
+    np.testing.assert_array_equal(counts, expected)
+    assert load_manifest(output_dir)["num_hours"] == 60 * 24
+
+
+def test_shifted_window_rebuilds_partitions(tmp_path):
+    trip_path = str(tmp_path / "fhvhv_tripdata_2024-01.parquet")
+    write_trips(trip_path)
+    file_specs = [(trip_path, "2024")]
+    output_dir = str(tmp_path / "processed")
+    build_counts_incremental(
+        output_dir,
+        file_specs,
+        pd.Timestamp("2024-01-01", tz="UTC"),
+        31 * 24,
+        ZONE_IDS,
+    )
+    first_hour = pd.Timestamp("2024-02-01", tz="UTC")
+    counts = build_counts_incremental(
+        output_dir, file_specs, first_hour, 29 * 24, ZONE_IDS
+    )
+    expected = count_trips(file_specs, first_hour, 29 * 24, ZONE_IDS)
+    assert counts.sum() > 0
+    np.testing.assert_array_equal(counts, expected)
@@ -0,0 +1,58 @@
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Backend")
+sys.path.insert(0, BACKEND_DIR)
+from micro_batcher import MicroBatcher
+
+
+def test_cancelled_future_does_not_stop_the_worker():
+    batches = []
+
+    def score(key, payloads):
+        batches.append(list(payloads))
+        return [payload * 10 for payload in payloads]
+
+    batcher = MicroBatcher(score, max_batch_size=8, max_wait_seconds=0.05)
+    first = batcher.submit("k", 1)
+    cancelled = batcher.submit("k", 2)
+    last = batcher.submit("k", 3)
+    assert cancelled.cancel()
+    batcher.start()
+    assert first.result(timeout=5) == 10
+    assert last.result(timeout=5) == 30
+    assert batches[0] == [1, 3]
+    assert batcher.submit("k", 4).result(timeout=5) == 40
+    assert batcher.metrics()["cancelled"] == 1
+
+
+def test_score_errors_reach_every_caller():
+    def score(key, payloads):
+        raise RuntimeError("model unavailable")
+
+    batcher = MicroBatcher(score, max_wait_seconds=0.01).start()
+    future = batcher.submit("k", 1)
+    try:
+        future.result(timeout=5)
+    except RuntimeError as e:
+        assert str(e) == "model unavailable"
+    else:
+        raise AssertionError("expected the scoring error")
+
+
+def test_timed_out_request_is_abandoned():
+    batcher = MicroBatcher(lambda key, payloads: payloads, max_wait_seconds=0.01)
+    future = batcher.submit("k", 1)
+    try:
+        batcher.result(future, timeout=0.01)
+    except TimeoutError:
+        pass
+    else:
+        raise AssertionError("expected a timeout from the stopped batcher")
+    assert future.cancelled()
+    batcher.start()
+    assert batcher.result(batcher.submit("k", 2), timeout=5) == 2
+    metrics = batcher.metrics()
+    assert metrics["timeouts"] == 1
+    assert metrics["cancelled"] == 1
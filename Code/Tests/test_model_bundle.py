@@ -0,0 +1,183 @@
+import os
+import sys
+import tracemalloc
+import joblib
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+from sklearn.multioutput import MultiOutputRegressor
+from sklearn.preprocessing import MinMaxScaler
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Backend")
+sys.path.insert(0, BACKEND_DIR)
+from model_bundle import (
+    FEATURE_NAMES_FILE_NAME,
+    MODEL_FILE_NAME,
+    SCALER_FILE_NAME,
+    ZONE_ORDER_FILE_NAME,
+    ModelBundle,
+    PickledModel,
+    load_serving_model,
+    set_current_bundle,
+    versioned_bundle_path,
+    write_bundle,
+)
+from model_registry import ModelRegistry, ModelState
+import tree_engine
+from demand_models import predict_zones
+from tree_engine import CompiledForest, booster_model_strings, source_fingerprint
+from zone_training import train_zone_boosters
+
+ZONE_ORDER = [4, 7, 9]
+FEATURE_NAMES = ["hour", "day_of_week", "temperature"]
+
+
+def train_model(model_dir, seed):
+    rng = np.random.default_rng(seed)
+    X = rng.random((200, len(FEATURE_NAMES)))
+    y = X @ rng.random((len(FEATURE_NAMES), len(ZONE_ORDER))) * 10
+    model = MultiOutputRegressor(
+        lgb.LGBMRegressor(n_estimators=5, num_leaves=4, verbose=-1)
+    ).fit(X, y)
+    model_path = os.path.join(model_dir, MODEL_FILE_NAME)
+    joblib.dump(model, model_path)
+    # Keep the fingerprint distinct even on coarse filesystem timestamps.
+    os.utime(model_path, ns=(seed * 10**9, seed * 10**9))
+    joblib.dump(MinMaxScaler().fit(X), os.path.join(model_dir, SCALER_FILE_NAME))
+    joblib.dump(ZONE_ORDER, os.path.join(model_dir, ZONE_ORDER_FILE_NAME))
+    joblib.dump(FEATURE_NAMES, os.path.join(model_dir, FEATURE_NAMES_FILE_NAME))
+    return model
+
+
+def compile_bundle(model_dir, model, version):
+    forest = CompiledForest.from_model(model)
+    forest.source = source_fingerprint(os.path.join(model_dir, MODEL_FILE_NAME))
+    scaler = joblib.load(os.path.join(model_dir, SCALER_FILE_NAME))
+    write_bundle(
+        versioned_bundle_path(model_dir, version),
+        forest,
+        ZONE_ORDER,
+        FEATURE_NAMES,
+        scaler.min_,
+        scaler.scale_,
+        version=version,
+        model_strings=booster_model_strings(model),
+    )
+    set_current_bundle(model_dir, version)
+
+
+def test_current_bundle_served_while_model_unchanged(tmp_path):
+    model_dir = str(tmp_path)
+    compile_bundle(model_dir, train_model(model_dir, 1), "v1")
+    model = load_serving_model(model_dir)
+    assert isinstance(model, ModelBundle)
+    assert model.version == "v1"
+    assert model.source_mismatch is None
+
+
+def test_retrained_model_replaces_stale_bundle(tmp_path):
+    model_dir = str(tmp_path)
+    compile_bundle(model_dir, train_model(model_dir, 1), "v1")
+    registry = ModelRegistry(
+        lambda version: ModelState(load_serving_model(model_dir, version=version), {}),
+        lambda state: None,
+        lambda: None,
+        poll_seconds=0,
+    )
+    registry.load_initial()
+    train_model(model_dir, 2)
+    model = load_serving_model(model_dir)
+    assert isinstance(model, PickledModel)
+    assert model.source_mismatch["bundle_version"] == "v1"
+    assert model.source_mismatch["model_source"] == source_fingerprint(model.path)
+    assert registry.reload()
+    assert registry.state.version == model.version
+    assert registry.status()["source_mismatch"]["bundle_version"] == "v1"
+
+
+def test_pointer_set_after_training_keeps_older_bundle(tmp_path):
+    model_dir = str(tmp_path)
+    compile_bundle(model_dir, train_model(model_dir, 1), "v1")
+    compile_bundle(model_dir, train_model(model_dir, 2), "v2")
+    set_current_bundle(model_dir, "v1")
+    model = load_serving_model(model_dir)
+    assert isinstance(model, ModelBundle)
+    assert model.version == "v1"
+    assert model.source_mismatch["bundle_version"] == "v1"
+    requested = load_serving_model(model_dir, version="v1")
+    assert isinstance(requested, ModelBundle)
+
+
+def test_bundle_matches_joblib_on_both_paths(tmp_path):
+    model_dir = str(tmp_path)
+    model = train_model(model_dir, 1)
+    compile_bundle(model_dir, model, "v1")
+    bundle = load_serving_model(model_dir, "bundle", compiled_max_rows=24)
+    pickled = load_serving_model(model_dir, "joblib", compiled_max_rows=0)
+    X = np.random.default_rng(5).random((144, len(FEATURE_NAMES)))
+    for rows in (1, 24, 144):
+        np.testing.assert_allclose(
+            bundle.predict(X[:rows]), pickled.predict(X[:rows]), atol=1e-9
+        )
+    assert bundle._boosters is not None
+    np.testing.assert_allclose(
+        bundle.predict(X, [2, 0]), predict_zones(model, X, [2, 0]), atol=1e-9
+    )
+
+
+def test_bundle_boosters_keep_baseline_zones(tmp_path):
+    rng = np.random.default_rng(3)
+    hours = pd.date_range("2024-01-01", periods=24 * 14, freq="h")
+    X = pd.DataFrame(
+        {
+            "hour": hours.hour,
+            "dayofweek": hours.dayofweek,
+            "temperature": rng.random(len(hours)),
+        }
+    )
+    y = pd.DataFrame(
+        {
+            4: rng.poisson(20 + 10 * X["hour"]),
+            7: rng.poisson(0.1, len(hours)),
+            9: np.zeros(len(hours), dtype=int),
+        }
+    )
+    model = train_zone_boosters(
+        X, y, {"n_estimators": 20, "num_leaves": 4, "verbose": -1}, sparse_threshold=0.5
+    )
+    model_dir = str(tmp_path)
+    joblib.dump(model, os.path.join(model_dir, MODEL_FILE_NAME))
+    joblib.dump(MinMaxScaler().fit(X), os.path.join(model_dir, SCALER_FILE_NAME))
+    joblib.dump(ZONE_ORDER, os.path.join(model_dir, ZONE_ORDER_FILE_NAME))
+    joblib.dump(list(X.columns), os.path.join(model_dir, FEATURE_NAMES_FILE_NAME))
+    compile_bundle(model_dir, model, "v1")
+    bundle = load_serving_model(model_dir, "bundle", compiled_max_rows=1)
+    expected = predict_zones(model, X.to_numpy())
+    np.testing.assert_allclose(bundle.predict(X.to_numpy()), expected, atol=1e-9)
+    np.testing.assert_allclose(bundle.predict(X.to_numpy()[:1]), expected[:1])
+
+
+def test_forest_scores_large_batches_in_bounded_chunks(monkeypatch):
+    rng = np.random.default_rng(7)
+    X = rng.random((2000, len(FEATURE_NAMES)))
+    y = X @ rng.random((len(FEATURE_NAMES), len(ZONE_ORDER))) * 10
+    model = MultiOutputRegressor(
+        lgb.LGBMRegressor(n_estimators=200, num_leaves=8, verbose=-1)
+    ).fit(X, y)
+    forest = CompiledForest.from_model(model)
+
+    def traced_predict():
+        tracemalloc.start()
+        predictions = forest.predict(X)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return predictions, peak
+
+    monkeypatch.setattr(tree_engine, "PREDICT_CHUNK_PAIRS", 1 << 30)
+    whole, whole_peak = traced_predict()
+    monkeypatch.setattr(tree_engine, "PREDICT_CHUNK_PAIRS", 1 << 15)
+    chunked, chunked_peak = traced_predict()
+    np.testing.assert_array_equal(chunked, whole)
+    np.testing.assert_allclose(chunked, predict_zones(model, X), atol=1e-9)
+    assert chunked_peak < whole_peak / 4
@@ -0,0 +1,74 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Backend")
+sys.path.insert(0, BACKEND_DIR)
+from prediction_grid import GridMaterializer
+
+FIRST_HOUR = pd.Timestamp("2024-05-01 00:00", tz="UTC")
+NUM_ZONES = 4
+
+
+class ScoredModel:
+    """Deterministic hours x zones predictions that differ per model version."""
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self, hours_utc, key):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        hour_of_day = np.asarray(hours_utc.hour)[:, None]
+        return hour_of_day * 10 + np.arange(NUM_ZONES)[None, :] + 1000 * key
+
+
+def make_grid(model, keys):
+    return GridMaterializer(
+        lambda: keys[-1],
+        lambda key: pd.date_range(FIRST_HOUR, periods=48, freq="h"),
+        model,
+        poll_seconds=0,
+    )
+
+
+def test_lookup_matches_direct_scoring():
+    model, keys = ScoredModel(), [1]
+    grid = make_grid(model, keys)
+    assert grid.lookup(pd.DatetimeIndex([FIRST_HOUR]), 1) is None
+    assert grid.rebuild()
+    assert not grid.rebuild()
+    hours = FIRST_HOUR + pd.to_timedelta([30, 2, 2, 47], unit="h")
+    np.testing.assert_array_equal(grid.lookup(hours, 1), model(hours, 1))
+    naive = hours.tz_localize(None)
+    np.testing.assert_array_equal(grid.lookup(naive, 1), model(hours, 1))
+    assert grid.lookup(hours, 2) is None
+    for offsets in ([47, 48], [-1], [0.5]):
+        assert grid.lookup(FIRST_HOUR + pd.to_timedelta(offsets, unit="h"), 1) is None
+    metrics = grid.metrics()
+    assert (metrics["hits"], metrics["misses"]) == (2, 5)
+    assert metrics["grid_hours"] == 48
+    assert metrics["grid_first_hour_utc"] == FIRST_HOUR.isoformat()
+
+
+def test_new_key_rebuilds_and_failures_keep_grid():
+    model, keys = ScoredModel(), [1]
+    grid = make_grid(model, keys)
+    assert grid.rebuild()
+    keys.append(2)
+    model.fail = True
+    assert not grid.rebuild()
+    assert grid.metrics()["last_error"] == "model unavailable"
+    hours = pd.DatetimeIndex([FIRST_HOUR])
+    np.testing.assert_array_equal(grid.lookup(hours, 1), ScoredModel()(hours, 1))
+    assert grid.lookup(hours, 2) is None
+    model.fail = False
+    assert grid.rebuild()
+    np.testing.assert_array_equal(grid.lookup(hours, 2), model(hours, 2))
+    assert grid.lookup(hours, 1) is None
+    assert grid.metrics()["rebuilds"] == 2
+    assert grid.metrics()["last_error"] is None
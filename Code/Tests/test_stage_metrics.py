@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Backend")
+sys.path.insert(0, BACKEND_DIR)
+from stage_metrics import RunReport
+
+
+def inner_work():
+    return sum(i * i for i in range(200_000))
+
+
+def test_nested_profiled_stages(tmp_path):
+    report_path = str(tmp_path / "run_report.json")
+    run_report = RunReport(
+        "nested",
+        report_path,
+        profile_stages=["all"],
+        profilers=["cprofile", "tracemalloc"],
+    )
+    with run_report.stage("ingest"):
+        with run_report.stage("pivot") as stage:
+            inner_work()
+            stage["rows"] = 1
+    with run_report.stage("scaling"):
+        inner_work()
+    run_report.save()
+
+    with open(report_path) as f:
+        stages = {record["name"]: record for record in json.load(f)["stages"]}
+    pivot, ingest, scaling = stages["pivot"], stages["ingest"], stages["scaling"]
+    assert pivot["parent"] == "ingest"
+    assert pivot["profiled_in"] == "ingest"
+    assert "cprofile" not in pivot and "tracemalloc" not in pivot
+    assert "profiled_in" not in ingest
+    functions = [entry["function"] for entry in ingest["cprofile"]["top_cumulative"]]
+    assert any("inner_work" in function for function in functions)
+    assert os.path.exists(ingest["cprofile"]["profile_path"])
+    assert ingest["tracemalloc"]["peak_mb"] >= 0
+    assert "cprofile" in scaling and "tracemalloc" in scaling
+
+
+def test_failed_nested_stage_releases_profiler(tmp_path):
+    run_report = RunReport(
+        "failing",
+        str(tmp_path / "run_report.json"),
+        profile_stages=["all"],
+        profilers=["cprofile"],
+    )
+    try:
+        with run_report.stage("outer"):
+            with run_report.stage("inner"):
+                raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    with run_report.stage("next"):
+        inner_work()
+    stages = {record["name"]: record for record in run_report.report["stages"]}
+    assert stages["inner"]["status"] == "failed"
+    assert stages["outer"]["status"] == "failed"
+    assert "cprofile" in stages["next"]
@@ -0,0 +1,59 @@
+import os
+import sys
+import holidays
+import numpy as np
+import pandas as pd
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Backend")
+sys.path.insert(0, BACKEND_DIR)
+from time_features import TIME_FEATURE_NAMES, time_features_frame
+
+SECONDS_IN_DAY = 24 * 60 * 60
+SECONDS_IN_YEAR = 365.2425 * SECONDS_IN_DAY
+
+
+def accessor_features(index):
+    """The pandas accessor and holidays.US map features the engine replaced."""
+    df_features = pd.DataFrame(index=index)
+    df_features["year"] = index.year
+    df_features["hour"] = index.hour
+    df_features["dayofweek"] = index.dayofweek
+    df_features["dayofmonth"] = index.day
+    df_features["month"] = index.month
+    df_features["quarter"] = index.quarter
+    df_features["dayofyear"] = index.dayofyear
+    df_features["weekofyear"] = index.isocalendar().week.astype(int)
+    df_features["is_weekend"] = df_features["dayofweek"].isin([5, 6]).astype(int)
+    us_holidays = holidays.US(years=index.year.unique())
+    df_features["is_holiday"] = [1 if d in us_holidays else 0 for d in index.date]
+    timestamps_sec = index.as_unit("ns").asi8 // 10**9
+    df_features["hour_sin"] = np.sin(timestamps_sec * (2 * np.pi / SECONDS_IN_DAY))
+    df_features["hour_cos"] = np.cos(timestamps_sec * (2 * np.pi / SECONDS_IN_DAY))
+    df_features["month_sin"] = np.sin(timestamps_sec * (2 * np.pi / SECONDS_IN_YEAR))
+    df_features["month_cos"] = np.cos(timestamps_sec * (2 * np.pi / SECONDS_IN_YEAR))
+    return df_features
+
+
+def test_time_features_match_pandas_accessors():
+    # Spans leap years and ISO years with 53 weeks (2020, 2026).
+    index = pd.date_range("2019-12-20", "2027-01-10", freq="h", tz="UTC")
+    features = time_features_frame(index)
+    expected = accessor_features(index)
+    assert list(features.columns) == TIME_FEATURE_NAMES
+    for column in TIME_FEATURE_NAMES:
+        np.testing.assert_allclose(
+            features[column].to_numpy(),
+            expected[column].to_numpy(),
+            atol=1e-9,
+            err_msg=column,
+        )
+    assert features["is_holiday"].sum() > 0
+
+
+def test_time_features_column_subset_and_naive_index():
+    index = pd.date_range("2024-07-03 22:00", periods=6, freq="h")
+    features = time_features_frame(index, ["weather", "hour", "is_holiday"])
+    assert list(features.columns) == ["hour", "is_holiday"]
+    assert features["hour"].tolist() == [22, 23, 0, 1, 2, 3]
+    assert features["is_holiday"].tolist() == [0, 0, 1, 1, 1, 1]
@@ -0,0 +1,101 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+import pytest
+from sklearn.multioutput import MultiOutputRegressor
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Backend")
+BENCHMARKS_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Benchmarks")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+import synthetic_tlc
+from time_features import time_features_frame
+from tree_engine import CompiledForest
+from trip_ingest import count_trips
+
+NUM_ZONES = 5
+
+
+def synthetic_features_and_demand(tmp_path):
+    """A synthetic_tlc month: time features plus weather (with gaps) and counts."""
+    file_specs = synthetic_tlc.write_trip_months(
+        str(tmp_path), "2024-01", 1, NUM_ZONES, 150, seed=3
+    )
+    hours = pd.date_range("2024-01-01", "2024-02-01", freq="h", inclusive="left")
+    weather_path = str(tmp_path / "weather.csv")
+    synthetic_tlc.write_weather_csv(weather_path, hours[0], len(hours), seed=3)
+    weather = pd.read_csv(weather_path, index_col=0, parse_dates=True)
+    X = time_features_frame(hours).join(weather).to_numpy(dtype=np.float64)
+    # Missing readings exercise the NaN and zero default directions.
+    X[np.random.default_rng(3).random(X.shape) < 0.05] = np.nan
+    hours = hours.tz_localize("UTC")
+    y = count_trips(file_specs, hours[0], len(hours), list(range(1, NUM_ZONES + 1)))
+    return X, y
+
+
+def booster_predictions(model, X):
+    return np.column_stack(
+        [
+            est.booster_.predict(X, num_iteration=est.best_iteration_ or None)
+            for est in model.estimators_
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"objective": "regression_l1"},
+        {"objective": "poisson"},
+        {"objective": "regression", "zero_as_missing": True},
+    ],
+)
+def test_compiled_forest_matches_booster_predict(tmp_path, params):
+    X, y = synthetic_features_and_demand(tmp_path)
+    model = MultiOutputRegressor(
+        lgb.LGBMRegressor(n_estimators=40, num_leaves=15, verbose=-1, **params)
+    ).fit(X, y)
+    forest = CompiledForest.from_model(model)
+    X_test = X[::7].copy()
+    X_test[:, 0] = 0.0
+    expected = booster_predictions(model, X_test)
+    np.testing.assert_allclose(forest.predict(X_test), expected, rtol=1e-12, atol=1e-9)
+    np.testing.assert_allclose(
+        forest.predict(X_test, [3, 1]), expected[:, [3, 1]], rtol=1e-12, atol=1e-9
+    )
+
+
+def test_compiled_forest_truncates_at_best_iteration(tmp_path):
+    X, y = synthetic_features_and_demand(tmp_path)
+    model = MultiOutputRegressor(lgb.LGBMRegressor())
+    model.estimators_ = [
+        lgb.LGBMRegressor(n_estimators=300, learning_rate=0.3, verbose=-1).fit(
+            X[:-168],
+            y[:-168, zone],
+            eval_set=[(X[-168:], y[-168:, zone])],
+            callbacks=[lgb.early_stopping(5, verbose=False)],
+        )
+        for zone in range(NUM_ZONES)
+    ]
+    assert any(est.best_iteration_ < 300 for est in model.estimators_)
+    np.testing.assert_allclose(
+        CompiledForest.from_model(model).predict(X),
+        booster_predictions(model, X),
+        rtol=1e-12,
+        atol=1e-9,
+    )
+
+
+def test_categorical_splits_are_rejected():
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.integers(0, 8, 500), rng.random(500)])
+    y = (X[:, 0] % 3 == 0) * 10.0 + X[:, 1]
+    model = MultiOutputRegressor(
+        lgb.LGBMRegressor(n_estimators=5, min_data_per_group=5, verbose=-1)
+    )
+    model.fit(X, np.column_stack([y, y]), categorical_feature=[0])
+    with pytest.raises(ValueError, match="numerical"):
+        CompiledForest.from_model(model)
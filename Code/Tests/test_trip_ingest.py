@@ -0,0 +1,47 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Backend")
+BENCHMARKS_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Benchmarks")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+import synthetic_tlc
+from trip_ingest import count_trips
+
+NUM_ZONES = 20
+
+
+def groupby_counts(file_specs, first_hour, num_hours, zone_ids):
+    """The concat/groupby/pivot counts streaming ingest replaced."""
+    trips = pd.concat(pd.read_parquet(path) for path, _ in file_specs)
+    trips = trips[trips["PULocationID"].isin(zone_ids)]
+    hours = pd.date_range(first_hour, periods=num_hours, freq="h")
+    pickup_hour = trips["pickup_datetime"].dt.floor("h").dt.tz_localize("UTC")
+    return (
+        trips.groupby([pickup_hour, trips["PULocationID"]])
+        .size()
+        .unstack(fill_value=0)
+        .reindex(index=hours, columns=zone_ids, fill_value=0)
+        .to_numpy()
+    )
+
+
+def test_count_trips_matches_groupby(tmp_path):
+    file_specs = synthetic_tlc.write_trip_months(
+        str(tmp_path), "2024-02", 2, NUM_ZONES, 200, seed=1, row_group_size=20_000
+    )
+    # A window across the month boundary and a zone subset with gaps, so counts
+    # are clipped in time and trips of unlisted or invalid zones are dropped.
+    first_hour = pd.Timestamp("2024-02-20", tz="UTC")
+    num_hours = 21 * 24
+    zone_ids = [z for z in range(1, NUM_ZONES + 1) if z % 4]
+    expected = groupby_counts(file_specs, first_hour, num_hours, zone_ids)
+    counts = count_trips(file_specs, first_hour, num_hours, zone_ids)
+    assert counts.shape == (num_hours, len(zone_ids))
+    assert expected.sum() > 0
+    np.testing.assert_array_equal(counts, expected)
+    parallel = count_trips(file_specs, first_hour, num_hours, zone_ids, max_workers=2)
+    np.testing.assert_array_equal(parallel, expected)
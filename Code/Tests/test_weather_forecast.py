@@ -0,0 +1,272 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Backend")
+sys.path.insert(0, BACKEND_DIR)
+from weather_forecast import ForecastCache
+
+START = 1_735_689_600
+TTL_SECONDS = 1800
+MAX_STALE_SECONDS = 6 * 3600
+
+
+class FakeClock:
+    def __init__(self, now=START):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeForecast:
+    """Forecast fetch returning a fresh block list per call, or raising after
+    ``fail`` is set."""
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise OSError("upstream unavailable")
+        return [
+            {"dt": START + 3 * 3600 * i, "temp": float(self.calls)} for i in range(8)
+        ]
+
+
+class ForecastHandler(BaseHTTPRequestHandler):
+    """Serves the forecast endpoint according to ``server.mode``: "ok", "empty",
+    "error" (HTTP 503) or "slow" (answers after the client timeout)."""
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        if server.mode == "error":
+            self.send_error(503, "Service Unavailable")
+            return
+        if server.mode == "slow":
+            time.sleep(HTTP_TIMEOUT_SECONDS * 4)
+        blocks = []
+        if server.mode != "empty":
+            blocks = [
+                {"dt": START + 3 * 3600 * i, "temp": float(server.requests)}
+                for i in range(8)
+            ]
+        body = json.dumps({"list": blocks}).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+HTTP_TIMEOUT_SECONDS = 0.25
+
+
+@pytest.fixture
+def forecast_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ForecastHandler)
+    server.daemon_threads = True
+    server.mode = "ok"
+    server.requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_cache(fetch, clock, endpoint="http://forecast.invalid", timeout_seconds=1):
+    return ForecastCache(
+        endpoint,
+        {"appid": "test"},
+        lambda block: {"temperature": block["temp"]},
+        ttl_seconds=TTL_SECONDS,
+        refresh_interval_seconds=3600,
+        max_stale_seconds=MAX_STALE_SECONDS,
+        timeout_seconds=timeout_seconds,
+        fetch=fetch,
+        clock=clock,
+    )
+
+
+def make_http_cache(server, clock):
+    host, port = server.server_address[:2]
+    return make_cache(
+        None, clock, f"http://{host}:{port}/forecast", HTTP_TIMEOUT_SECONDS
+    )
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+def temperature(snapshot):
+    return snapshot.block_features["temperature"].iloc[0]
+
+
+def test_cold_cache_downloads_once_within_ttl():
+    fetch, clock = FakeForecast(), FakeClock()
+    cache = make_cache(fetch, clock)
+    snapshot = cache.get_snapshot()
+    assert temperature(snapshot) == 1
+    clock.now += TTL_SECONDS - 1
+    assert cache.get_snapshot() is snapshot
+    assert fetch.calls == 1
+    assert not cache.status()["stale"]
+
+
+def test_expired_snapshot_refreshes_in_background():
+    fetch, clock = FakeForecast(), FakeClock()
+    cache = make_cache(fetch, clock)
+    first = cache.get_snapshot()
+    clock.now += TTL_SECONDS + 1
+    assert cache.status()["stale"]
+    assert cache.get_snapshot() is first
+    wait_for(lambda: fetch.calls == 2 and cache.get_snapshot() is not first)
+    assert temperature(cache.get_snapshot()) == 2
+    assert not cache.status()["stale"]
+
+
+def test_stale_snapshot_served_while_refresh_fails():
+    fetch, clock = FakeForecast(), FakeClock()
+    cache = make_cache(fetch, clock)
+    first = cache.get_snapshot()
+    fetch.fail = True
+    clock.now += TTL_SECONDS + 1
+    assert cache.get_snapshot() is first
+    wait_for(lambda: fetch.calls == 2 and not cache._refresh_lock.locked())
+    assert cache.get_snapshot() is first
+    assert cache.status()["last_error"] == "upstream unavailable"
+    assert not cache.refresh()
+    assert cache.get_snapshot() is first
+
+
+def test_snapshot_dropped_past_max_stale():
+    fetch, clock = FakeForecast(), FakeClock()
+    cache = make_cache(fetch, clock)
+    first = cache.get_snapshot()
+    fetch.fail = True
+    clock.now += MAX_STALE_SECONDS
+    assert cache.get_snapshot() is first
+    clock.now += 1
+    assert cache.get_snapshot() is None
+    wait_for(lambda: not cache._refresh_lock.locked())
+    fetch.fail = False
+    assert cache.refresh()
+    assert temperature(cache.get_snapshot()) == fetch.calls
+
+
+def test_run_async_refreshes_when_ttl_expires():
+    fetch, clock = FakeForecast(), FakeClock()
+    cache = make_cache(fetch, clock)
+
+    async def scenario():
+        task = asyncio.create_task(cache.run_async(session=None))
+        while not cache._ready.is_set():
+            await asyncio.sleep(0.01)
+        first = cache.get_snapshot(wait=False)
+        assert fetch.calls == 1
+        clock.now += TTL_SECONDS + 1
+        assert cache.get_snapshot(wait=False) is first
+        while fetch.calls < 2:
+            await asyncio.sleep(0.01)
+        assert temperature(cache.get_snapshot(wait=False)) == 2
+        fetch.fail = True
+        clock.now += TTL_SECONDS + 1
+        second = cache.get_snapshot(wait=False)
+        while fetch.calls < 3:
+            await asyncio.sleep(0.01)
+        assert cache.get_snapshot(wait=False) is second
+        assert cache.status()["last_error"] == "upstream unavailable"
+        cache.stop()
+        cache._wake_async()
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(scenario())
+
+
+def test_http_failures_keep_serving_stale_snapshot(forecast_server):
+    clock = FakeClock()
+    cache = make_http_cache(forecast_server, clock)
+    assert cache.refresh()
+    first = cache.get_snapshot()
+    assert temperature(first) == 1
+    for mode, error in (
+        ("error", "503"),
+        ("slow", "timed out"),
+        ("empty", "no blocks"),
+    ):
+        forecast_server.mode = mode
+        assert not cache.refresh()
+        assert error in cache.status()["last_error"]
+        assert cache.get_snapshot() is first
+    clock.now += TTL_SECONDS + 1
+    requests_before = forecast_server.requests
+    assert cache.get_snapshot() is first
+    wait_for(lambda: forecast_server.requests > requests_before)
+    wait_for(lambda: not cache._refresh_lock.locked())
+    assert cache._snapshot is first
+    assert cache.status()["stale"]
+    assert "no blocks" in cache.status()["last_error"]
+    forecast_server.mode = "ok"
+    assert cache.refresh()
+    assert cache.status()["last_error"] is None
+    assert temperature(cache.get_snapshot()) == forecast_server.requests
+
+
+def test_async_http_failures_keep_serving_stale_snapshot(forecast_server):
+    import aiohttp
+
+    clock = FakeClock()
+    cache = make_http_cache(forecast_server, clock)
+
+    async def scenario():
+        async with aiohttp.ClientSession() as session:
+            assert await cache.refresh_async(session)
+            first = cache.get_snapshot(wait=False)
+            assert temperature(first) == 1
+            for mode, error in (
+                ("error", "503"),
+                ("slow", "TimeoutError"),
+                ("empty", "no blocks"),
+            ):
+                forecast_server.mode = mode
+                assert not await cache.refresh_async(session)
+                assert error in cache.status()["last_error"]
+                assert cache.get_snapshot(wait=False) is first
+            clock.now += TTL_SECONDS + 1
+            requests_before = forecast_server.requests
+            assert cache.get_snapshot(wait=False) is first
+            while forecast_server.requests == requests_before:
+                await asyncio.sleep(0.01)
+            while cache._refresh_lock.locked():
+                await asyncio.sleep(0.01)
+            assert cache._snapshot is first
+            assert cache.status()["stale"]
+            forecast_server.mode = "ok"
+            assert await cache.refresh_async(session)
+            assert cache.status()["last_error"] is None
+            assert temperature(cache.get_snapshot(wait=False)) == (
+                forecast_server.requests
+            )
+
+    asyncio.run(scenario())
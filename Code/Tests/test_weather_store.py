@@ -0,0 +1,131 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Backend")
+sys.path.insert(0, BACKEND_DIR)
+from weather_store import WEATHER_COLUMNS, StubProvider, WeatherStore
+
+START = pd.Timestamp("2024-03-01 00:00", tz="UTC")
+END = pd.Timestamp("2024-03-01 23:00", tz="UTC")
+
+
+class FlakyProvider:
+    """Returns ``failed_fetch`` on the first call, then StubProvider data."""
+
+    name = "flaky"
+
+    def __init__(self, failed_fetch):
+        self.failed_fetch = failed_fetch
+        self.stub = StubProvider()
+        self.requests = []
+
+    def fetch(self, start_utc, end_utc):
+        self.requests.append((start_utc, end_utc))
+        if len(self.requests) == 1:
+            return self.failed_fetch(start_utc, end_utc)
+        return self.stub.fetch(start_utc, end_utc)
+
+
+def empty_fetch(start_utc, end_utc):
+    return pd.DataFrame(columns=WEATHER_COLUMNS, dtype=np.float64)
+
+
+def all_nan_fetch(start_utc, end_utc):
+    hours = pd.date_range(start_utc, end_utc, freq="h")
+    return pd.DataFrame(np.nan, index=hours, columns=WEATHER_COLUMNS)
+
+
+def check_failed_fetch_is_retried(tmp_path, failed_fetch):
+    provider = FlakyProvider(failed_fetch)
+    store = WeatherStore(str(tmp_path), provider)
+    assert store.backfill(START, END) == 0
+    assert len(store.missing_hours(START, END)) == 24
+    frame = store.read(START, END)
+    assert len(provider.requests) == 2
+    assert not frame.isnull().values.any()
+    assert len(store.missing_hours(START, END)) == 0
+    store.read(START, END)
+    assert len(provider.requests) == 2
+
+
+def test_empty_fetch_is_not_archived(tmp_path):
+    check_failed_fetch_is_retried(tmp_path, empty_fetch)
+
+
+def test_all_nan_fetch_is_not_archived(tmp_path):
+    check_failed_fetch_is_retried(tmp_path, all_nan_fetch)
+
+
+def test_provider_gaps_are_not_refetched(tmp_path):
+    gap = pd.Timestamp("2024-03-01 05:00", tz="UTC")
+    provider = StubProvider(missing_hours=[gap])
+    store = WeatherStore(str(tmp_path), provider)
+    assert store.backfill(START, END) == 23
+    assert len(store.missing_hours(START, END)) == 0
+    frame = store.read(START, END)
+    assert not frame.isnull().values.any()
+    assert len(provider.requests) == 1
+    reopened = WeatherStore(str(tmp_path), provider)
+    reopened.read(START, END)
+    reopened.read(START, END - pd.Timedelta(hours=3))
+    assert len(provider.requests) == 1
+    assert store.read(START, END, fill=False).loc[gap].isnull().all()
+
+
+def test_failed_fetch_is_retried(tmp_path):
+    class FailingProvider:
+        name = "failing"
+
+        def __init__(self):
+            self.requests = []
+
+        def fetch(self, start_utc, end_utc):
+            self.requests.append((start_utc, end_utc))
+            raise OSError("rate limited")
+
+    failing = FailingProvider()
+    store = WeatherStore(str(tmp_path), failing)
+    with pytest.raises(OSError):
+        store.read(START, END)
+    assert len(store.missing_hours(START, END)) == 24
+    store.provider = StubProvider()
+    assert not store.read(START, END).isnull().values.any()
+    assert len(store.provider.requests) == 1
+
+
+def test_widened_range_fetches_only_new_hours(tmp_path):
+    provider = StubProvider()
+    store = WeatherStore(str(tmp_path), provider)
+    store.read(START, END)
+    store.read(START, END + pd.Timedelta(hours=24))
+    assert provider.requests[-1] == (
+        END + pd.Timedelta(hours=1),
+        END + pd.Timedelta(hours=24),
+    )
+    assert len(provider.requests) == 2
+
+
+def test_csv_seeded_once(tmp_path, monkeypatch):
+    csv_path = str(tmp_path / "weather.csv")
+    StubProvider().fetch(START, END).to_csv(csv_path)
+    store = WeatherStore(str(tmp_path / "store"), StubProvider())
+    assert store.seed_once(csv_path)
+    assert len(store.missing_hours(START, END)) == 0
+    monkeypatch.setattr(
+        WeatherStore, "seed_from_csv", lambda self, path: pytest.fail("re-read CSV")
+    )
+    assert not WeatherStore(str(tmp_path / "store")).seed_once(csv_path)
+    store.read(START, END)
+    assert store.provider.requests == []
+
+
+def test_archived_nan_rows_count_as_missing(tmp_path):
+    store = WeatherStore(str(tmp_path), StubProvider())
+    hours = pd.date_range(START, END, freq="h")
+    store.write(all_nan_fetch(START, END), hours)
+    assert len(store.missing_hours(START, END)) == 24
+    assert not store.read(START, END).isnull().values.any()
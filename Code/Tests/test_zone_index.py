@@ -0,0 +1,119 @@
+import os
+import sys
+import json
+import numpy as np
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Backend")
+sys.path.insert(0, BACKEND_DIR)
+from zone_index import ZoneIndex
+
+ORIGIN_LON, ORIGIN_LAT = -74.05, 40.65
+SPACING = 0.02
+
+
+def star_ring(rng, center, radius, num_vertices=24):
+    """A closed, non-convex ring around ``center`` as [lon, lat] pairs."""
+    angles = np.sort(rng.uniform(0, 2 * np.pi, num_vertices))
+    radii = radius * rng.uniform(0.5, 1.0, num_vertices)
+    ring = np.column_stack(
+        [center[0] + radii * np.cos(angles), center[1] + radii * np.sin(angles)]
+    )
+    return np.vstack([ring, ring[:1]]).tolist()
+
+
+def regular_ring(center, radius, num_vertices=12):
+    """A closed, convex ring of ``num_vertices`` points on a circle."""
+    angles = np.linspace(0, 2 * np.pi, num_vertices, endpoint=False)
+    ring = np.column_stack(
+        [center[0] + radius * np.cos(angles), center[1] + radius * np.sin(angles)]
+    )
+    return np.vstack([ring, ring[:1]]).tolist()
+
+
+def synthetic_zones(seed=0):
+    """Zone ID -> list of polygons (lists of rings): single polygons on a grid,
+    zone 1 with a hole that zone 2 sits in and zone 3 as a multipolygon."""
+    rng = np.random.default_rng(seed)
+
+    def center(i, j):
+        return (ORIGIN_LON + (i + 0.5) * SPACING, ORIGIN_LAT + (j + 0.5) * SPACING)
+
+    # Zone 1's outer ring stays beyond 0.225 * SPACING, its hole is at 0.2 and
+    # zone 2 within 0.12, so the rings never cross.
+    zones = {
+        1: [
+            [
+                star_ring(rng, center(0, 0), 0.45 * SPACING, 40),
+                regular_ring(center(0, 0), 0.2 * SPACING),
+            ]
+        ],
+        2: [[star_ring(rng, center(0, 0), 0.12 * SPACING)]],
+        3: [
+            [star_ring(rng, center(1, 0), 0.4 * SPACING)],
+            [star_ring(rng, center(3, 2), 0.4 * SPACING)],
+        ],
+    }
+    zone_id = 4
+    for i in range(4):
+        for j in range(4):
+            if (i, j) not in [(0, 0), (1, 0), (3, 2)]:
+                zones[zone_id] = [[star_ring(rng, center(i, j), 0.45 * SPACING)]]
+                zone_id += 1
+    return zones
+
+
+def write_geojson(path, zones):
+    features = []
+    for zone_id, polygons in zones.items():
+        if len(polygons) == 1:
+            geometry = {"type": "Polygon", "coordinates": polygons[0]}
+        else:
+            geometry = {"type": "MultiPolygon", "coordinates": polygons}
+        features.append(
+            {
+                "type": "Feature",
+                "properties": {"LocationID": zone_id},
+                "geometry": geometry,
+            }
+        )
+    with open(path, "w") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+
+
+def in_ring(lon, lat, ring):
+    """Classic scalar point-in-polygon (pnpoly) for one ring."""
+    inside = False
+    for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]):
+        if (y0 > lat) != (y1 > lat):
+            if lon < x0 + (lat - y0) * (x1 - x0) / (y1 - y0):
+                inside = not inside
+    return inside
+
+
+def point_in_polygon_zone(lon, lat, zones):
+    """LocationID whose rings contain the point an odd number of times, -1 if none."""
+    for zone_id, polygons in zones.items():
+        crossings = sum(
+            in_ring(lon, lat, ring) for polygon in polygons for ring in polygon
+        )
+        if crossings % 2:
+            return zone_id
+    return -1
+
+
+@pytest.mark.parametrize("cells_per_side", [8, 512])
+def test_lookup_matches_point_in_polygon(tmp_path, cells_per_side):
+    zones = synthetic_zones()
+    path = str(tmp_path / "zones.geojson")
+    write_geojson(path, zones)
+    index = ZoneIndex.from_geojson(path, cells_per_side)
+    rng = np.random.default_rng(1)
+    lon = rng.uniform(ORIGIN_LON - 0.01, ORIGIN_LON + 4 * SPACING + 0.01, 4000)
+    lat = rng.uniform(ORIGIN_LAT - 0.01, ORIGIN_LAT + 4 * SPACING + 0.01, 4000)
+    expected = np.array([point_in_polygon_zone(x, y, zones) for x, y in zip(lon, lat)])
+    assert set(expected) == set(zones) | {-1}
+    np.testing.assert_array_equal(index.lookup(lat, lon), expected)
+    single = [index.zone_at(y, x) for x, y in zip(lon[:500], lat[:500])]
+    assert single == [None if z == -1 else z for z in expected[:500]]
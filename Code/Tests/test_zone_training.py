@@ -0,0 +1,114 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Backend")
+BENCHMARKS_DIR = os.path.join(os.path.dirname(TESTS_DIR), "Benchmarks")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+import lightgbm as lgb
+import synthetic_tlc
+from time_features import time_features_frame
+from train_ml import LGBM_PARAMS
+from trip_ingest import count_trips
+from zone_training import classify_zones, plan_worker_budget, train_zone_boosters
+
+PARAMS = {"n_estimators": 200, "num_leaves": 4, "learning_rate": 0.3, "verbose": -1}
+
+
+def hourly_frame(num_hours, seed=0):
+    rng = np.random.default_rng(seed)
+    hours = pd.date_range("2024-01-01", periods=num_hours, freq="h")
+    X = pd.DataFrame(
+        {
+            "hour": hours.hour,
+            "dayofweek": hours.dayofweek,
+            "temperature": rng.normal(10, 5, num_hours),
+        }
+    )
+    y = pd.DataFrame(
+        {
+            1: rng.poisson(30 + 20 * np.sin(2 * np.pi * X["hour"] / 24)),
+            2: rng.poisson(0.05, num_hours),
+        }
+    )
+    return X, y
+
+
+def test_refit_reuses_held_out_strategies_and_rounds():
+    X, y = hourly_frame(24 * 28)
+    valid_hours = 24 * 7
+    # Zone 2 only becomes busy in the held-out week, so on all hours it would be
+    # classified "lightgbm" although the held-out run fitted a baseline.
+    y.loc[len(y) - valid_hours :, 2] = 40
+    X_fit, y_fit = X.iloc[:-valid_hours], y.iloc[:-valid_hours]
+    X_valid, y_valid = X.iloc[-valid_hours:], y.iloc[-valid_hours:]
+    model = train_zone_boosters(
+        X_fit,
+        y_fit,
+        PARAMS,
+        sparse_threshold=0.5,
+        X_valid=X_valid,
+        y_valid=y_valid,
+        early_stopping_rounds=5,
+    )
+    assert model.strategies == {1: "lightgbm", 2: "seasonal_mean"}
+    assert classify_zones(y, 0.5)[2] == "lightgbm"
+
+    refit = train_zone_boosters(
+        X,
+        y,
+        PARAMS,
+        sparse_threshold=0.5,
+        num_boost_rounds=model.best_iterations,
+        strategies=model.strategies,
+    )
+    assert refit.strategies == model.strategies
+    assert refit.best_iterations == model.best_iterations
+    assert model.best_iterations[1] < PARAMS["n_estimators"]
+    predictions = refit.predict(X.to_numpy())
+    assert predictions.shape == y.shape
+
+
+def synthetic_demand(tmp_path, num_zones=8):
+    file_specs = synthetic_tlc.write_trip_months(
+        str(tmp_path), "2024-03", 1, num_zones, 100, seed=2
+    )
+    hours = pd.date_range("2024-03-01", "2024-04-01", freq="h", inclusive="left")
+    hours = hours.tz_localize("UTC")
+    zone_ids = list(range(1, num_zones + 1))
+    counts = count_trips(file_specs, hours[0], len(hours), zone_ids)
+    return time_features_frame(hours), pd.DataFrame(counts, columns=zone_ids)
+
+
+def test_shared_bins_match_independent_boosters(tmp_path):
+    X, y = synthetic_demand(tmp_path)
+    params = {**LGBM_PARAMS, "n_estimators": 20}
+    model = train_zone_boosters(X, y, params, processes=1)
+    forked = train_zone_boosters(X, y, params, processes=2)
+    predictions = model.predict(X.to_numpy())
+    np.testing.assert_array_equal(forked.predict(X.to_numpy()), predictions)
+    booster_params = {k: v for k, v in params.items() if k != "n_estimators"}
+    booster_params["n_jobs"] = 1
+    boosted = [z for z, s in model.strategies.items() if s == "lightgbm"]
+    assert len(boosted) >= len(y.columns) - 1
+    for zone_id in boosted:
+        booster = lgb.train(
+            booster_params,
+            lgb.Dataset(X.to_numpy(dtype=np.float64), label=y[zone_id]),
+            num_boost_round=params["n_estimators"],
+        )
+        np.testing.assert_allclose(
+            predictions[:, list(y.columns).index(zone_id)],
+            booster.predict(X.to_numpy(dtype=np.float64)),
+            atol=1e-9,
+        )
+
+
+def test_worker_budget_stays_within_cores():
+    assert plan_worker_budget(8, 1) == (8, 1)
+    assert plan_worker_budget(8, 2) == (4, 2)
+    assert plan_worker_budget(6, 4) == (1, 4)
+    assert plan_worker_budget(3, 8) == (1, 3)